@@ -21,13 +21,16 @@ from core.Settings import Settings
 import os
 from core.helpers.GlobalMApp import mApp
 
-def extend_debug_prefix( token ):
+def extend_debug_prefix( token, environment = None ):
+	# environment is the dictionary of variables to modify, os.environ by default
+	if environment is None:
+		environment = os.environ
 	indentVar = mApp().getSettings().get( Settings.MomDebugIndentVariable )
 	oldIndent = None
-	if indentVar in os.environ:
-		oldIndent = os.environ[ indentVar ]
+	if indentVar in environment:
+		oldIndent = environment[ indentVar ]
 	elements = filter( lambda x: x, [ oldIndent, token ] )
-	os.environ[ indentVar ] = ' '.join( elements )
+	environment[ indentVar ] = ' '.join( elements )
 	return oldIndent
 
 def restore_debug_prefix( content ):
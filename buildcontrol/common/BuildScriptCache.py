@@ -0,0 +1,115 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.MObject import MObject
+from core.helpers.GlobalMApp import mApp
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+class BuildScriptCache( MObject ):
+	'''BuildScriptCache stores the results of build script queries in a file, so that the build scripts do not have to be 
+	executed for every query.
+	The results for a build script are discarded when the path, modification time or content of the build script, or one of 
+	the configuration files loaded by build scripts changes. Queries that depend on the state of the repository (like the 
+	revisions) are only reused for a limited time.'''
+
+	def __init__( self, cacheFile = None, name = None ):
+		MObject.__init__( self, name )
+		self.__lock = threading.RLock()
+		self.__entries = None
+		self.setCacheFile( cacheFile )
+
+	def setCacheFile( self, cacheFile ):
+		with self.__lock:
+			self.__cacheFile = cacheFile
+			self.__entries = None
+
+	def getCacheFile( self ):
+		return self.__cacheFile
+
+	def _getScriptKey( self, buildScript ):
+		'''Calculate the key that identifies the current version of the build script and the configuration files.'''
+		checksum = hashlib.sha1()
+		for path in [ buildScript ] + mApp().getSettings().getConfigurationFiles():
+			stat = os.stat( path )
+			checksum.update( '{0}:{1}:{2}\n'.format( os.path.abspath( path ), stat.st_mtime, stat.st_size ) )
+			with open( path, 'rb' ) as f:
+				checksum.update( f.read() )
+		return checksum.hexdigest()
+
+	def __getEntries( self ):
+		if self.__entries is None:
+			self.__entries = {}
+			if self.getCacheFile() and os.path.isfile( self.getCacheFile() ):
+				try:
+					with open( self.getCacheFile() ) as f:
+						self.__entries = json.load( f )
+				except ( IOError, ValueError ) as e:
+					mApp().debug( self, 'ignoring unreadable build script cache "{0}": {1}'.format( self.getCacheFile(), e ) )
+		return self.__entries
+
+	def __save( self ):
+		if not self.getCacheFile():
+			return
+		# write to a temporary file and rename it, so that readers never see a partially written cache:
+		folder = os.path.dirname( os.path.abspath( self.getCacheFile() ) )
+		handle, temporaryFile = tempfile.mkstemp( dir = folder, prefix = '.buildscriptcache-' )
+		try:
+			with os.fdopen( handle, 'w' ) as f:
+				json.dump( self.__getEntries(), f )
+			if os.name == 'nt' and os.path.exists( self.getCacheFile() ):
+				os.remove( self.getCacheFile() )
+			os.rename( temporaryFile, self.getCacheFile() )
+		except ( IOError, OSError ) as e:
+			mApp().debug( self, 'cannot save the build script cache "{0}": {1}'.format( self.getCacheFile(), e ) )
+			if os.path.exists( temporaryFile ):
+				os.remove( temporaryFile )
+
+	def get( self, buildScript, query, maximumAge = None ):
+		'''Return the cached result of the query for the build script, or None if it is not cached.
+		If maximumAge (in seconds) is specified, older results are not returned.'''
+		key = self._getScriptKey( buildScript )
+		with self.__lock:
+			entry = self.__getEntries().get( os.path.abspath( buildScript ) )
+			if not entry or entry[ 'key' ] != key:
+				return None
+			result = entry[ 'queries' ].get( query )
+			if not result:
+				return None
+			if maximumAge is not None and time.time() - result[ 'time' ] > maximumAge:
+				return None
+			mApp().debugN( self, 3, 'using cached result of "{0}" for build script "{1}"'.format( query, buildScript ) )
+			return result[ 'value' ]
+
+	def set( self, buildScript, query, value ):
+		'''Store the result of the query for the build script.'''
+		key = self._getScriptKey( buildScript )
+		with self.__lock:
+			entries = self.__getEntries()
+			path = os.path.abspath( buildScript )
+			entry = entries.get( path )
+			if not entry or entry[ 'key' ] != key:
+				entry = { 'key' : key, 'queries' : {} }
+				entries[ path ] = entry
+			entry[ 'queries' ][ query ] = { 'value' : value, 'time' : time.time() }
+			self.__save()
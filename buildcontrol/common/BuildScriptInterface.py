@@ -22,19 +22,21 @@ import sys
 from core.helpers.RunCommand import RunCommand
 from core.Exceptions import MomError
 import re
+import json
 from core.helpers.GlobalMApp import mApp
 import os
-from core.helpers.EnvironmentSaver import EnvironmentSaver
+from core.helpers.ExecutionContext import ExecutionContext
 from buildcontrol.SubprocessHelpers import extend_debug_prefix
 from core.Settings import Settings
 
 class BuildScriptInterface( MObject ):
 	'''BuildScriptInterface encapsulates ways to invoke a build script.'''
 
-	def __init__( self, buildScript, name = None ):
+	def __init__( self, buildScript, name = None, cache = None ):
 		MObject.__init__( self, name )
 		self._initializeParameters()
 		self.setBuildScript( buildScript )
+		self.setCache( cache )
 
 	def _initializeParameters( self ):
 		self.__parameters = []
@@ -48,7 +50,67 @@ class BuildScriptInterface( MObject ):
 	def getBuildScript( self ):
 		return self.__buildScript
 
+	def setCache( self, cache ):
+		'''Set the BuildScriptCache used to store the results of queries, or None to always execute the build script.'''
+		self.__cache = cache
+
+	def getCache( self ):
+		return self.__cache
+
+	def __getQueryKey( self, query ):
+		return ' '.join( [ query ] + self.getParameters() )
+
+	def __cachedQuery( self, query, function, maximumAge = None ):
+		'''Return the result of the query from the cache. If it is not cached, call function, and store the result.'''
+		if not self.getCache():
+			return function()
+		value = self.getCache().get( self.getBuildScript(), self.__getQueryKey( query ), maximumAge )
+		if value is None:
+			value = function()
+			self.getCache().set( self.getBuildScript(), self.__getQueryKey( query ), value )
+		return value
+
+	def queryBatch( self, settings = None, currentRevision = False, revisionsSince = None ):
+		'''Query the settings, and optionally the current revision and the revisions since the specified revision, with one 
+		execution of the build script ("query --json"). The results are stored in the cache, so that the individual query 
+		methods do not execute the build script again.
+		@return a dictionary with the settings in "settings", and "current-revision" and "revisions-since" if requested'''
+		cmd = [ sys.executable, self.getBuildScript(), 'query', '--json' ]
+		if currentRevision:
+			cmd.append( '--current-revision' )
+		if revisionsSince:
+			cmd.extend( [ '--revisions-since', str( revisionsSince ) ] )
+		cmd.extend( settings or [] )
+		cmd.extend( self.getParameters() )
+		runner = RunCommand( cmd, 1800 )
+		runner.run()
+		lines = [ line for line in ( runner.getStdOut() or '' ).splitlines() if line.strip() ]
+		try:
+			result = json.loads( lines[-1] )
+		except ( IndexError, ValueError ):
+			raise MomError( 'The build script "{0}" did not return a query result! It said:\n {1}'
+				.format( self.getBuildScript(), runner.getStdErrAsString() ) )
+		if runner.getReturnCode() != 0 or 'error' in result:
+			raise MomError( 'Cannot query build script "{0}": {1}!'
+				.format( self.getBuildScript(), result.get( 'error' ) or runner.getStdErrAsString() ) )
+		if self.getCache():
+			for name, value in result[ 'settings' ].items():
+				self.getCache().set( self.getBuildScript(), self.__getQueryKey( 'query {0}'.format( name ) ), value )
+			if 'current-revision' in result:
+				self.getCache().set( self.getBuildScript(), self.__getQueryKey( 'print current-revision' ),
+					result[ 'current-revision' ] )
+			if 'revisions-since' in result:
+				self.getCache().set( self.getBuildScript(), self.__getQueryKey( 'print revisions-since {0}'.format( revisionsSince ) ),
+					result[ 'revisions-since' ] )
+		return result
+
+	def __getRevisionCacheLifetime( self ):
+		return mApp().getSettings().get( Settings.SimpleCIRevisionCacheLifetime, False ) or 0
+
 	def querySetting( self, setting ):
+		return self.__cachedQuery( 'query {0}'.format( setting ), lambda: self.__querySetting( setting ) )
+
+	def __querySetting( self, setting ):
 		cmd = [ sys.executable, self.getBuildScript(), 'query', setting ] + self.getParameters()
 		runner = RunCommand( cmd, 1800 )
 		runner.run()
@@ -71,7 +133,10 @@ class BuildScriptInterface( MObject ):
 
 	def queryRevisionsSince( self, revision ):
 		'''Execute the build script, and return the lines it outputs for "query revisions-since"'''
+		return self.__cachedQuery( 'print revisions-since {0}'.format( revision ),
+			lambda: self.__queryRevisionsSince( revision ), self.__getRevisionCacheLifetime() )
 
+	def __queryRevisionsSince( self, revision ):
 		cmd = [ sys.executable, self.getBuildScript(), 'print', 'revisions-since', str( revision ) ] + self.getParameters()
 		runner = RunCommand( cmd, 1800 )
 		runner.run()
@@ -88,6 +153,9 @@ class BuildScriptInterface( MObject ):
 		return lines
 
 	def queryCurrentRevision( self ):
+		return self.__cachedQuery( 'print current-revision', self.__queryCurrentRevision, self.__getRevisionCacheLifetime() )
+
+	def __queryCurrentRevision( self ):
 		cmd = [ sys.executable, self.getBuildScript(), 'print', 'current-revision' ] + self.getParameters()
 		runner = RunCommand( cmd, 1800 )
 		runner.run()
@@ -97,7 +165,7 @@ class BuildScriptInterface( MObject ):
 		revision = runner.getStdOutAsString().strip()
 		return revision
 
-	def executeBuildInfo( self, buildInfo, timeout = 24 * 60 * 60, captureOutput = False ):
+	def executeBuildInfo( self, buildInfo, timeout = 24 * 60 * 60, captureOutput = False, context = None ):
 		params = []
 		# temp 
 		debugLevel = mApp().getSettings().get( Settings.SimpleCIScriptDebugLevel, False ) or 0
@@ -113,7 +181,7 @@ class BuildScriptInterface( MObject ):
 			params.extend( [ '--tag', buildInfo.getTag() ] )
 		if buildInfo.getBranch():
 			params.extend( [ '--branch', buildInfo.getBranch() ] )
-		return self.executeWithArgs( timeout, params, captureOutput )
+		return self.executeWithArgs( timeout, params, captureOutput, context )
 
 	def execute( self, timeout = 24 * 60 * 60, buildType = 'm', revision = None, url = None, args = None, captureOutput = False ):
 		'''Execute the build script. 
@@ -130,14 +198,19 @@ class BuildScriptInterface( MObject ):
 			params.extend( args )
 		return self.executeWithArgs( timeout, params, captureOutput )
 
-	def executeWithArgs( self, timeout = 24 * 60 * 60, args = None, captureOutput = False ):
+	def executeWithArgs( self, timeout = 24 * 60 * 60, args = None, captureOutput = False, context = None ):
+		'''Execute the build script with the arguments.
+		If an execution context is specified, the build script is executed in its working directory and environment.'''
 		cmd = [ sys.executable, os.path.abspath( self.getBuildScript() ) ]
 		if args:
 			cmd.extend( args )
 		mApp().message( self, 'invoking build script: {0}'.format( ' '.join( cmd ) ) )
 		runner = RunCommand( cmd, timeoutSeconds = timeout, captureOutput = captureOutput )
-		with EnvironmentSaver():
-			extend_debug_prefix( 'script>' )
-			runner.run()
+		context = ( context or ExecutionContext() ).clone()
+		extend_debug_prefix( 'script>', context.getEnvironment() )
+		runner.setEnvironment( context.getEnvironment() )
+		if context.getWorkingDir():
+			runner.setWorkingDir( context.getWorkingDir() )
+		runner.run()
 		mApp().debugN( self, 2, 'build script finished, return code is {0}.'.format( runner.getReturnCode() ) )
 		return runner
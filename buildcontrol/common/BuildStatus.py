@@ -17,7 +17,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 from core.MObject import MObject
-import sqlite3, os, sys
+import sqlite3, os, sys, threading, time, uuid
+from threading import Thread, Event, Lock
 from buildcontrol.common.BuildInfo import BuildInfo
 from core.Exceptions import ConfigurationError
 from core.Settings import Settings
@@ -25,17 +26,50 @@ from buildcontrol.common.BuildScriptInterface import BuildScriptInterface
 from core.helpers.FilesystemAccess import make_foldername_from_string
 from core.helpers.GlobalMApp import mApp
 from buildcontrol.SubprocessHelpers import extend_debug_prefix
-from core.helpers.EnvironmentSaver import EnvironmentSaver
+from core.helpers.ExecutionContext import ExecutionContext
+from core.helpers.NodeName import getNodeName
 from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.WorkerPool import WorkerPool
+
+class _LeaseHeartbeat( Thread ):
+	'''_LeaseHeartbeat renews the lease on a build while it is performed.
+	If the worker crashes, the heartbeat stops, the lease expires, and the build can be claimed by another worker.'''
+
+	def __init__( self, buildStatus, buildInfo, owner, leaseTimeout ):
+		Thread.__init__( self )
+		self.daemon = True
+		self.__buildStatus = buildStatus
+		self.__buildInfo = buildInfo
+		self.__owner = owner
+		self.__leaseTimeout = leaseTimeout
+		self.__stopped = Event()
+
+	def run( self ):
+		while not self.__stopped.wait( self.__leaseTimeout / 3.0 ):
+			try:
+				self.__buildStatus.renewLease( self.__buildInfo, self.__owner, self.__leaseTimeout )
+			except sqlite3.Error as e:
+				mApp().debug( self.__buildStatus, 'cannot renew the lease on build {0}: {1}'.format( self.__buildInfo.getBuildId(), e ) )
+
+	def stop( self ):
+		self.__stopped.set()
+		self.join()
 
 class BuildStatus( MObject ):
-	'''Build status stores the status of each individual revision in a sqlite3 database.'''
+	'''Build status stores the status of each individual revision in a sqlite3 database.
+	Builds are claimed by workers through a lease with an expiry time. The lease is renewed while the build is performed.'''
 
 	TableName = 'build_status'
+	SchemaVersionTableName = 'schema_version'
+	SchemaVersion = 3
 
 	def __init__( self, name = None ):
 		MObject.__init__( self, name )
+		self.__connections = threading.local()
+		self.__schemaLock = Lock()
+		self.__schemaReady = None
 		self.setDatabaseFilename( None )
+		self.setBuildScriptCache( None )
 
 	def setDatabaseFilename( self, filePath ):
 		self.__databaseFilename = filePath
@@ -43,9 +77,71 @@ class BuildStatus( MObject ):
 	def getDatabaseFilename( self ):
 		return self.__databaseFilename
 
+	def setBuildScriptCache( self, cache ):
+		self.__buildScriptCache = cache
+
+	def getBuildScriptCache( self ):
+		return self.__buildScriptCache
+
+	def getBuildScriptInterface( self, buildScript ):
+		'''Return a BuildScriptInterface for the build script that stores the query results in the build script cache.'''
+		return BuildScriptInterface( buildScript, cache = self.getBuildScriptCache() )
+
 	def getConnection( self ):
-		conn = sqlite3.connect( self.getDatabaseFilename() )
-		conn.execute( '''CREATE TABLE IF NOT EXISTS {0} (
+		'''Return the database connection of the calling thread.
+		sqlite connections cannot be shared between threads, so every thread opens the database once and keeps the connection. 
+		The schema is created or upgraded when the database is opened for the first time.'''
+		filename = self.getDatabaseFilename()
+		connection = getattr( self.__connections, 'connection', None )
+		if connection is None or self.__connections.filename != filename:
+			# builds performed at the same time write to the database concurrently, wait for the lock for a while:
+			connection = sqlite3.connect( filename, timeout = 60 )
+			mode = connection.execute( 'PRAGMA journal_mode=WAL' ).fetchone()[0]
+			if mode.lower() != 'wal':
+				mApp().debugN( self, 2, 'WAL journaling is not available for "{0}", using journal mode "{1}"'.format( filename, mode ) )
+			connection.execute( 'PRAGMA synchronous=NORMAL' )
+			self.__connections.connection = connection
+			self.__connections.filename = filename
+		with self.__schemaLock:
+			if self.__schemaReady != filename:
+				self.__upgradeSchema( connection )
+				self.__schemaReady = filename
+		return connection
+
+	def __getSchemaVersion( self, connection ):
+		connection.execute( 'CREATE TABLE IF NOT EXISTS {0} ( version int )'.format( BuildStatus.SchemaVersionTableName ) )
+		row = connection.execute( 'select max(version) from {0}'.format( BuildStatus.SchemaVersionTableName ) ).fetchone()
+		return row[0] or 0
+
+	def __upgradeSchema( self, connection ):
+		'''Create the database schema, or upgrade the schema of an existing database in place.
+		Databases created before the schema version was recorded start at version 0. The migrations tolerate partially 
+		upgraded databases, and the upgrade is performed in one exclusive transaction, so that multiple processes sharing 
+		the database do not migrate it at the same time.'''
+		migrations = [ self.__createTable, self.__addLeaseColumns, self.__createIndexes ]
+		assert len( migrations ) == BuildStatus.SchemaVersion
+		connection.isolation_level = None # the sqlite3 module commits implicitly before DDL statements otherwise
+		try:
+			connection.execute( 'BEGIN IMMEDIATE' )
+			try:
+				version = self.__getSchemaVersion( connection )
+				for index in range( version, len( migrations ) ):
+					mApp().debugN( self, 2, 'upgrading the database schema of "{0}" to version {1}'
+						.format( self.getDatabaseFilename(), index + 1 ) )
+					migrations[ index ]( connection )
+				if version < len( migrations ):
+					connection.execute( 'delete from {0}'.format( BuildStatus.SchemaVersionTableName ) )
+					connection.execute( 'insert into {0} ( version ) values ( ? )'.format( BuildStatus.SchemaVersionTableName ),
+						[ len( migrations ) ] )
+				connection.execute( 'COMMIT' )
+			except:
+				connection.execute( 'ROLLBACK' )
+				raise
+		finally:
+			connection.isolation_level = ''
+
+	def __createTable( self, connection ):
+		connection.execute( '''CREATE TABLE IF NOT EXISTS {0} (
 id INTEGER PRIMARY KEY AUTOINCREMENT,
 build_name text,
 status int,
@@ -57,8 +153,17 @@ branch text,
 tag text,
 script text
 )'''.format( BuildStatus.TableName ) )
-		conn.commit()
-		return conn
+
+	def __addLeaseColumns( self, connection ):
+		columns = [ row[1] for row in connection.execute( 'PRAGMA table_info({0})'.format( BuildStatus.TableName ) ) ]
+		for name, columnType in [ ( 'lease_owner', 'text' ), ( 'lease_expiry', 'real' ) ]:
+			if name not in columns:
+				connection.execute( 'ALTER TABLE {0} ADD COLUMN {1} {2}'.format( BuildStatus.TableName, name, columnType ) )
+
+	def __createIndexes( self, connection ):
+		for name, columns in [ ( 'status_priority', 'status, priority' ), ( 'build_name_revision', 'build_name, revision' ),
+				( 'type', 'type' ), ( 'script', 'script' ) ]:
+			connection.execute( 'CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ( {2} )'.format( BuildStatus.TableName, name, columns ) )
 
 	def _saveBuildInfo( self, connection, buildInfos ):
 		try:
@@ -145,10 +250,32 @@ where id=?'''\
 		with self.getConnection() as connection:
 			return self._loadBuildInfo( connection, status )
 
+	def _prefetchBuildScriptQueries( self, buildScript ):
+		'''Query the build name and the revisions needed by registerNewRevisions() with one execution of the build script.
+		The results are stored in the build script cache. The newest known revision is looked up by the build script path, 
+		since the build name is not known yet. If the build script was moved, registerNewRevisions() queries the revisions 
+		again for the newest revision of the build name.'''
+		if not self.getBuildScriptCache():
+			return
+		connection = self.getConnection()
+		try:
+			cursor = connection.cursor()
+			query = 'select revision from {0} where script=? order by id desc limit 1'.format( BuildStatus.TableName )
+			cursor.execute( query, [ buildScript ] )
+			row = cursor.fetchone()
+		finally:
+			cursor.close()
+		iface = self.getBuildScriptInterface( buildScript )
+		if row:
+			iface.queryBatch( [ Settings.ScriptBuildName ], revisionsSince = row[0] )
+		else:
+			iface.queryBatch( [ Settings.ScriptBuildName ], currentRevision = True )
+
 	def registerNewRevisions( self, buildScript ):
 		'''Determines new revisions committed since the last call with the same build script, 
 		and adds those to the database.'''
-		iface = BuildScriptInterface( buildScript )
+		self._prefetchBuildScriptQueries( buildScript )
+		iface = self.getBuildScriptInterface( buildScript )
 		buildName = iface.querySetting( Settings.ScriptBuildName )
 		newestBuildInfo = self.getNewestBuildInfo( buildScript )
 		if newestBuildInfo:
@@ -215,7 +342,7 @@ where id=?'''\
 		if os.path.isdir( directory ):
 			mApp().debug( self, 'found remainders of a previous build, nuking it...' )
 			try:
-				rmtree( directory )
+				rmtree( directory, background = mApp().getSettings().get( Settings.SystemBackgroundDelete ) )
 				mApp().debug( self, '...that was good!' )
 			except ( OSError, IOError ) as e:
 				raise ConfigurationError( 'Remnants of a previous build exist at "{0}" and cannot be deleted, bad. Reason: {1}.'
@@ -226,23 +353,23 @@ where id=?'''\
 			raise ConfigurationError( 'Cannot create required build directory "{0}"!'.format( directory ) )
 		mApp().message( self, 'starting build job for project "{0}" at revision {1}.'
 					.format( buildInfo.getProjectName(), rev ) )
-		with EnvironmentSaver():
-			os.chdir( directory )
-			extend_debug_prefix( buildInfo.getProjectName() )
-			iface = BuildScriptInterface( os.path.abspath( buildInfo.getBuildScript() ) )
-			runner = iface.executeBuildInfo( buildInfo )
-			try:
-				with open( 'buildscript.log', 'w' ) as f:
-					text = runner.getStdOutAsString()
-					f.write( text.decode() )
-			except Exception as e:
-				mApp().message( self, 'Problem! saving the build script output failed during handling an exception! {0}'
-					.format( e ) )
-			if runner.getReturnCode() != 0:
-				mApp().message( self, 'build failed for project "{0}" at revision {1}'.format( buildInfo.getProjectName(), rev ) )
-				# FIXME send out email reports on configuration or MOM errors
-				mApp().message( self, 'exit code {0}'.format( runner.getReturnCode() ) )
-				print( """\
+		# the build is executed in its own context, so that multiple builds can be performed at the same time:
+		context = ExecutionContext( directory )
+		extend_debug_prefix( buildInfo.getProjectName(), context.getEnvironment() )
+		iface = BuildScriptInterface( os.path.abspath( buildInfo.getBuildScript() ) )
+		runner = iface.executeBuildInfo( buildInfo, context = context )
+		try:
+			with open( os.path.join( directory, 'buildscript.log' ), 'w' ) as f:
+				text = runner.getStdOutAsString()
+				f.write( text.decode() )
+		except Exception as e:
+			mApp().message( self, 'Problem! saving the build script output failed during handling an exception! {0}'
+				.format( e ) )
+		if runner.getReturnCode() != 0:
+			mApp().message( self, 'build failed for project "{0}" at revision {1}'.format( buildInfo.getProjectName(), rev ) )
+			# FIXME send out email reports on configuration or MOM errors
+			mApp().message( self, 'exit code {0}'.format( runner.getReturnCode() ) )
+			print( """\
 -->   ____        _ _     _   _____     _ _          _ 
 -->  | __ ) _   _(_) | __| | |  ___|_ _(_) | ___  __| |
 -->  |  _ \| | | | | |/ _` | | |_ / _` | | |/ _ \/ _` |
@@ -250,20 +377,20 @@ where id=?'''\
 -->  |____/ \__,_|_|_|\__,_| |_|  \__,_|_|_|\___|\__,_|
 --> 
 """ )
-				return False
-			else:
-				mApp().message( self, 'build succeeded for project "{0}" at revision {1}'.format( buildInfo.getProjectName(), rev ) )
-				print( """\
+			return False
+		else:
+			mApp().message( self, 'build succeeded for project "{0}" at revision {1}'.format( buildInfo.getProjectName(), rev ) )
+			print( """\
 -->   _         _ _    _      _
 -->  | |__ _  _(_) |__| |  __| |___ _ _  ___
 -->  | '_ \ || | | / _` | / _` / _ \ ' \/ -_)
 -->  |_.__/\_,_|_|_\__,_| \__,_\___/_||_\___|
 --> 
 """ )
-				return True
+			return True
 
 	def getNewestBuildInfo( self, buildScript ):
-		iface = BuildScriptInterface( buildScript )
+		iface = self.getBuildScriptInterface( buildScript )
 		buildName = iface.querySetting( Settings.ScriptBuildName )
 		connection = self.getConnection()
 		try:
@@ -277,7 +404,7 @@ where id=?'''\
 			cursor.close()
 
 	def getBuildInfoForInitialRevision( self, buildScript, projectName ):
-		iface = BuildScriptInterface( buildScript )
+		iface = self.getBuildScriptInterface( buildScript )
 		revision = iface.queryCurrentRevision()
 		buildInfo = BuildInfo()
 		buildInfo.setProjectName( projectName )
@@ -291,7 +418,7 @@ where id=?'''\
 		@return a list of BuildInfo object, with the latest commit last
 		@throws MomEception, if any of the operations fail
 		'''
-		iface = BuildScriptInterface( buildScript )
+		iface = self.getBuildScriptInterface( buildScript )
 		buildInfos = []
 		lines = iface.queryRevisionsSince( revision )
 		for line in lines:
@@ -308,34 +435,104 @@ where id=?'''\
 		buildInfos.reverse()
 		return buildInfos
 
-	def takeBuildInfoAndBuild( self, buildScripts ):
-		'''Take a new revision from the build job list. Mark it as pending, and build it. Mark it as done afterwards.'''
-		buildInfo = None
-		# get the build names of the build scripts:
+	def _claimBuildInfo( self, connection, buildNames, owner, leaseTimeout ):
+		'''Claim the new revision with the highest priority for one of the build names.
+		Builds of other workers with an expired lease are claimed as well. The claim is a single conditional update, so that 
+		every build is claimed by only one worker, even if multiple processes share the database.
+		@return the claimed BuildInfo object, or None if there is nothing to build'''
+		buildNames = list( buildNames )
+		if not buildNames:
+			return None
+		now = time.time()
+		try:
+			cursor = connection.cursor()
+			query = '''select * from {0} where ( status=? or ( status=? and lease_expiry<? ) ) and build_name in ( {1} )
+order by priority desc, id'''.format( BuildStatus.TableName, ', '.join( '?' * len( buildNames ) ) )
+			cursor.execute( query, [ BuildInfo.Status.NewRevision, BuildInfo.Status.Pending, now ] + buildNames )
+			rows = cursor.fetchall()
+			update = '''update {0} set status=?, lease_owner=?, lease_expiry=?
+where id=? and ( status=? or ( status=? and lease_expiry<? ) )'''.format( BuildStatus.TableName )
+			for row in rows:
+				buildInfo = self.__makeBuildInfoFromRow( row )
+				# the list is ordered by priority
+				cursor.execute( update, [ BuildInfo.Status.Pending, owner, now + leaseTimeout, buildInfo.getBuildId(),
+					BuildInfo.Status.NewRevision, BuildInfo.Status.Pending, now ] )
+				if cursor.rowcount != 1:
+					continue # claimed by another worker in the meantime
+				if buildInfo.getBuildStatus() == BuildInfo.Status.Pending:
+					mApp().message( self, 'the lease of {0} on build {1} expired, taking over'.format( row[10], buildInfo.getBuildId() ) )
+				buildInfo.setBuildStatus( BuildInfo.Status.Pending )
+				return buildInfo
+			return None
+		finally:
+			cursor.close()
+
+	def renewLease( self, buildInfo, owner, leaseTimeout ):
+		'''Extend the lease of the owner on the build.'''
+		with self.getConnection() as connection:
+			query = 'update {0} set lease_expiry=? where id=? and lease_owner=?'.format( BuildStatus.TableName )
+			connection.execute( query, [ time.time() + leaseTimeout, buildInfo.getBuildId(), owner ] )
+
+	def _releaseBuildInfo( self, connection, buildInfo, owner ):
+		'''Mark the build as completed, and release the lease.'''
+		buildInfo.setBuildStatus( BuildInfo.Status.Completed )
+		query = 'update {0} set status=?, lease_owner=NULL, lease_expiry=NULL where id=? and lease_owner=?'\
+			.format( BuildStatus.TableName )
+		connection.execute( query, [ buildInfo.getBuildStatus(), buildInfo.getBuildId(), owner ] )
+
+	def __getBuildNames( self, buildScripts ):
 		buildNames = {}
 		for buildScript in buildScripts:
-			iface = BuildScriptInterface( buildScript )
+			iface = self.getBuildScriptInterface( buildScript )
 			buildName = iface.querySetting( Settings.ScriptBuildName )
 			if buildName:
 				buildNames[ buildName ] = buildScript
 			else:
 				# this should not happen, since it was checked before
 				mApp().debug( self, 'build script {0} is broken, ignoring.'.format( buildScript ) )
+		return buildNames
+
+	def __takeBuildInfoAndBuild( self, buildNames ):
+		owner = '{0}:{1}:{2}'.format( getNodeName(), os.getpid(), uuid.uuid4().hex )
+		leaseTimeout = mApp().getSettings().get( Settings.SimpleCIBuildLeaseTimeout )
 		with self.getConnection() as conn:
-			buildInfos = self._loadBuildInfo( conn, BuildInfo.Status.NewRevision )
-			for build in buildInfos:
-				# the list is ordered by priority
-				if build.getProjectName() in buildNames:
-					build.setBuildStatus( BuildInfo.Status.Pending )
-					self._updateBuildInfo( conn, build )
-					buildInfo = build
-					break
+			buildInfo = self._claimBuildInfo( conn, buildNames, owner, leaseTimeout )
 		if not buildInfo:
 			return False
+		heartbeat = _LeaseHeartbeat( self, buildInfo, owner, leaseTimeout )
+		heartbeat.start()
 		try:
 			self.performBuild( buildInfo )
 		finally:
+			heartbeat.stop()
 			with self.getConnection() as conn:
-				buildInfo.setBuildStatus( BuildInfo.Status.Completed )
-				self._updateBuildInfo( conn, buildInfo )
+				self._releaseBuildInfo( conn, buildInfo, owner )
 		return True
+
+	def takeBuildInfoAndBuild( self, buildScripts ):
+		'''Take a new revision from the build job list. Mark it as pending, and build it. Mark it as done afterwards.'''
+		return self.__takeBuildInfoAndBuild( self.__getBuildNames( buildScripts ) )
+
+	def takeBuildInfosAndBuild( self, buildScripts, maximumBuilds, workers = 1 ):
+		'''Take up to maximumBuilds new revisions from the build job list, and build them. Up to workers builds are 
+		performed at the same time.
+		@return the number of builds performed'''
+		if maximumBuilds < 1:
+			return 0
+		buildNames = self.__getBuildNames( buildScripts )
+		lock = Lock()
+		remaining = [ maximumBuilds ]
+
+		def work():
+			count = 0
+			while True:
+				with lock:
+					if remaining[0] <= 0:
+						return count
+					remaining[0] -= 1
+				if not self.__takeBuildInfoAndBuild( buildNames ):
+					return count
+				count += 1
+
+		jobs = [ work ] * min( workers, maximumBuilds )
+		return sum( WorkerPool( len( jobs ) ).run( jobs ) )
@@ -19,12 +19,18 @@
 
 from buildcontrol.SubprocessHelpers import extend_debug_prefix, restore_debug_prefix
 from buildcontrol.simple_ci.SimpleCiBase import SimpleCiBase
-import os
+from core.Settings import Settings
+import subprocess
 import sys
 import time
 
 class Master( SimpleCiBase ):
 
+	def __init__( self, name = None, parent = None ):
+		SimpleCiBase.__init__( self, name, parent )
+		self.__slaveResult = None
+		self.__restartDelay = 0
+
 	def getToolName( self ):
 		return 'simpleci_master'
 
@@ -39,24 +45,35 @@ class Master( SimpleCiBase ):
 """ )
 		while True:
 			self.debug( self, 'running in master mode' )
+			self.__slaveResult = None
 			SimpleCiBase._buildAndReturn( self )
 			if self.getParameters().getPerformTestBuilds():
 				break
-			period = 5
-			self.debug( self, 'short break of {0} seconds'.format( period ) )
-			time.sleep( period )
+			if self.__slaveResult == 0:
+				# the slave exited at the end of its lifetime, restart it right away (after the self-update):
+				self.__restartDelay = 0
+				continue
+			# the slave failed, restart it with an exponential backoff:
+			minimumBackoff = self.getSettings().get( Settings.SimpleCISchedulerMinimumBackoff )
+			maximumBackoff = self.getSettings().get( Settings.SimpleCISchedulerMaximumBackoff )
+			self.__restartDelay = min( maximumBackoff, max( minimumBackoff, 2 * self.__restartDelay ) )
+			self.debug( self, 'slave failed, restarting it in {0} seconds'.format( self.__restartDelay ) )
+			time.sleep( self.__restartDelay )
 
 	def execute( self ):
 		"""This is the main driver method when the control process is run as the master.
-		In an endless loop, it invokes itself in slave mode to perform all builds that have accumulated since the last start.
-		After every run, the master takes a short sleep."""
+		It invokes itself in slave mode to watch the build scripts. The slave performs the builds when the build scripts are 
+		triggered or due, and exits at the end of its lifetime, so that the master can update itself and start a new slave."""
 		# execute the build control process slave:
-		cmd = '{0} {1}'.format( sys.executable, ' '.join( sys.argv + [ '--slave' ] ) )
-		self.debug( self, '*** now starting slave CI process: {0} ***'.format( cmd ) )
+		cmd = [ sys.executable ] + sys.argv + [ '--slave' ]
+		if not self.getParameters().getPerformTestBuilds():
+			cmd.append( '--watch' )
+		self.debug( self, '*** now starting slave CI process: {0} ***'.format( ' '.join( cmd ) ) )
 		oldIndent = extend_debug_prefix( 'slave' )
 		result = -1
 		try:
-			result = os.system( cmd ) # do not use RunCommand, it catches the output
+			result = subprocess.call( cmd ) # do not use RunCommand, it catches the output
 		finally:
 			restore_debug_prefix( oldIndent )
+			self.__slaveResult = result
 		self.debug( self, '*** slave finished with exit code {0}. ***'.format( result ) )
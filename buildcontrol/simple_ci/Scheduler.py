@@ -0,0 +1,199 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.MObject import MObject
+from core.helpers.GlobalMApp import mApp
+import errno
+import os
+import select
+import time
+
+class Scheduler( MObject ):
+	'''Scheduler decides when the SimpleCI slave checks the build scripts for new revisions.
+	Every build script is checked when it is triggered, and otherwise every idle interval. Triggers are local events: files 
+	written to the trigger directory (for example by SCM hooks), lines written to the trigger FIFO in that directory, and 
+	changes of the control directory. A trigger names a build script (the file name without the extension), or triggers all 
+	build scripts if it does not name a known one. Build scripts that fail are retried with an exponential backoff per build 
+	script, triggers do not shorten the backoff.'''
+
+	FifoName = 'trigger.fifo'
+
+	def __init__( self, triggerDir = None, controlDir = None, idleInterval = 5 * 60, pollInterval = 1,
+		minimumBackoff = 60, maximumBackoff = 60 * 60, useFifo = True ):
+		MObject.__init__( self )
+		self.__triggerDir = triggerDir
+		self.__controlDir = controlDir
+		self.__controlDirState = self.__getControlDirState()
+		self.__idleInterval = idleInterval
+		self.__pollInterval = pollInterval
+		self.__minimumBackoff = minimumBackoff
+		self.__maximumBackoff = maximumBackoff
+		self.__fifo = None
+		self.__buildScripts = {}
+		if triggerDir and not os.path.isdir( triggerDir ):
+			os.makedirs( triggerDir )
+		if triggerDir and useFifo and hasattr( os, 'mkfifo' ):
+			self.__openFifo()
+
+	def _getTime( self ):
+		return time.time()
+
+	def getTriggerDir( self ):
+		return self.__triggerDir
+
+	def setBuildScripts( self, buildScripts ):
+		'''Set the build scripts to schedule. New build scripts are due immediately, known ones keep their state.'''
+		states = {}
+		for buildScript in buildScripts:
+			states[ buildScript ] = self.__buildScripts.get( buildScript ) or \
+				{ 'due' : self._getTime(), 'failures' : 0, 'triggered' : True }
+		self.__buildScripts = states
+
+	def getBuildScripts( self ):
+		return sorted( self.__buildScripts )
+
+	def getDueBuildScripts( self ):
+		'''Return the build scripts that should be checked now.'''
+		now = self._getTime()
+		return [ buildScript for buildScript in self.getBuildScripts() if self.__buildScripts[ buildScript ][ 'due' ] <= now ]
+
+	def getFailures( self, buildScript ):
+		return self.__buildScripts[ buildScript ][ 'failures' ]
+
+	def getSecondsUntilDue( self ):
+		'''Return the time until the next build script is due, or the idle interval if no build scripts are scheduled.'''
+		if not self.__buildScripts:
+			return self.__idleInterval
+		due = min( state[ 'due' ] for state in self.__buildScripts.values() )
+		return max( 0, due - self._getTime() )
+
+	def recordSuccess( self, buildScript, moreWork = False ):
+		'''Schedule the next check of a build script that was processed successfully. If moreWork is True, the build 
+		script is due again immediately, for example because the build job cap was reached.'''
+		state = self.__buildScripts[ buildScript ]
+		state.update( failures = 0, triggered = False )
+		state[ 'due' ] = self._getTime() + ( 0 if moreWork else self.__idleInterval )
+
+	def recordFailure( self, buildScript ):
+		'''Schedule the next check of a build script that failed, with an exponential backoff. Return the backoff delay.'''
+		state = self.__buildScripts[ buildScript ]
+		state.update( failures = state[ 'failures' ] + 1, triggered = False )
+		delay = min( self.__maximumBackoff, self.__minimumBackoff * 2 ** ( state[ 'failures' ] - 1 ) )
+		state[ 'due' ] = self._getTime() + delay
+		mApp().debugN( self, 2, 'build script "{0}" failed {1} time(s), retrying in {2} seconds'
+			.format( buildScript, state[ 'failures' ], delay ) )
+		return delay
+
+	def trigger( self, name = None ):
+		'''Trigger the build script with the given name (the file name with or without the extension), or all build scripts
+		if the name does not match a build script. Build scripts in backoff after a failure stay scheduled as they are.'''
+		matches = [ buildScript for buildScript in self.__buildScripts
+			if name in ( os.path.basename( buildScript ), os.path.splitext( os.path.basename( buildScript ) )[0] ) ]
+		now = self._getTime()
+		for buildScript in matches or self.__buildScripts:
+			state = self.__buildScripts[ buildScript ]
+			if not state[ 'failures' ]:
+				state.update( due = min( state[ 'due' ], now ), triggered = True )
+		mApp().debugN( self, 3, 'triggered: {0}'.format( ', '.join( matches ) if matches else 'all build scripts' ) )
+
+	def isTriggered( self, buildScript ):
+		return self.__buildScripts[ buildScript ][ 'triggered' ]
+
+	def wait( self, timeout ):
+		'''Wait until a build script is triggered, or for timeout seconds. Return True if the control directory changed, 
+		in which case the build scripts should be collected again.'''
+		deadline = self._getTime() + timeout
+		while True:
+			triggered = self.__readTriggerFiles()
+			state = self.__getControlDirState()
+			controlDirChanged = state != self.__controlDirState
+			if controlDirChanged:
+				self.__controlDirState = state
+				self.trigger()
+			if triggered or controlDirChanged:
+				return controlDirChanged
+			remaining = deadline - self._getTime()
+			if remaining <= 0:
+				return False
+			if self.__waitForFifo( min( remaining, self.__pollInterval ) ):
+				return False
+
+	def close( self ):
+		if self.__fifo is not None:
+			os.close( self.__fifo )
+			self.__fifo = None
+
+	def __getControlDirState( self ):
+		if not self.__controlDir:
+			return None
+		try:
+			return sorted( name for name in os.listdir( self.__controlDir ) if name.endswith( '.py' ) ), \
+				os.stat( self.__controlDir ).st_mtime
+		except OSError:
+			return None
+
+	def __readTriggerFiles( self ):
+		if not self.__triggerDir:
+			return False
+		triggered = False
+		for name in sorted( os.listdir( self.__triggerDir ) ):
+			path = os.path.join( self.__triggerDir, name )
+			if name == Scheduler.FifoName or name.startswith( '.' ) or not os.path.isfile( path ):
+				continue # hooks write to hidden files first, and rename them when done
+			try:
+				os.remove( path )
+			except OSError:
+				continue # consumed by another slave
+			self.trigger( os.path.splitext( name )[0] )
+			triggered = True
+		return triggered
+
+	def __openFifo( self ):
+		path = os.path.join( self.__triggerDir, Scheduler.FifoName )
+		try:
+			if not os.path.exists( path ):
+				os.mkfifo( path )
+			# non-blocking, so that opening does not wait for a writer:
+			self.__fifo = os.open( path, os.O_RDONLY | os.O_NONBLOCK )
+		except OSError as e:
+			mApp().debug( self, 'cannot open the trigger FIFO "{0}", using trigger files only: {1}'.format( path, e ) )
+			self.__fifo = None
+
+	def __waitForFifo( self, timeout ):
+		'''Wait for timeout seconds or until a trigger is written to the FIFO. Return True if a build script was triggered.'''
+		if self.__fifo is None:
+			time.sleep( timeout )
+			return False
+		try:
+			readable = select.select( [ self.__fifo ], [], [], timeout )[0]
+		except select.error as e:
+			if e.args[0] == errno.EINTR:
+				return False
+			raise
+		if not readable:
+			return False
+		data = os.read( self.__fifo, 4096 )
+		if not data:
+			# all writers closed the FIFO, it stays readable until it is opened again:
+			self.close()
+			self.__openFifo()
+			return False
+		for line in data.splitlines():
+			self.trigger( line.strip() or None )
+		return True
@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from buildcontrol.common.BuildScriptInterface import BuildScriptInterface
+from buildcontrol.common.BuildScriptCache import BuildScriptCache
 from buildcontrol.common.BuildStatus import BuildStatus
 from buildcontrol.simple_ci.SimpleCiParameters import SimpleCiParameters
 from core.Exceptions import ConfigurationError, MomError
@@ -98,38 +98,50 @@ class SimpleCiBase( MApplication ):
 		database = os.path.join( self.getDataDir(), 'buildstatus.sqlite' )
 		self.debug( self, 'using database: {0}'.format( database ) )
 		self.getBuildStatus().setDatabaseFilename( database )
+		self.getBuildStatus().setBuildScriptCache( BuildScriptCache( os.path.join( self.getDataDir(), 'buildscriptcache.json' ) ) )
 		MApplication.build( self ) # call base class implementation
 
 	def performBuilds( self, buildScripts ):
 		'''PerformBuilds is the central method of a SimpleCI run. 
 		It retrieves new revisions, and calls the build scripts.'''
 		error = []
-		x = 0
+		count = 0
 		# register all revisions committed since the last run in the database:
 		if self.getParameters().getFindRevisions():
 			self.debug( self, 'build control: discovering new revisions' )
-			for buildScript in buildScripts:
-				try:
-					self.getBuildStatus().registerNewRevisions( buildScript )
-				except MomError as e:
-					error.append( 'error while processing build script "{0}": {1}'.format( buildScript, e ) )
-					msg = 'error while processing build script "{0}", continuing: {1}'.format( buildScript, e )
-					self.message( self, msg )
+			failures = self.discoverRevisions( buildScripts )
+			error = [ failures[ buildScript ] for buildScript in buildScripts if buildScript in failures ]
 		else:
 			self.debugN( self, 2, 'build control: skipping discovery of new revisions' )
 		if self.getParameters().getPerformBuilds():
-			cap = self.getSettings().get( Settings.SimpleCIBuildJobCap )
-			self.debug( self, 'build control: performing up to {0} builds for new revisions'.format( cap ) )
-			self.getBuildStatus().listNewBuildInfos()
-			for x in range( cap ):
-				if not self.getBuildStatus().takeBuildInfoAndBuild( buildScripts ):
-					break
-			return x
+			return self.buildNewRevisions( buildScripts )
 		else:
 			self.debugN( self, 2, 'build control: skipping build phase' )
 		if error:
 			raise MomError( '. '.join( error ) )
-		return x
+		return count
+
+	def discoverRevisions( self, buildScripts ):
+		'''Register the revisions committed since the last run of every build script in the database.
+		@return a dictionary that maps the build scripts that failed to the error messages'''
+		failures = {}
+		for buildScript in buildScripts:
+			try:
+				self.getBuildStatus().registerNewRevisions( buildScript )
+			except MomError as e:
+				failures[ buildScript ] = 'error while processing build script "{0}": {1}'.format( buildScript, e )
+				msg = 'error while processing build script "{0}", continuing: {1}'.format( buildScript, e )
+				self.message( self, msg )
+		return failures
+
+	def buildNewRevisions( self, buildScripts ):
+		'''Build up to the build job cap of the new revisions of the build scripts.
+		@return the number of builds performed'''
+		cap = self.getSettings().get( Settings.SimpleCIBuildJobCap )
+		workers = self.getSettings().get( Settings.SimpleCIBuildWorkers )
+		self.debug( self, 'build control: performing up to {0} builds for new revisions, {1} at a time'.format( cap, workers ) )
+		self.getBuildStatus().listNewBuildInfos()
+		return self.getBuildStatus().takeBuildInfosAndBuild( buildScripts, cap, workers )
 
 	def checkBuildScripts( self, buildScripts ):
 		'''Verify that the build scripts are working as expected.
@@ -139,7 +151,7 @@ class SimpleCiBase( MApplication ):
 		buildNames = []
 		goodScripts = []
 		for buildScript in buildScripts:
-			iface = BuildScriptInterface( buildScript )
+			iface = self.getBuildStatus().getBuildScriptInterface( buildScript )
 			try:
 				name = iface.querySetting( Settings.ScriptBuildName )
 				if name and name not in buildNames:
@@ -159,7 +171,7 @@ class SimpleCiBase( MApplication ):
 		error = False
 		caughtException = False
 		for script in buildScripts:
-			iface = BuildScriptInterface( script )
+			iface = self.getBuildStatus().getBuildScriptInterface( script )
 			name = iface.querySetting( Settings.ScriptBuildName )
 			buildInfo = self.getBuildStatus().getBuildInfoForInitialRevision( script, name )
 			buildInfo.setBuildType( 's' )
@@ -29,6 +29,7 @@ class SimpleCiParameters( Parameters ):
 		self.setControlDir( None )
 		self.setPerformTestBuilds( False )
 		self.setSlaveMode( False )
+		self.setWatchMode( False )
 		self.setFindRevisions( True )
 		self.setPerformBuilds( True )
 		self.setDelay( None )
@@ -52,6 +53,12 @@ class SimpleCiParameters( Parameters ):
 	def getSlaveMode( self ):
 		return self.__slaveMode
 
+	def setWatchMode( self, onoff ):
+		self.__watchMode = onoff
+
+	def getWatchMode( self ):
+		return self.__watchMode
+
 	def setFindRevisions( self, doIt ):
 		self.__find = doIt
 
@@ -96,6 +103,8 @@ class SimpleCiParameters( Parameters ):
 			help = "do not start build jobs for new revisions (default: do build)" )
 		group.add_option( "-s", "--slave", action = "store_true", dest = "slaveMode",
 			help = "run in slave mode (the one that actually does the builds)" )
+		group.add_option( "-w", "--watch", action = "store_true", dest = "watchMode",
+			help = "keep the slave running, and check the build scripts when they are triggered or due (used by the master)" )
 		group.add_option( "-n", "--instance-name", type = "string", dest = "instance_name",
 			help = "the instance name is used to locate the configuration and database files (see debug output)" )
 		group.add_option( '-p', '--pause', type = 'int', dest = 'delay',
@@ -113,6 +122,8 @@ class SimpleCiParameters( Parameters ):
 			self.setPerformTestBuilds( True )
 		if options.slaveMode:
 			self.setSlaveMode( True )
+		if options.watchMode:
+			self.setWatchMode( True )
 		if options.no_find:
 			self.setFindRevisions( False )
 		if options.no_build:
@@ -17,8 +17,10 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from buildcontrol.simple_ci.Scheduler import Scheduler
 from buildcontrol.simple_ci.SimpleCiBase import SimpleCiBase
 from core.Exceptions import ConfigurationError, MomException
+from core.Settings import Settings
 from core.helpers.GlobalMApp import mApp
 import os
 import time
@@ -28,15 +30,13 @@ class Slave( SimpleCiBase ):
 	def getToolName( self ):
 		return 'simpleci_slave'
 
-	def execute( self ):
-		self.debug( self, 'running in slave mode' )
-		# we are now in slave mode
-		# find the build scripts
-		buildScripts = self.getParameters().getBuildScripts() or []
+	def __findBuildScripts( self ):
+		'''Collect the build scripts from the command line and the control directory, and return those that work.'''
+		buildScripts = list( self.getParameters().getBuildScripts() or [] )
 		if self.getParameters().getControlDir():
 			baseDir = str( self.getParameters().getControlDir() )
 			mApp().message( self, 'using "{0}" as control directory.'.format( baseDir ) )
-			controlDir = os.path.normpath( os.path.join( os.getcwd(), baseDir ) )
+			controlDir = self.__getControlDir()
 			if not os.path.isdir( controlDir ):
 				raise ConfigurationError( 'The control directory "{0}" does not exist!'.format( controlDir ) )
 			folderScripts = filter( lambda x: x.endswith( '.py' ), os.listdir( controlDir ) )
@@ -46,26 +46,34 @@ class Slave( SimpleCiBase ):
 		if not buildScripts:
 			mApp().message( self, 'FYI: no build scripts specified.' )
 		buildScripts = map( lambda x: os.path.normpath( os.path.abspath( x ) ), buildScripts )
-		buildScripts = self.checkBuildScripts( buildScripts )
+		return self.checkBuildScripts( buildScripts )
+
+	def __getControlDir( self ):
+		if not self.getParameters().getControlDir():
+			return None
+		return os.path.normpath( os.path.join( os.getcwd(), str( self.getParameters().getControlDir() ) ) )
+
+	def execute( self ):
+		self.debug( self, 'running in slave mode' )
+		# we are now in slave mode
+		# find the build scripts
+		buildScripts = self.__findBuildScripts()
+		if self.getParameters().getWatchMode() and not self.getParameters().getPerformTestBuilds():
+			self.__watch( buildScripts )
+			return
 		# do the stuff
-		sleepPeriod = 5 * 60 # if there was nothing to do, wait a little before retrying, to not hog the remote side
 		try:
 			if self.getParameters().getPerformTestBuilds():
-				sleepPeriod = 0
 				self.message( self, 'will do a test build for the latest revision of every build script' )
 				self.runBuildScriptTestBuild( buildScripts )
 			else:
-				count = self.performBuilds( buildScripts )
-				if count:
-					sleepPeriod = 5 # just to avoid spawn races in case there is some problem
+				self.performBuilds( buildScripts )
 		except MomException as e:
 			self.registerReturnCode( e.getReturnCode() )
 			self.message( self, 'error during slave run, exit code {0}: {1}'.format( 
 				self.getReturnCode(), e ) )
-			sleepPeriod = 15 * 60 # if there is a problem, the process interrupts for a little longer, to allow for it to be fixed
 		finally:
-			if self.getParameters().getDelay():
-				sleepPeriod = self.getParameters().getDelay()
+			sleepPeriod = self.getParameters().getDelay()
 			if sleepPeriod:
 				self.debug( self, 'sleeping for {0} seconds.'.format( sleepPeriod ) )
 				self.debugN( self, 2, 'Z' )
@@ -73,3 +81,53 @@ class Slave( SimpleCiBase ):
 				self.debugN( self, 2, '.' )
 				time.sleep( sleepPeriod )
 			self.debug( self, 'done, exiting.' )
+
+	def __watch( self, buildScripts ):
+		'''Check the build scripts when they are triggered or due, until the lifetime of the slave expires.'''
+		settings = self.getSettings()
+		triggerDir = settings.get( Settings.SimpleCISchedulerTriggerDirectory ) or os.path.join( self.getDataDir(), 'triggers' )
+		scheduler = Scheduler( triggerDir, self.__getControlDir(),
+			idleInterval = self.getParameters().getDelay() or settings.get( Settings.SimpleCISchedulerIdleInterval ),
+			pollInterval = settings.get( Settings.SimpleCISchedulerPollInterval ),
+			minimumBackoff = settings.get( Settings.SimpleCISchedulerMinimumBackoff ),
+			maximumBackoff = settings.get( Settings.SimpleCISchedulerMaximumBackoff ),
+			useFifo = settings.get( Settings.SimpleCISchedulerUseFifo ) )
+		scheduler.setBuildScripts( buildScripts )
+		mApp().message( self, 'watching for triggers in "{0}".'.format( triggerDir ) )
+		end = time.time() + settings.get( Settings.SimpleCISchedulerLifetime )
+		try:
+			while True:
+				dueScripts = scheduler.getDueBuildScripts()
+				if dueScripts:
+					self.__performScheduledBuilds( scheduler, dueScripts )
+				remaining = end - time.time()
+				if remaining <= 0:
+					break
+				if scheduler.wait( min( scheduler.getSecondsUntilDue(), remaining ) ):
+					scheduler.setBuildScripts( self.__findBuildScripts() )
+		finally:
+			scheduler.close()
+		self.debug( self, 'slave lifetime expired, exiting.' )
+
+	def __performScheduledBuilds( self, scheduler, buildScripts ):
+		'''Discover the new revisions of the build scripts and build them. Failing build scripts are backed off individually.'''
+		failures = {}
+		if self.getParameters().getFindRevisions():
+			self.debug( self, 'build control: discovering new revisions for {0} build script(s)'.format( len( buildScripts ) ) )
+			failures = self.discoverRevisions( buildScripts )
+		goodScripts = [ buildScript for buildScript in buildScripts if buildScript not in failures ]
+		count = 0
+		if goodScripts and self.getParameters().getPerformBuilds():
+			try:
+				count = self.buildNewRevisions( goodScripts )
+			except MomException as e:
+				self.message( self, 'error while performing builds: {0}'.format( e ) )
+				failures.update( ( buildScript, str( e ) ) for buildScript in goodScripts )
+		# if the build job cap was reached, there may be more new revisions to build:
+		cap = self.getSettings().get( Settings.SimpleCIBuildJobCap )
+		moreWork = cap > 0 and count >= cap
+		for buildScript in buildScripts:
+			if buildScript in failures:
+				scheduler.recordFailure( buildScript )
+			else:
+				scheduler.recordSuccess( buildScript, moreWork )
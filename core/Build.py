@@ -87,6 +87,17 @@ class Build( MApplication ):
 		options = self.getParameters().getArgs()[3:]
 		self.getProject().getScm()._handlePrintCommands( command, options )
 
+	def _getQueryResult( self, names = None ):
+		'''Add the revisions requested on the command line to the result of a JSON query.'''
+		result = super( Build, self )._getQueryResult( names )
+		scm = self.getProject().getScm()
+		if self.getParameters().getQueryCurrentRevision():
+			result[ 'current-revision' ] = scm.printCurrentRevision( [] )
+		if self.getParameters().getQueryRevisionsSince():
+			revisions = scm.printRevisionsSince( [ self.getParameters().getQueryRevisionsSince() ] )
+			result[ 'revisions-since' ] = [ line for line in revisions.splitlines() if line.strip() ]
+		return result
+
 	def prepare( self ):
 		'''Execute the prepare phase for builds.'''
 		super( Build, self ).prepare()
@@ -143,7 +154,7 @@ class Build( MApplication ):
 					mApp().debugN( self, 2, 'moved to "{0}".'.format( newFolder ) )
 				else:
 					try:
-						rmtree( baseDir )
+						rmtree( baseDir, background = self.getSettings().get( Settings.SystemBackgroundDelete ) )
 					except ( OSError, shutil.Error ) as o:
 						raise ConfigurationError( 'Cannot remove existing build folder at "{0}": {1}'
 							.format( baseDir, str( o ) ) )
@@ -178,7 +189,7 @@ class Build( MApplication ):
 		elif self.getSettings().get( Settings.ScriptRunMode ) == Settings.RunMode_Build:
 			return super( Build, self ).runExecute()
 		elif self.getSettings().get( Settings.ScriptRunMode ) == Settings.RunMode_Query:
-			self._queryAndPrintSettings( self.getParameters().getArgs()[2:] )
+			self._queryAndPrintSettings( self.getParameters().getArgs()[2:], self.getParameters().getQueryJson() )
 		elif self.getSettings().get( Settings.ScriptRunMode ) == Settings.RunMode_Print:
 			self._printSettings()
 		else:
@@ -222,14 +233,14 @@ class Build( MApplication ):
 				try:
 					if os.path.isdir( self.getLogDir() ):
 						mApp().debugN( self, 2, 'deleting log directory structure at "{0}"'.format( self.getLogDir() ) )
-						shutil.rmtree( self.getLogDir() )
+						rmtree( self.getLogDir(), background = self.getSettings().get( Settings.SystemBackgroundDelete ) )
 				except OSError as e:
 					raise ConfigurationError( 'Cannot delete log directory at "{0}": {1}'.format( self.getLogDir(), str( e ) ) )
 			if self.getPackagesDir():
 				try:
 					if os.path.isdir( self.getPackagesDir() ):
 						mApp().debugN( self, 2, 'deleting packages directory structure at "{0}"'.format( self.getPackagesDir() ) )
-						shutil.rmtree( self.getPackagesDir() )
+						rmtree( self.getPackagesDir(), background = self.getSettings().get( Settings.SystemBackgroundDelete ) )
 				except OSError as e:
 					raise ConfigurationError( 'Cannot delete packages directory at "{0}": {1}'.format( self.getPackagesDir(),
 						str( e ) ) )
@@ -245,8 +256,8 @@ class Build( MApplication ):
 					', '.join( Settings.RunModes ) ) )
 		return MApplication._buildAndReturn( self )
 
-	def createXmlNode( self, document, recursive = True ):
-		node = MApplication.createXmlNode( self, document, recursive )
+	def createXmlNode( self, document, recursive = True, includeSteps = True ):
+		node = MApplication.createXmlNode( self, document, recursive, includeSteps )
 
 		# add machine info
 		for key, value  in machine_info().items():
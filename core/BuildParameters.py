@@ -29,6 +29,16 @@ class BuildParameters( Parameters ):
 e.g.: -s disable-cleanup,enable-create-packages""" )
 		group.add_option( '-d', '--disable-shutdown', action = 'store_true', dest = 'disableShutdown', default = False,
 			help = 'disable the shutdown phase (use this to keep packages, logs and other folders)' )
+		group.add_option( '-j', '--concurrent-configurations', type = 'int', dest = 'concurrentConfigurations',
+			help = 'build up to this many sibling configurations (or environments) at the same time (default: 1)' )
+
+		group = parser.add_option_group( "Query options" )
+		group.add_option( '--json', action = 'store_true', dest = 'queryJson', default = False,
+			help = 'print the result of a query as one JSON document' )
+		group.add_option( '--current-revision', action = 'store_true', dest = 'queryCurrentRevision', default = False,
+			help = 'add the current revision of the repository to a JSON query' )
+		group.add_option( '--revisions-since', action = 'store', dest = 'queryRevisionsSince',
+			help = 'add the revisions committed since the specified revision to a JSON query' )
 
 	def getDescription( self ):
 		return '''\
@@ -38,6 +48,8 @@ Build scripts can be executed in the following run modes:
 * build:    Execute a build (default)
 * query:    Query a Make-O-Matic setting by name
             (e.g. "query script.buildname")
+            With --json, multiple settings and the revisions can be queried at once
+            (e.g. "query --json --current-revision script.buildname")
 * print:    Print information about the project's main repository.
 * describe: Get an human readable description of the build process.\
 '''
@@ -75,6 +87,21 @@ Build scripts can be executed in the following run modes:
 	def getDisableShutdown( self ):
 		return self._getOptions().disableShutdown
 
+	def getConcurrentConfigurations( self ):
+		concurrency = self._getOptions().concurrentConfigurations
+		if concurrency is not None and concurrency < 1:
+			raise ConfigurationError( 'The number of concurrent configurations must be at least 1, not {0}'.format( concurrency ) )
+		return concurrency
+
+	def getQueryJson( self ):
+		return self._getOptions().queryJson
+
+	def getQueryCurrentRevision( self ):
+		return self._getOptions().queryCurrentRevision
+
+	def getQueryRevisionsSince( self ):
+		return self._getOptions().queryRevisionsSince
+
 	def apply( self, settings ):
 		assert isinstance( settings, Settings )
 
@@ -96,6 +123,8 @@ Build scripts can be executed in the following run modes:
 			settings.set( Settings.ScriptIgnoreCommitMessageCommands, self.getIgnoreCommitMessage() )
 		if self.getDebugLevel():
 			settings.set( Settings.ScriptLogLevel, self.getDebugLevel() )
+		if self.getConcurrentConfigurations():
+			settings.set( Settings.BuildConcurrentConfigurations, self.getConcurrentConfigurations() )
 		if len( self.getArgs() ) > 1:
 			runMode = self.getArgs()[1]
 			settings.set( settings.ScriptRunMode, runMode )
@@ -80,13 +80,19 @@ class Defaults( MObject ):
 	# ----- Configuration settings (not specific to individual configurations, but to all)
 	ConfigurationBuildDir = 'configuration.builddir'
 	ConfigurationTargetDir = 'configuration.targetdir'
+	# ----- Report settings:
+	ReportStreamed = 'report.streamed'
+	ReportMaximumOutputSize = 'report.maximumoutputsize'
 	# ----- auto-detected environment settings:
 	EnvironmentsBaseDir = 'environments.basedir'
 	EnvironmentsApplicableBuildTypes = 'environments.applicablebuildtypes'
 	EnvironmentsExpansionModeMapping = 'environments.expansionmodes'
+	EnvironmentsIndexEnabled = 'environments.index'
 	# ----- System path settings:
 	SystemExtraPaths = 'system.extrapaths'
 	SystemShortName = 'system.shortname'
+	SystemCommandCache = 'system.commandcache'
+	SystemBackgroundDelete = 'system.backgrounddelete'
 	# ----- SourceCodeProvider Settings:
 	SourceCodeProviderVersionName = 'scm.branchname'
 	SourceCodeProviderBranchPrefix = 'scm.branchprefix'
@@ -96,8 +102,16 @@ class Defaults( MObject ):
 	SCMSvnBranchPrefix = 'scm.svn.prefix.branch'
 	SCMSvnTagPrefix = 'scm.svn.prefix.tag'
 	SCMSvnTrunkPrefix = 'scm.svn.prefix.trunk'
+	# ----- Git Settings:
+	SCMGitFetchFreshness = 'scm.git.fetchfreshness'
+	SCMGitCheckoutMode = 'scm.git.checkoutmode'
 	# ----- Build settings:
 	BuildMoveOldDirectories = 'build.moveolddirectories'
+	BuildConcurrentConfigurations = 'build.concurrentconfigurations'
+	BuildActionOutputTailSize = 'build.actionoutputtailsize'
+	# ----- Filesystem action settings:
+	DirectoryTreeCopyMode = 'filesystem.treecopy.mode'
+	DirectoryTreeCopyJobs = 'filesystem.treecopy.jobs'
 	# ----- Builder settings
 	MakeBuilderInstallTarget = 'configuration.builder.make.installtarget'
 	MakeBuilderJobsCount = 'configuration.builder.make.jobscount'
@@ -130,6 +144,16 @@ class Defaults( MObject ):
 	SimpleCIBuildJobCap = 'simple_ci.build.cap'
 	SimpleCIScriptDebugLevel = 'simple_ci.build.loglevel'
 	SimpleCIBuildDirectory = 'simple_ci.build.directory'
+	SimpleCIBuildWorkers = 'simple_ci.build.workers'
+	SimpleCIBuildLeaseTimeout = 'simple_ci.build.leasetimeout'
+	SimpleCIRevisionCacheLifetime = 'simple_ci.cache.revisionlifetime'
+	SimpleCISchedulerIdleInterval = 'simple_ci.scheduler.idleinterval'
+	SimpleCISchedulerPollInterval = 'simple_ci.scheduler.pollinterval'
+	SimpleCISchedulerMinimumBackoff = 'simple_ci.scheduler.minimumbackoff'
+	SimpleCISchedulerMaximumBackoff = 'simple_ci.scheduler.maximumbackoff'
+	SimpleCISchedulerTriggerDirectory = 'simple_ci.scheduler.triggerdirectory'
+	SimpleCISchedulerUseFifo = 'simple_ci.scheduler.fifo'
+	SimpleCISchedulerLifetime = 'simple_ci.scheduler.lifetime'
 
 	def getDefaultSettings( self ):
 		home = os.path.expanduser( "~" )
@@ -181,10 +205,14 @@ class Defaults( MObject ):
 		# ----- configuration settings:
 		defaultSettings[ Defaults.ConfigurationBuildDir ] = 'build'
 		defaultSettings[ Defaults.ConfigurationTargetDir ] = 'install'
+		# ----- report settings:
+		defaultSettings[ Defaults.ReportStreamed ] = False # write the report of the build to the log directory incrementally
+		defaultSettings[ Defaults.ReportMaximumOutputSize ] = 64 * 1024 # characters of action output embedded in streamed reports
 		defaultSettings[ Defaults.MakeBuilderInstallTarget ] = 'install'
 		defaultSettings[ Defaults.MakeBuilderJobsCount ] = None
 		# ----- environments settings:
 		defaultSettings[ Defaults.EnvironmentsBaseDir ] = os.path.join( home, 'MomEnvironments' )
+		defaultSettings[ Defaults.EnvironmentsIndexEnabled ] = True # store the index of the environments base directory in the caches folder
 		defaultSettings[ Defaults.EnvironmentsExpansionModeMapping ] = {
 			'c' : Defaults.EnvironmentExpansionMode_BuildHighestScoring,
 			'g' : Defaults.EnvironmentExpansionMode_BuildHighestScoring,
@@ -197,8 +225,15 @@ class Defaults( MObject ):
 		# ----- System path settings:
 		defaultSettings[ Defaults.SystemExtraPaths ] = []
 		defaultSettings[ Defaults.SystemShortName ] = None
+		defaultSettings[ Defaults.SystemCommandCache ] = True # store resolved commands and tool versions in the caches folder
+		defaultSettings[ Defaults.SystemBackgroundDelete ] = True # move deleted build trees to a trash folder and delete them in the background
 		# ----- Build settings:
 		defaultSettings[ Defaults.BuildMoveOldDirectories ] = True
+		defaultSettings[ Defaults.BuildConcurrentConfigurations ] = 1 # number of sibling configurations built at the same time
+		defaultSettings[ Defaults.BuildActionOutputTailSize ] = 256 * 1024 # characters of action output kept in memory, None keeps all
+		# ----- filesystem action settings:
+		defaultSettings[ Defaults.DirectoryTreeCopyMode ] = 'copy' # copy, hardlink or reflink
+		defaultSettings[ Defaults.DirectoryTreeCopyJobs ] = 1 # threads that copy the files of a directory tree, more help on network file systems
 		# ----- Publisher settings:
 		defaultSettings[ Defaults.PublisherPackageBaseHttpURL ] = None
 		defaultSettings[ Defaults.PublisherReportsBaseHttpURL ] = None
@@ -222,6 +257,16 @@ class Defaults( MObject ):
 		defaultSettings[ Defaults.SimpleCIBuildJobCap ] = 8
 		defaultSettings[ Defaults.SimpleCIScriptDebugLevel ] = 0
 		defaultSettings[ Defaults.SimpleCIBuildDirectory ] = None
+		defaultSettings[ Defaults.SimpleCIBuildWorkers ] = 1 # number of builds performed at the same time
+		defaultSettings[ Defaults.SimpleCIBuildLeaseTimeout ] = 10 * 60 # seconds until the build of a crashed worker is released
+		defaultSettings[ Defaults.SimpleCIRevisionCacheLifetime ] = 30 # seconds the revisions reported by build scripts are reused
+		defaultSettings[ Defaults.SimpleCISchedulerIdleInterval ] = 5 * 60 # seconds between checks of build scripts that were not triggered
+		defaultSettings[ Defaults.SimpleCISchedulerPollInterval ] = 1 # seconds between checks of the trigger and control directories
+		defaultSettings[ Defaults.SimpleCISchedulerMinimumBackoff ] = 60 # seconds before a failed build script is retried the first time
+		defaultSettings[ Defaults.SimpleCISchedulerMaximumBackoff ] = 60 * 60 # upper limit of the doubling retry delay
+		defaultSettings[ Defaults.SimpleCISchedulerTriggerDirectory ] = None # None means "triggers" in the instance data directory
+		defaultSettings[ Defaults.SimpleCISchedulerUseFifo ] = True # also wake up on lines written to trigger.fifo in the trigger directory
+		defaultSettings[ Defaults.SimpleCISchedulerLifetime ] = 60 * 60 # seconds until a watching slave exits, so that the master can self-update
 		# ----- SourceCodeProvider Settings:
 		# These settings are saved by the source code provider during the prepare phase:
 		defaultSettings[ Defaults.SourceCodeProviderVersionName ] = None
@@ -243,5 +288,8 @@ class Defaults( MObject ):
 		defaultSettings[ Defaults.SCMSvnBranchPrefix ] = '/branches'
 		defaultSettings[ Defaults.SCMSvnTagPrefix ] = '/tags'
 		defaultSettings[ Defaults.SCMSvnTrunkPrefix ] = '/trunk'
+		# ----- Git Defaults
+		defaultSettings[ Defaults.SCMGitFetchFreshness ] = 60 # seconds a fetch of the hidden clone is reused, 0 fetches every time
+		defaultSettings[ Defaults.SCMGitCheckoutMode ] = 'clone' # clone or worktree
 		# ----- done
 		return defaultSettings
@@ -25,10 +25,13 @@ from core.Settings import Settings
 from core.executomat.Step import Step
 from core.helpers.Enum import Enum
 from core.helpers.EnvironmentSaver import EnvironmentSaver
+from core.helpers.ExecutionContext import ExecutionContext
 from core.helpers.FilesystemAccess import make_foldername_from_string
 from core.helpers.GlobalMApp import mApp
 from core.helpers.TimeKeeper import TimeKeeper
 from core.helpers.TypeCheckers import check_for_nonempty_string_or_none, check_for_nonempty_string, check_for_path_or_none
+from core.helpers.WorkerPool import WorkerPool
+from functools import partial
 import os
 import traceback
 import types
@@ -90,6 +93,25 @@ class Instructions( InstructionsBase ):
 		clone.__steps = deepcopy( self.__steps, memo )
 		return clone
 
+	def _clone( self ):
+		'''Return a lightweight copy of the instructions, used to expand configurations for every matched environment.
+		The copy shares the objects referenced by the original, but gets its own lists, dictionaries and sets, its own 
+		plug-ins (see Plugin._clone()), its own child instructions and its own time keeper. The instructions have to be 
+		cloned before the steps are created.'''
+		assert not self.__steps
+		clone = copy( self )
+		clone._copyContainers()
+		clone.setParent( None )
+		clone.__plugins = []
+		for plugin in self.__plugins:
+			clone.addPlugin( plugin._clone() )
+		clone.__instructions = []
+		for child in self.__instructions:
+			clone.addChild( child._clone() )
+		clone.__timeKeeper = copy( self.__timeKeeper )
+		clone.__steps = []
+		return clone
+
 	def setParent( self, parent ):
 		assert parent == None or isinstance( parent, Instructions )
 		self.__parent = parent
@@ -97,6 +119,14 @@ class Instructions( InstructionsBase ):
 	def getParent( self ):
 		return self.__parent
 
+	def getExecutionContext( self ):
+		'''Return a new execution context for the commands executed for these instructions.
+		By default, the context of the parent is used. The context of the top-level instructions is created from the process 
+		environment.'''
+		if self.getParent():
+			return self.getParent().getExecutionContext()
+		return ExecutionContext()
+
 	def _setBaseDir( self, folder ):
 		check_for_nonempty_string_or_none( folder, 'The instructions base directory must be a folder name, or None!' )
 		self.__baseDir = folder
@@ -250,7 +280,7 @@ class Instructions( InstructionsBase ):
 		for step in self.getSteps():
 				step.describe( prefix + '    ' )
 
-	def createXmlNode( self, document, recursive = True ):
+	def createXmlNode( self, document, recursive = True, includeSteps = True ):
 		node = super( Instructions, self ).createXmlNode( document )
 
 		node.attributes["timing"] = str( self.getTimeKeeper().deltaString() )
@@ -265,12 +295,13 @@ class Instructions( InstructionsBase ):
 				pluginsElement.appendChild( element )
 			node.appendChild( pluginsElement )
 
-		# loop through steps
-		stepsElement = document.createElement( "steps" )
-		for step in self.getSteps():
-			element = step.createXmlNode( document )
-			stepsElement.appendChild( element )
-		node.appendChild( stepsElement )
+		if includeSteps:
+			# loop through steps
+			stepsElement = document.createElement( "steps" )
+			for step in self.getSteps():
+				element = step.createXmlNode( document )
+				stepsElement.appendChild( element )
+			node.appendChild( stepsElement )
 
 		return node
 
@@ -325,8 +356,8 @@ class Instructions( InstructionsBase ):
 	def _runPhase( self, phase ):
 		self._setCurrentPhase( phase )
 
-		with EnvironmentSaver():
-			methodName = self.Phase.getDescription( phase )
+		methodName = self.Phase.getDescription( phase )
+		with EnvironmentSaver(), mApp().getTraceRecorder().span( methodName, 'phase', instructions = self.getName() ):
 
 			mApp().debugN( self, 1, 'Running phase: {0}'.format( methodName ) )
 			method = getattr( self, methodName )
@@ -345,7 +376,14 @@ class Instructions( InstructionsBase ):
 						# do not abort build when plugins crash in these phases
 						catchExceptions = True
 
-					self._call( plugin, methodName, catchExceptions = catchExceptions )
+					if phase in [self.Phase.Report, self.Phase.Notify]:
+						status = ( plugin.getObjectStatus(), plugin.getObjectDescription() )
+						self._call( plugin, methodName, catchExceptions = catchExceptions )
+						if status != ( plugin.getObjectStatus(), plugin.getObjectDescription() ):
+							# the following plugins need to see the changed status in the report:
+							mApp().invalidateXmlReport()
+					else:
+						self._call( plugin, methodName, catchExceptions = catchExceptions )
 
 	def runPrepare( self ):
 		self._runPhase( self.Phase.Prepare )
@@ -368,8 +406,23 @@ class Instructions( InstructionsBase ):
 	def _executeStepRecursively( self, instructions, name ):
 		'''Execute one step of the build sequence recursively, for this object, and all child objects.'''
 		self.executeStep( name )
-		for child in instructions.getChildren():
-			child._executeStepRecursively( child, name )
+		self._executeStepForChildren( instructions.getChildren(), name )
+
+	def _executeStepForChildren( self, children, name ):
+		'''Execute one step of the build sequence recursively for the children.
+		If more than one concurrent configuration is allowed in the settings, the siblings are executed concurrently by a 
+		bounded worker pool. The step is finished for all children before this method returns, so that the order of steps 
+		within every child is preserved. Only the top-most level with multiple children is parallelized, further down the tree 
+		the children are executed one after the other within the worker.'''
+		concurrency = mApp().getSettings().get( Settings.BuildConcurrentConfigurations, False, 1 )
+		if concurrency > 1 and len( children ) > 1 and not WorkerPool.isWorkerThread():
+			mApp().debugN( self, 3, 'executing step "{0}" for {1} children with up to {2} workers'
+				.format( name, len( children ), concurrency ) )
+			jobs = [ partial( child._executeStepRecursively, child, name ) for child in children ]
+			WorkerPool( concurrency ).run( jobs )
+		else:
+			for child in children:
+				child._executeStepRecursively( child, name )
 
 	def executeStep( self, stepName ):
 		'''Execute one individual step.
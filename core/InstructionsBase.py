@@ -18,9 +18,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from core.MObject import MObject
+from copy import copy
 
 class InstructionsBase( MObject ):
 
+	def _copyContainers( self ):
+		'''Replace the lists, dictionaries and sets of a shallow copy with copies of them, so that elements added to the copy 
+		(for example by CMakeBuilder.addCMakeVariable()) are not added to the original. The elements themselves are shared.'''
+		for name, value in self.__dict__.items():
+			if isinstance( value, ( list, dict, set ) ):
+				self.__dict__[ name ] = copy( value )
+
 	def prepare( self ):
 		'''Execute the prepare phase for this object.'''
 		pass
@@ -19,14 +19,19 @@
 
 from __future__ import unicode_literals
 
+import json
+import os
 import sys
 from core.loggers.Logger import Logger
 from core.Exceptions import MomError, MomException, InterruptedException, AbortBuildException
 from core.Settings import Settings
 from core.helpers.TypeCheckers import check_for_nonnegative_int, check_for_nonempty_string
 from core.Instructions import Instructions
+import threading
 import traceback
 from core.helpers.MachineInfo import machine_info
+from core.helpers.TraceRecorder import TraceRecorder
+from core.helpers.XmlReport import InstructionsXmlReport, StreamedXmlReport
 
 class MApplication( Instructions ):
 	'''MApplication represents the facilities provided by the currently running script.
@@ -46,6 +51,11 @@ class MApplication( Instructions ):
 		self.__settings = Settings()
 		self.__exception = None
 		self.__returnCode = None
+		self.__returnCodeLock = threading.Lock()
+		self.__traceRecorder = TraceRecorder()
+		self.__xmlReport = None
+		self.__xmlReportPhase = None
+		self.__xmlReportLock = threading.Lock()
 		self._checkMinimumMomVersion( minimumMomVersion )
 
 	def getMomVersion( self ):
@@ -97,11 +107,44 @@ class MApplication( Instructions ):
 	def getSettings( self ):
 		return self.__settings
 
+	def getXmlReport( self, instructions = None ):
+		'''Return the XML report model for the instructions (the whole build by default).
+		The report of the build is created when it is first requested, and shared by the plugins that report, publish or notify 
+		until it is invalidated, so that the report document is not created and parsed again for every one of them. Plugins 
+		may change their status in the report and notify phases, so the report is invalidated after a plugin of these phases 
+		changed its status or description (see invalidateXmlReport()), and in every new phase.
+		If the report.streamed setting is enabled, the report of the build is written to the log directory incrementally.'''
+		if instructions not in ( None, self ):
+			return InstructionsXmlReport( instructions )
+		with self.__xmlReportLock:
+			if self.__xmlReport is None or self.__xmlReportPhase != self.getCurrentPhase():
+				if self.getSettings().get( Settings.ReportStreamed ) and self.getLogDir() and os.path.isdir( self.getLogDir() ):
+					fileName = os.path.join( self.getLogDir(), '{0}-report.{1}.xml'.format( 
+						self.getTagName(), Instructions.Phase.getDescription( self.getCurrentPhase() ) ) )
+					maximumOutputSize = self.getSettings().get( Settings.ReportMaximumOutputSize )
+					self.__xmlReport = StreamedXmlReport( self, fileName, maximumOutputSize )
+				else:
+					self.__xmlReport = InstructionsXmlReport( self )
+				self.__xmlReportPhase = self.getCurrentPhase()
+			return self.__xmlReport
+
+	def invalidateXmlReport( self ):
+		'''Discard the shared XML report of the build, so that the next request creates it from the current state.'''
+		with self.__xmlReportLock:
+			self.__xmlReport = None
+
+	def getTraceRecorder( self ):
+		'''Return the TraceRecorder that records the timeline of the phases, steps, actions and sub-processes.'''
+		return self.__traceRecorder
+
 	def registerReturnCode( self, code ):
 		check_for_nonnegative_int( code, "The return code of the build script has to be a non-negative integer number!" )
-		if self.__returnCode is None:
+		with self.__returnCodeLock: # steps of different configurations may finish concurrently
+			registered = self.__returnCode is None
+			if registered:
+				self.__returnCode = code
+		if registered:
 			# only if there was no previous error:
-			self.__returnCode = code
 			msg = 'return code {0} registered'.format( code )
 			if self.__returnCode == 0:
 				self.message( self, msg )
@@ -129,38 +172,97 @@ class MApplication( Instructions ):
 		self.debugN( self, 2, "exception registered: {0}".format( exception[0] ) )
 
 		tracebackToUnicode = u"".join( [x.decode( "utf-8" ) for x in exception[1] ] )
-		self.debugN( self, 5, "printing traceback:\n{0}".format( tracebackToUnicode ) )
+		self.debugN( self, 5, "printing traceback:\n{0}", tracebackToUnicode )
 
 	def getException( self ):
 		return self.__exception
 
-	def error( self, mobject, text, compareTo = None ):
+	def __getEnabledLoggers( self, level ):
+		return [ logger for logger in self.getLoggers() if logger.isEnabledFor( self, level ) ]
+
+	@staticmethod
+	def __checkArguments( text, args ):
+		'''Reject format arguments for a text without replacement fields. Before the messages could be formatted, the third 
+		positional argument was compareTo, and would be dropped silently otherwise. Checked even if no logger is enabled.'''
+		if args and not callable( text ) and '{' not in text:
+			raise TypeError( 'format arguments given for a log message without replacement fields: "{0}"'.format( text ) )
+
+	@staticmethod
+	def __formatText( text, args, kwargs ):
+		'''Create the text of a lazy log message. The text is either a callable that returns the message, or a format 
+		string that is formatted with the remaining arguments. Only compareTo is accepted as a keyword argument.'''
+		compareTo = kwargs.pop( 'compareTo', None )
+		if kwargs:
+			raise TypeError( 'unexpected keyword arguments for log message: {0}'.format( ', '.join( kwargs ) ) )
+		if callable( text ):
+			text = text()
+		elif args:
+			text = text.format( *args )
+		return text, compareTo
+
+	def error( self, mobject, text, *args, **kwargs ):
+		self.__checkArguments( text, args )
+		text, compareTo = self.__formatText( text, args, kwargs )
 		[ logger.error( self, mobject, text, compareTo ) for logger in self.getLoggers() ]
 
-	def message( self, mobject, text, compareTo = None ):
-		[ logger.message( self, mobject, text, compareTo ) for logger in self.getLoggers() ]
-
-	def debug( self, mobject, text, compareTo = None ):
-		[ logger.debug( self, mobject, text, compareTo ) for logger in self.getLoggers() ]
-
-	def debugN( self, mobject, level, text, compareTo = None ):
-		[ logger.debugN( self, mobject, level, text, compareTo ) for logger in self.getLoggers() ]
-
-	def _queryAndPrintSettings( self, names = None ):
+	def message( self, mobject, text, *args, **kwargs ):
+		self.__checkArguments( text, args )
+		loggers = self.__getEnabledLoggers( 0 )
+		if loggers:
+			text, compareTo = self.__formatText( text, args, kwargs )
+			[ logger.message( self, mobject, text, compareTo ) for logger in loggers ]
+
+	def debug( self, mobject, text, *args, **kwargs ):
+		'''Log a debug message. See debugN().'''
+		self.__checkArguments( text, args )
+		loggers = self.__getEnabledLoggers( 1 )
+		if loggers:
+			text, compareTo = self.__formatText( text, args, kwargs )
+			[ logger.debug( self, mobject, text, compareTo ) for logger in loggers ]
+
+	def debugN( self, mobject, level, text, *args, **kwargs ):
+		'''Log a debug message of the specified level.
+		The text may be a callable that returns the message, or a format string followed by the format arguments. Both 
+		are only evaluated if a logger is enabled for the level, which avoids the cost of creating messages that are 
+		discarded, e.g. debugN( self, 5, 'output: {0}', output ) or debugN( self, 5, lambda: expensiveDescription() ).
+		compareTo can only be passed as a keyword argument.'''
+		self.__checkArguments( text, args )
+		loggers = self.__getEnabledLoggers( level )
+		if loggers:
+			text, compareTo = self.__formatText( text, args, kwargs )
+			[ logger.debugN( self, mobject, level, text, compareTo ) for logger in loggers ]
+
+	def _querySettings( self, names = None ):
+		'''Return the named settings (all settings if no names are specified) as a dictionary of formatted values.'''
+		settings = self.getSettings().getSettings()
+		result = {}
+		for key in names or settings.keys():
+			if key not in settings:
+				raise MomError( 'Undefined setting "{0}"'.format( key ) )
+			result[ key ] = '{0}'.format( settings[key] )
+		return result
+
+	def _getQueryResult( self, names = None ):
+		'''Return the result of a JSON query. Subclasses may add values that are not settings.'''
+		return { 'settings' : self._querySettings( names ) }
+
+	def _queryAndPrintSettings( self, names = None, printJson = False ):
 		try:
-			settings = self.getSettings().getSettings()
-			if names:
+			if printJson:
+				print( json.dumps( self._getQueryResult( names ) ) )
+			elif names:
 				for key in names:
-					if key in settings:
-						print( '{0}: {1}'.format( key, settings[key] ) )
-					else:
-						raise MomError( 'Undefined setting "{0}"'.format( key ) )
+					value = self._querySettings( [ key ] )[ key ]
+					print( '{0}: {1}'.format( key, value ) )
 			else:
 				# print all
-				for key in settings:
-					print( '{0}: {1}'.format( key, settings[key] ) )
+				for key, value in self._querySettings().items():
+					print( '{0}: {1}'.format( key, value ) )
 		except Exception as e:
-			print( 'Error {0}'.format( unicode( e ) ) )
+			if printJson:
+				print( json.dumps( { 'error' : unicode( e ) } ) )
+			else:
+				print( 'Error {0}'.format( unicode( e ) ) )
 			self.registerReturnCode( 1 )
 
 	def _buildAndReturn( self ):
@@ -67,6 +67,15 @@ class Plugin( InstructionsBase ):
 		clone.__commandSearchPaths = deepcopy( self.__commandSearchPaths, memo )
 		return clone
 
+	def _clone( self ):
+		'''Return a lightweight copy of the plug-in for a cloned instructions object (see Instructions._clone()).
+		The clone gets its own lists, dictionaries and sets, for example the command arguments, and shares the other state 
+		with the original.'''
+		clone = copy( self )
+		clone._copyContainers()
+		clone.setInstructions( None )
+		return clone
+
 	def setEnabled( self, onOff ):
 		self.__enabled = onOff
 
@@ -31,6 +31,7 @@ class Settings( Defaults ):
 		Defaults.__init__( self )
 
 		self.__settings = self.getDefaultSettings()
+		self.__revision = 0
 
 		if sys.platform == 'darwin' or sys.platform == 'win32':
 			self.__momFolder = "Make-O-Matic"
@@ -62,6 +63,28 @@ class Settings( Defaults ):
 			userFolder = os.path.join( userFolder, toolName )
 		return userFolder
 
+	def getCachesFolder( self ):
+		'''Return the folder for data that is kept between runs to speed them up, and that can be deleted at any time.'''
+		if sys.platform == 'darwin':
+			return os.path.expanduser( "~/Library/Caches/Make-O-Matic" )
+		elif sys.platform == 'win32':
+			directory = os.getenv( 'LOCALAPPDATA' ) or os.getenv( 'APPDATA' )
+			return os.path.join( directory, "Make-O-Matic", 'caches' )
+		else:
+			return os.path.expanduser( "~/.mom/caches" )
+
+	def getConfigurationFiles( self, toolName = None ):
+		'''Return the existing default configuration files for the tool, in the order they are loaded.
+		Build scripts load the configuration files for toolName None.'''
+		hostConfigFile = '{0}.py'.format( getNodeName() )
+		configFiles = []
+		for folder in [ self.getGlobalFolder( toolName ), self.getUserFolder( toolName ) ]:
+			for fileName in [ 'config.py', hostConfigFile ]:
+				configFile = os.path.join( folder, fileName )
+				if os.path.isfile( configFile ):
+					configFiles.append( configFile )
+		return configFiles
+
 	def evalConfigurationFiles( self, toolName = None ):
 		folders = [ self.getGlobalFolder( toolName ), self.getUserFolder( toolName ) ]
 		hostConfigFile = '{0}.py'.format( getNodeName() )
@@ -145,6 +168,12 @@ class Settings( Defaults ):
 	def set( self, name, value ):
 		check_for_nonempty_string( name, 'The setting name must be a nonempty string!' )
 		self.getSettings()[ name ] = value
+		self.__revision += 1
+
+	def getRevision( self ):
+		'''Return a number that changes whenever a setting is changed with set(). Values derived from the settings can be 
+		cached until the revision changes.'''
+		return self.__revision
 
 	def getSettings( self ):
 		return self.__settings
@@ -20,13 +20,13 @@
 from core.Exceptions import MomError, MomException, BuildError
 from core.MObject import MObject
 from core.helpers.EnvironmentSaver import EnvironmentSaver
+from core.helpers.ExecutionContext import ExecutionContext
 from core.helpers.GlobalMApp import mApp
 from core.helpers.StringUtils import to_unicode_or_bust
 from core.helpers.TimeKeeper import TimeKeeper
 from core.helpers.TypeCheckers import check_for_path, check_for_int
 from core.helpers.XmlUtils import create_child_node
 import codecs
-import os
 import sys
 import traceback
 
@@ -58,6 +58,8 @@ class Action( MObject ):
 		self.__finished = False
 		self.__aborted = False
 		self.__result = None
+		self.__logFile = None
+		self.__executionContext = None
 		self._setStdOut( None )
 		self._setStdErr( None )
 		self.setIgnorePreviousFailure( False )
@@ -121,38 +123,63 @@ class Action( MObject ):
 			raise MomError( 'getStdOut() queried before the action was finished' )
 		return self.__stdOut
 
-	def executeAction( self, logFile = None ):
-		with self.__timeKeeper:
-			with EnvironmentSaver():
-				if self.getWorkingDirectory():
-					mApp().debugN( self, 3, 'changing directory to "{0}"'.format( self.getWorkingDirectory() ) )
+	def _usesProcessState( self ):
+		'''Return whether run() depends on the process working directory and environment.
+		If so, the execution context is applied to the process, and the process state is restored after the action. Actions 
+		that pass the execution context to the commands explicitly should return False, they do not need to be serialized 
+		when configurations are built concurrently.'''
+		return True
+
+	def _getLogFile( self ):
+		'''Return the log file the action writes to during execution, or None.'''
+		return self.__logFile
+
+	def _getExecutionContext( self ):
+		'''Return the execution context (environment variables and working directory) of the current execution, or None.'''
+		return self.__executionContext
+
+	def executeAction( self, logFile = None, context = None ):
+		'''Execute the action in the execution context, and write the output to the log file.
+		If no context is specified, the process environment is used. The working directory of the action overrides the
+		working directory of the context.'''
+		self.__logFile = logFile
+		self.__executionContext = ( context or ExecutionContext() ).clone( self.getWorkingDirectory() )
+		with self.__timeKeeper, mApp().getTraceRecorder().span( self.getLogDescription(), 'action' ):
+			if self._usesProcessState():
+				with EnvironmentSaver():
+					if self.__executionContext.getWorkingDir():
+						mApp().debugN( self, 3, 'changing directory to "{0}"'.format( self.__executionContext.getWorkingDir() ) )
 					try:
-						os.chdir( str( self.getWorkingDirectory() ) )
+						self.__executionContext.applyToProcess()
 					except ( OSError, IOError ) as e:
 						raise BuildError( str( e ) )
-
-				self._aboutToStart()
-				mApp().debugN( self, 3, 'executing action {0}'.format( self.getLogDescription() ) )
-				try:
-					result = self.run()
-					if result == None or not isinstance( result, int ):
-						raise MomError( 'Action {0} ({1}) did not return a valid non-negative integer return value from run()!'
-									.format( self.getName(), self.getLogDescription() ) )
-					self._setResult( int( result ) )
-					self._finished()
-				except MomException as e:
-					innerTraceback = "".join( traceback.format_tb( sys.exc_info()[2] ) )
-					self._aborted()
-					mApp().debug( self, 'execution failed: "{0}"'.format( str( e ) ) )
-					mApp().debugN( self, 2, innerTraceback )
-
-					self._setStdErr( "{0}:\n\n{1}".format( e, innerTraceback ) )
-					self._setResult( e.getReturnCode() )
+					self.__run()
+			else:
+				self.__run()
 
 		self._writeLog( logFile )
 		mApp().debugN( self, 2, '{0} duration: {1}'.format( self.getLogDescription(), self.__timeKeeper.deltaString() ) )
 		return self.getResult()
 
+	def __run( self ):
+		self._aboutToStart()
+		mApp().debugN( self, 3, 'executing action {0}'.format( self.getLogDescription() ) )
+		try:
+			result = self.run()
+			if result == None or not isinstance( result, int ):
+				raise MomError( 'Action {0} ({1}) did not return a valid non-negative integer return value from run()!'
+							.format( self.getName(), self.getLogDescription() ) )
+			self._setResult( int( result ) )
+			self._finished()
+		except MomException as e:
+			innerTraceback = "".join( traceback.format_tb( sys.exc_info()[2] ) )
+			self._aborted()
+			mApp().debug( self, 'execution failed: "{0}"'.format( str( e ) ) )
+			mApp().debugN( self, 2, innerTraceback )
+
+			self._setStdErr( "{0}:\n\n{1}".format( e, innerTraceback ) )
+			self._setResult( e.getReturnCode() )
+
 	def _writeLog( self, filePath ):
 		"""Write the results of this action to the specified path """
 
@@ -162,8 +189,7 @@ class Action( MObject ):
 
 		try:
 			with codecs.open( filePath, 'a', 'utf-8' ) as f:
-				f.writelines( '*** Log from {0} ***\n'.format( self.getName() ) )
-				f.writelines( '{0}\n'.format( self.getLogDescription() ) )
+				self._writeLogHeader( f )
 				if self.getStdOut() or self.getStdErr():
 					if self.getStdOut():
 						f.writelines( '\n=== Standard output ===\n' + self.getStdOut().rstrip() + "\n" )
@@ -172,15 +198,25 @@ class Action( MObject ):
 				else:
 					f.writelines( '(The action did not generate any output.)\n' )
 
-				# append some separator string
-				f.writelines( "\n*** End of log ***\n\n" )
+				self._writeLogFooter( f )
 		except Exception as e:
 			raise MomError( 'cannot write to log file "{0}": {1}'.format( filePath, str( e ) ) )
 
+	def _writeLogHeader( self, f ):
+		f.write( u'*** Log from {0} ***\n'.format( self.getName() ) )
+		f.write( u'{0}\n'.format( self.getLogDescription() ) )
+
+	def _writeLogFooter( self, f ):
+		# append some separator string
+		f.write( u"\n*** End of log ***\n\n" )
+
 	def getTagName( self ):
 		return "action"
 
-	def createXmlNode( self, document ):
+	def createXmlNode( self, document, maximumOutputSize = None, logFile = None ):
+		"""Create the XML node for this action.
+		If maximumOutputSize is specified and logFile contains the complete output of the action, only the last 
+		maximumOutputSize characters of stdout and stderr are embedded, and the output nodes reference the log file."""
 		node = super( Action, self ).createXmlNode( document )
 
 		node.attributes["finished"] = str( self.didFinish() )
@@ -189,12 +225,22 @@ class Action( MObject ):
 		node.attributes["returncode"] = str( self.getResult() )
 
 		stderr, stdout = self._getOutput()
-		create_child_node( document, node, "stderr", to_unicode_or_bust( stderr ) )
-		create_child_node( document, node, "stdout", to_unicode_or_bust( stdout ) )
+		self._createOutputXmlNode( document, node, "stderr", stderr, maximumOutputSize, logFile )
+		self._createOutputXmlNode( document, node, "stdout", stdout, maximumOutputSize, logFile )
 		create_child_node( document, node, "logdescription", self.getLogDescription() )
 
 		return node
 
+	def _createOutputXmlNode( self, document, parentNode, tagName, output, maximumOutputSize, logFile ):
+		text = to_unicode_or_bust( output ) or ""
+		if maximumOutputSize is None or not logFile or len( text ) <= maximumOutputSize:
+			return create_child_node( document, parentNode, tagName, text )
+		node = create_child_node( document, parentNode, tagName, text[ len( text ) - maximumOutputSize: ] )
+		node.attributes["truncated"] = str( True )
+		node.attributes["size"] = str( len( text ) )
+		node.attributes["logfile"] = logFile
+		return node
+
 	def _getOutput( self ):
 		try:
 			stderr = self.getStdErr()
@@ -18,9 +18,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from core.helpers.TypeCheckers import check_for_nonnegative_int, check_for_list_of_paths
-from core.Exceptions import MomError
+from core.Exceptions import MomError, BuildError
 from core.helpers.RunCommand import RunCommand
 from core.actions.Action import Action
+from core.helpers.ExecutionContext import ExecutionContext
+from core.helpers.GlobalMApp import mApp
+from core.Settings import Settings
+import codecs
+import os
+import shutil
+import tempfile
 
 class ShellCommandAction( Action ):
 	"""ShellCommandAction encapsulates the execution of one command in the Step class. 
@@ -31,6 +38,8 @@ class ShellCommandAction( Action ):
 		self.setCommand( command, timeout, searchPaths )
 		self.__combineOutput = combineOutput
 		self.__runner = None
+		self.__keepCompleteOutput = False
+		self.__writtenToLog = False
 
 	def getLogDescription( self ):
 		"""Provide a textual description for the Action that can be added to the execution log file."""
@@ -52,21 +61,73 @@ class ShellCommandAction( Action ):
 		"""Returns the command"""
 		return map( lambda x: str( x ) , self.__command )
 
+	def setKeepCompleteOutput( self, onOff ):
+		'''If the action writes to a log file, only the tail of the output is kept in memory by default (see 
+		build.actionoutputtailsize). Actions that parse the output after execution need to keep all of it.'''
+		self.__keepCompleteOutput = onOff
+
+	def getKeepCompleteOutput( self ):
+		return self.__keepCompleteOutput
+
 	def _getRunner( self ):
 		if self.__runner == None:
 			raise MomError( "The command runner was not initialized before being queried" )
 		return self.__runner
 
+	def _usesProcessState( self ):
+		'''The execution context is passed to the command runner, the process state is not touched.'''
+		return False
+
 	def run( self ):
 		"""Executes the shell command. Needs a command to be set."""
 		self.__runner = RunCommand( self.__command, self.__timeOutPeriod, self.__combineOutput, self.__searchPaths )
-		if self.getWorkingDirectory() != None:
-			self.__runner.setWorkingDir( self.getWorkingDirectory() )
-		self._getRunner().run()
+		context = self._getExecutionContext() or ExecutionContext( self.getWorkingDirectory() )
+		self.__runner.setEnvironment( context.getEnvironment() )
+		if context.getWorkingDir() != None:
+			if not os.path.isdir( context.getWorkingDir() ):
+				raise BuildError( 'The working directory "{0}" does not exist!'.format( context.getWorkingDir() ) )
+			self.__runner.setWorkingDir( context.getWorkingDir() )
+		self.__writtenToLog = False
+		if self._getLogFile():
+			self.__runWithLog( self._getLogFile() )
+		else:
+			self._getRunner().run()
 		self._setStdOut( self._getRunner().getStdOut() )
 		self._setStdErr( self._getRunner().getStdErr() )
 		return self._getRunner().getReturnCode()
 
+	def __runWithLog( self, filePath ):
+		'''Execute the command and write its output to the log file while it runs, so that the log can be followed 
+		during the build. Error output is collected in a temporary file and appended after the standard output.'''
+		self._getRunner().resolveCommand() # fail before the log is started if the command cannot be found
+		if not self.getKeepCompleteOutput():
+			self._getRunner().setMaximumOutputSize( mApp().getSettings().get( Settings.BuildActionOutputTailSize ) )
+		try:
+			log = codecs.getwriter( 'utf-8' )( open( filePath, 'ab' ) )
+		except IOError as e:
+			raise MomError( 'cannot write to log file "{0}": {1}'.format( filePath, str( e ) ) )
+		with log:
+			self.__writtenToLog = True
+			self._writeLogHeader( log )
+			log.write( u'\n=== Standard output ===\n' )
+			errors = None if self.__combineOutput else tempfile.TemporaryFile()
+			try:
+				self._getRunner().setOutputStreams( log, codecs.getwriter( 'utf-8' )( errors ) if errors else None )
+				self._getRunner().run()
+			finally:
+				if errors:
+					if errors.tell() > 0:
+						log.write( u'\n=== Error output ===\n' )
+						errors.seek( 0 )
+						shutil.copyfileobj( errors, log.stream )
+					errors.close()
+				self._writeLogFooter( log )
+
+	def _writeLog( self, filePath ):
+		if self.__writtenToLog:
+			return # the output was written to the log file while the command was executed
+		Action._writeLog( self, filePath )
+
 	def hasTimedOut( self ):
 		"""Returns True if the shell command process timed out, e.g., was not completed within the timeout period.
 		Can only be called after execution."""
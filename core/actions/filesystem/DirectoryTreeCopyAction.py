@@ -18,21 +18,27 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from core.Exceptions import MomError
+from core.Settings import Settings
 from core.actions.filesystem.CopyActionBase import CopyActionBase
 from core.helpers.GlobalMApp import mApp
+from core.helpers.TreeCopier import TreeCopier
 from core.helpers.TypeCheckers import check_for_list_of_strings
-import os
 import shutil
 
 class DirectoryTreeCopyAction( CopyActionBase ):
 	"""DirectoryTreeCopyAction encapsulates the copying of a directory tree 
 	to another directory, optionally ignoring some files.
-	It is mostly used internally, but can be of general use as well."""
+	It is mostly used internally, but can be of general use as well.
+	The files are copied by a TreeCopier. If mode or jobs are None, they are read from the filesystem.treecopy.mode and 
+	filesystem.treecopy.jobs settings when the action is executed."""
 
-	def __init__( self, source = None, destination = None, ignorePatterns = None, overwrite = False ):
+	def __init__( self, source = None, destination = None, ignorePatterns = None, overwrite = False, mode = None, jobs = None ):
 		CopyActionBase.__init__( self, sourceLocation = source, targetLocation = destination )
 
 		self.__overwrite = overwrite
+		self.__mode = mode
+		self.__jobs = jobs
 
 		if ignorePatterns == None:
 			ignorePatterns = []
@@ -43,53 +49,25 @@ class DirectoryTreeCopyAction( CopyActionBase ):
 		"""Provide a textual description for the Action that can be added to the execution log file."""
 		return "copytree {0} {1}, ignoring {2}".format( str( self.getSourcePath() ), str( self.getDestinationPath() ), self.__ignorePatterns )
 
-	def mycopytree( self, src, dst, ignore = None , overwrite = False ):
-		"""Copies the directory tree."""
-
-		names = os.listdir( src )
+	def getMode( self ):
+		return self.__mode or mApp().getSettings().get( Settings.DirectoryTreeCopyMode )
 
-		if ignore is not None:
-			ignored_names = ignore( src, names )
-		else:
-			ignored_names = set()
+	def getJobs( self ):
+		return self.__jobs or mApp().getSettings().get( Settings.DirectoryTreeCopyJobs )
 
-		if not os.path.exists( dst ):
-			try:
-				os.makedirs( dst )
-			except OSError as e:
-				err = 'Could not create Directory {0}: {1}'.format( dst, str( e ) )
-				self._setStdErr( err.encode() )
-				mApp().debug( self, err )
-				return 1
-		for name in names:
-			if name in ignored_names:
-				continue
-			srcname = os.path.join( src, name )
-			dstname = os.path.join( dst, name )
+	def mycopytree( self, src, dst, ignore = None , overwrite = False ):
+		"""Copies the directory tree."""
 
-			if os.path.isdir( srcname ):
-				self.mycopytree( srcname, dstname, ignore )
-			else:
-				if self.__overwrite or not os.path.isfile( dstname ):
-					try:
-						shutil.copy2( srcname, dstname )
-					except IOError as e:
-						err = 'Could not copy file from {0} to {1}: {2}'.format( srcname, dstname, str( e ) )
-						self._setStdErr( err.encode() )
-						mApp().debug( self, err )
-						return 1
-				# XXX What about devices, sockets etc.?
+		copier = TreeCopier( ignore, overwrite, self.getMode(), self.getJobs() )
 		try:
-			shutil.copystat( src, dst )
-		except OSError, why:
-			if WindowsError is not None and isinstance( why, WindowsError ): #@UndefinedVariable
-			# Copying file access times may fail on Windows
-				pass
-			else:
-				err = 'Could not copy stat from {0} to {1}: {2}'.format( src, dst, str( why ) )
-				self._setStdErr( err.encode() )
-				mApp().debug( self, err )
-				return 1
+			copier.copyTree( src, dst )
+		except MomError as e:
+			err = str( e )
+			self._setStdErr( err.encode() )
+			mApp().debug( self, err )
+			return 1
+		self._setStdOut( copier.getSummary().encode() )
+		mApp().debugN( self, 3, copier.getSummary )
 		return 0
 
 	def run( self ):
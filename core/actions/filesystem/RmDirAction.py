@@ -17,13 +17,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from core.Settings import Settings
 from core.helpers.TypeCheckers import check_for_path
 from core.helpers.GlobalMApp import mApp
 from core.helpers.SafeDeleteTree import rmtree
 from core.actions.filesystem.DirActionBase import DirActionBase
 
 class RmDirAction( DirActionBase ):
-	"""RmDirAction deletes a directory."""
+	"""RmDirAction deletes a directory.
+	If the system.backgrounddelete setting is enabled, the directory is moved to a trash folder and deleted in the background."""
 
 	def __init__( self, path, name = None ):
 		DirActionBase.__init__( self, path, name )
@@ -33,7 +35,7 @@ class RmDirAction( DirActionBase ):
 		check_for_path( self.getPath(), "No directory specified!" )
 		mApp().debugN( self, 2, 'deleting directory "{0}"'.format( self.getPath() ) )
 		try:
-			rmtree( str( self.getPath() ) )
+			rmtree( str( self.getPath() ), background = mApp().getSettings().get( Settings.SystemBackgroundDelete ) )
 			return 0
 		except ( OSError, IOError ) as e:
 			error = 'error deleting directory "{0}": {1}'.format( self.getPath(), str( e ) )
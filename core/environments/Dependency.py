@@ -30,6 +30,15 @@ class Dependency( MObject ):
 
 	_ControlFileName = 'MOM_PACKAGE_CONFIGURATION'
 	_CommandPrefix = 'MOM_'
+	# the expressions are compiled once, they are matched against every line of every control file:
+	_CommentRe = re.compile( '^\s*#' )
+	_EmptyLineRe = re.compile( '^\s*$' )
+	_CommandRe = re.compile( '^{0}'.format( _CommandPrefix ) )
+	_EnabledRe = re.compile( '^({0}PACKAGE_ENABLED)\s+(\w+)$'.format( _CommandPrefix ) )
+	_DescriptionRe = re.compile( '^({0}PACKAGE_DESCRIPTION)\s+(.+)$'.format( _CommandPrefix ) )
+	_ScoreRe = re.compile( '^({0}PACKAGE_SCORE)\s+(.+)$'.format( _CommandPrefix ) )
+	_ExportRe = re.compile( '^({0}EXPORT)\s+(\w+)\s+(.+)$'.format( _CommandPrefix ) )
+	_AddPathRe = re.compile( '^({0}ADD_PATH)\s+(\w+)\s+(\w+)\s+(.+)$'.format( _CommandPrefix ) )
 
 	def __init__( self, folder = None, name = None ):
 		MObject.__init__( self, name )
@@ -92,12 +101,12 @@ class Dependency( MObject ):
 				mApp().debugN( self, 3, 'loading settings from package control file "{0}"'.format( str ( controlFile ) ) )
 				self._setValid( True )
 				for line in inputFile.readlines():
-					if re.match( '^\s*#', line ):
+					if Dependency._CommentRe.match( line ):
 						continue # ignore comments
-					if re.match( '^\s*$', line ):
+					if Dependency._EmptyLineRe.match( line ):
 						continue # ignore empty lines
 					line = line.strip()
-					if re.match( '^{0}'.format( Dependency._CommandPrefix ), line ):
+					if Dependency._CommandRe.match( line ):
 						if not self.applyProperty( controlFile, line ):
 							self._addCommand( line )
 				if not self.getObjectStatus():
@@ -107,10 +116,27 @@ class Dependency( MObject ):
 			mApp().debugN( self, 3, 'no control file found at "{0}"'.format( controlFile ) )
 			return False
 
+	def getIndexEntry( self ):
+		'''Return the parsed control file as a dictionary that can be stored in the EnvironmentsIndex.'''
+		return { 'name' : os.path.basename( self.getFolder() ), 'valid' : self.isValid(), 'enabled' : self.isEnabled(),
+			'score' : self.getScore(), 'description' : self.getObjectStatus(), 'commands' : list( self.getCommands() ) }
+
+	@staticmethod
+	def fromIndexEntry( folder, entry ):
+		'''Create the dependency for the folder from an entry created by getIndexEntry(), without reading the control file.'''
+		dependency = Dependency( folder )
+		dependency._setValid( entry[ 'valid' ] )
+		dependency.setEnabled( entry[ 'enabled' ] )
+		dependency.setScore( entry[ 'score' ] )
+		dependency.setObjectStatus( entry[ 'description' ] )
+		for line in entry[ 'commands' ]:
+			dependency._addCommand( line )
+		return dependency
+
 	def applyProperty( self, controlFile, line ):
-		enabledLine = re.match( '^({0}PACKAGE_ENABLED)\s+(\w+)$'.format( Dependency._CommandPrefix ), line )
-		descriptionLine = re.match( '^({0}PACKAGE_DESCRIPTION)\s+(.+)$'.format( Dependency._CommandPrefix ), line )
-		scoreLine = re.match( '^({0}PACKAGE_SCORE)\s+(.+)$'.format( Dependency._CommandPrefix ), line )
+		enabledLine = Dependency._EnabledRe.match( line )
+		descriptionLine = Dependency._DescriptionRe.match( line )
+		scoreLine = Dependency._ScoreRe.match( line )
 		# parse for "enabled" commands:
 		try:
 			if enabledLine:
@@ -143,31 +169,34 @@ class Dependency( MObject ):
 	def applyCommand( self, line ):
 		pass
 
-	def apply( self ):
+	def apply( self, context = None ):
+		'''Apply the dependency to the environment variables of the execution context, or to the process environment if no 
+		context is specified.'''
 		assert self.getFolder()
+		environment = context.getEnvironment() if context else os.environ
 		controlFile = self._getControlFileName( self.getFolder() )
 		for line in self.getCommands():
-			assert( not re.match( '^\s*#', line ) and not re.match( '^\s*$', line ) )
-			export = re.match( '^({0}EXPORT)\s+(\w+)\s+(.+)$'.format( Dependency._CommandPrefix ), line )
-			addTo = re.match( '^({0}ADD_PATH)\s+(\w+)\s+(\w+)\s+(.+)$'.format( Dependency._CommandPrefix ), line )
-			enabled = re.match( '^({0}PACKAGE_ENABLED)\s+(\w+)$'.format( Dependency._CommandPrefix ), line )
+			assert( not Dependency._CommentRe.match( line ) and not Dependency._EmptyLineRe.match( line ) )
+			export = Dependency._ExportRe.match( line )
+			addTo = Dependency._AddPathRe.match( line )
+			enabled = Dependency._EnabledRe.match( line )
 			# parse commands:
 			try:
 				if export:
 					variable = str( export.group( 2 ) )
 					value = self._expandVariables( export.group( 3 ) )
 					mApp().debugN( self, 3, 'setBuildEnvironment: >export< ' + variable + '="' + value + '"' )
-					os.environ[variable] = value
+					environment[variable] = value
 				elif addTo:
 					variable = str( addTo.group( 2 ) )
 					mode = self._expandVariables( addTo.group( 3 ) )
 					value = self._expandVariables( addTo.group( 4 ) )
 					if mode == 'APPEND':
 						mApp().debugN( self, 3, 'setBuildEnvironment: >append< ' + variable + ': "' + value + '"' )
-						add_to_path_collection( variable, value, 'append' )
+						add_to_path_collection( variable, value, 'append', environment )
 					elif mode == 'PREPEND':
 						mApp().debugN( self, 3, 'setBuildEnvironment: >prepend< ' + variable + ': "' + value + '"' )
-						add_to_path_collection( variable, value, 'prepend' )
+						add_to_path_collection( variable, value, 'prepend', environment )
 					else:
 						raise ConfigurationError( 'mode missing' )
 				elif enabled:
@@ -179,7 +208,7 @@ class Dependency( MObject ):
 					else:
 						raise ConfigurationError( 'enable must be true or false' )
 					mApp().debugN( self, 3, 'setBuildEnvironment: >enabled< ' + str( enabled ) )
-				elif re.match( '^{0}'.format( Dependency._CommandPrefix ), line ):
+				elif Dependency._CommandRe.match( line ):
 					mApp().message( self, 'unknown command in control file for ' + controlFile + '\n--> ' + str( line ).strip() )
 				else:
 					mApp().message( self, 'parse error in control file for ' + controlFile + '\n--> ' + str( line ).strip() )
@@ -18,7 +18,6 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 from core.ConfigurationBase import ConfigurationBase
 from core.helpers.EnvironmentSaver import EnvironmentSaver
-from copy import deepcopy
 
 class Environment( ConfigurationBase ):
 	'''Environment is a single match of the required build environment for a single 
@@ -37,8 +36,7 @@ class Environment( ConfigurationBase ):
 		for configuration in configs:
 			# cloning needs to be done before the steps are created
 			assert not configuration.getSteps()
-			clone = deepcopy( configuration )
-			self.addChild( clone )
+			self.addChild( configuration._clone() )
 
 	def setDependencies( self, deps ):
 		self.__deps = deps
@@ -50,16 +48,15 @@ class Environment( ConfigurationBase ):
 		assert dep not in self.__deps
 		self.__deps.append( dep )
 
-	def __applyDependencies( self ):
+	def __applyDependencies( self, context = None ):
 		for dep in self.getDependencies():
-			dep.apply()
+			dep.apply( context )
 
-	def _executeStepRecursively( self, instructions, name ):
-		'''Apply the environment, call the base class method, restore the environment.'''
-		with EnvironmentSaver():
-			self.__applyDependencies()
-			# build configuration (error handling is done in the configuration)
-			ConfigurationBase._executeStepRecursively( self, instructions, name )
+	def getExecutionContext( self ):
+		'''Apply the dependencies of the environment to the execution context of the parent.'''
+		context = ConfigurationBase.getExecutionContext( self )
+		self.__applyDependencies( context )
+		return context
 
 	def makeDescription( self ):
 		names = []
@@ -0,0 +1,150 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError
+import fnmatch
+import os
+import re
+
+class EnvironmentMatcher( object ):
+	'''EnvironmentMatcher finds the combinations of installed MOM packages that provide a list of required dependencies.
+	A combination is a match if every dependency (a shell pattern) is provided by a different package, and all packages are 
+	installed in one installation folder or in the folders above it, with at least one package in the installation folder itself.
+	The candidates for every dependency are determined once per installation folder, and partial combinations that cannot be 
+	completed anymore are pruned, so that the effort grows with the number of matches, not with the number of combinations.'''
+
+	def __init__( self, dependencies ):
+		self.__dependencies = list( dependencies )
+		self.__expressions = [ re.compile( fnmatch.translate( os.path.normcase( pattern ) ) ) for pattern in self.__dependencies ]
+
+	def getDependencies( self ):
+		return self.__dependencies
+
+	def findMatches( self, root, installedDependencies ):
+		'''Return all matches, as tuples of the installed dependencies in the order of the required dependencies.
+		installedDependencies maps the normalized absolute package folders to the Dependency objects.'''
+		matches = []
+		found = set()
+		for candidates in self.__findCandidates( root, installedDependencies ):
+			for match in self.__enumerate( candidates, 0, [], False ):
+				key = frozenset( match ) # the same pattern may be required twice
+				if key not in found:
+					found.add( key )
+					matches.append( tuple( match ) )
+		return matches
+
+	def findBestMatch( self, root, installedDependencies ):
+		'''Return the match with the highest package scores, compared in the order of the required dependencies, or None.
+		For every installation folder, the score of every dependency is fixed in order, to the highest score that still allows
+		a match. Only the score is fixed, not the package, because a package may be a candidate for more than one dependency,
+		and another package with the same score may leave the first one for a later dependency. A match with the fixed scores
+		is then searched for, the other combinations are never enumerated.'''
+		bestMatch = None
+		bestScores = None
+		for candidates in self.__findCandidates( root, installedDependencies ):
+			if not self.__isFeasible( candidates, 0, [], False ):
+				continue
+			for index, options in enumerate( candidates ):
+				for score in sorted( set( dependency.getScore() for dependency, _ in options ), reverse = True ):
+					restricted = candidates[:index] + [ [ option for option in options if option[0].getScore() == score ] ] \
+						+ candidates[index + 1:]
+					if self.__isFeasible( restricted, 0, [], False ):
+						candidates = restricted
+						break
+			match = next( self.__enumerate( candidates, 0, [], False ) )
+			scores = tuple( dependency.getScore() for dependency in match )
+			if bestScores is None or scores > bestScores:
+				bestMatch, bestScores = tuple( match ), scores
+		return bestMatch
+
+	def __findCandidates( self, root, installedDependencies ):
+		'''Generate the candidates for every installation folder that can provide a match. The candidates are a list of 
+		( dependency, inInstallationFolder ) tuples for every required dependency.'''
+		root = os.path.normpath( os.path.abspath( root ) )
+		prefix = os.path.join( root, '' )
+		packages = {}
+		for path in sorted( installedDependencies ):
+			folder, name = os.path.split( path )
+			if folder != root and not folder.startswith( prefix ):
+				raise MomError( 'The MOM dependency is supposed to be a sub directory of the MOM environments folder!' )
+			packages.setdefault( folder, [] ).append( ( os.path.normcase( name ), installedDependencies[ path ] ) )
+		# match every package against every pattern only once:
+		provided = {}
+		for folder, contents in packages.items():
+			provided[ folder ] = [ [ dependency for packageName, dependency in contents if expression.match( packageName ) ]
+				for expression in self.__expressions ]
+		for folder in sorted( provided ):
+			if not any( provided[ folder ] ):
+				continue # a match needs at least one package from the installation folder
+			candidates = [ [ ( dependency, True ) for dependency in dependencies ] for dependencies in provided[ folder ] ]
+			parent = folder
+			while parent != root:
+				parent = os.path.dirname( parent )
+				for options, dependencies in zip( candidates, provided.get( parent, [] ) ):
+					options.extend( ( dependency, False ) for dependency in dependencies )
+			if all( candidates ):
+				yield candidates
+
+	def __enumerate( self, candidates, index, chosen, inInstallationFolder ):
+		'''Generate the matches that complete the chosen packages, in the order of the candidates.'''
+		if index == 0 and not self.__isFeasible( candidates, 0, chosen, False ):
+			return
+		if index == len( candidates ):
+			yield list( chosen )
+			return
+		for dependency, isLocal in candidates[ index ]:
+			if dependency in chosen:
+				continue
+			chosen.append( dependency )
+			if self.__isFeasible( candidates, index + 1, chosen, inInstallationFolder or isLocal ):
+				for match in self.__enumerate( candidates, index + 1, chosen, inInstallationFolder or isLocal ):
+					yield match
+			chosen.pop()
+
+	def __isFeasible( self, candidates, index, chosen, inInstallationFolder ):
+		'''Return if the remaining dependencies can be provided by packages that have not been chosen yet, including one package
+		from the installation folder if none has been chosen so far.'''
+		remaining = candidates[ index: ]
+		used = set( chosen )
+		if inInstallationFolder:
+			return _can_assign( remaining, used )
+		for position, options in enumerate( remaining ):
+			others = remaining[:position] + remaining[position + 1:]
+			for dependency, isLocal in options:
+				if isLocal and dependency not in used and _can_assign( others, used | set( [ dependency ] ) ):
+					return True
+		return False
+
+def _can_assign( candidates, used ):
+	'''Return if every list of candidates can be assigned a different dependency that is not used yet (a bipartite matching 
+	found with augmenting paths).'''
+	assigned = {}
+	def augment( index, visited ):
+		for dependency, _ in candidates[ index ]:
+			if dependency in used or dependency in visited:
+				continue
+			visited.add( dependency )
+			if dependency not in assigned or augment( assigned[ dependency ], visited ):
+				assigned[ dependency ] = index
+				return True
+		return False
+	for index in range( len( candidates ) ):
+		if not augment( index, set() ):
+			return False
+	return True
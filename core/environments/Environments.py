@@ -23,8 +23,9 @@ from core.Settings import Settings
 import os
 from core.Exceptions import MomError, ConfigurationError
 from core.environments.Dependency import Dependency
-from fnmatch import fnmatch
 from core.environments.Environment import Environment
+from core.environments.EnvironmentMatcher import EnvironmentMatcher
+from core.environments.EnvironmentsIndex import get_environments_index
 
 class Environments( ConfigurationBase ):
 	'''Environments is a decorator for Configuration. It takes a configuration, and a list of required folders, and detects matches 
@@ -69,18 +70,15 @@ class Environments( ConfigurationBase ):
 		'''Return if this environment is optional.'''
 		return self.__optional
 
-	def __selectBestScoringEnvironment( self, environments ):
-		assert len( environments ) > 0
-		decoratedTuples = []
-		index = 0
-		for env in environments:
-			scores = []
-			for dep in env.getDependencies():
-				scores.append( dep.getScore() )
-			decoratedTuples.append( [ scores, index, env ] )
-			index += 1
-		decoratedTuples.sort( reverse = True )
-		return decoratedTuples[0][2]
+	def findBestScoringEnvironment( self ):
+		'''Return the environment with the highest package scores, compared in the order of the dependencies, or None.'''
+		installedDependencies = self.__detectInstalledDependencies()
+		if installedDependencies is None:
+			return None
+		match = self.__getMatcher().findBestMatch( self.__getEnvironmentsRoot(), installedDependencies )
+		if match is None:
+			return None
+		return self.__createEnvironment( match )
 
 	def __expandConfigurations( self, configs, environments ):
 		for config in configs:
@@ -100,8 +98,15 @@ class Environments( ConfigurationBase ):
 		description = Settings.EnvironmentsExpansionModes[ mode ]
 		mApp().debugN( self, 2, 'Environment expansion mode for build type {0} is "{1}"'.format( buildType, description ) )
 		configs = self.getChildren()[:]
-		environments = self.findMatchingEnvironments()
 		if mode in ( Settings.EnvironmentExpansionMode_BuildAll, Settings.EnvironmentExpansionMode_BuildHighestScoring ):
+			if mode == Settings.EnvironmentExpansionMode_BuildHighestScoring:
+				# only the best match is searched for, instead of scoring all matches:
+				environment = self.findBestScoringEnvironment()
+				environments = [ environment ] if environment else []
+				if environment:
+					mApp().debugN( self, 2, 'best scoring environment is "{0}"'.format( environment.makeDescription() ) )
+			else:
+				environments = self.findMatchingEnvironments()
 			if not environments:
 				status = 'optional' if self.isOptional() else 'REQUIRED'
 				self.setObjectStatus( 'No environments found ({0}) [{1}]'.format( self.getObjectStatus(), status ) )
@@ -112,13 +117,10 @@ class Environments( ConfigurationBase ):
 					if runMode == Settings.RunMode_Build:
 						details = 'Missing environment: {0}'.format( ', '.join( self.getDependencies() ) )
 						raise ConfigurationError( 'No environment found that matches the project requirements!', details )
-			if mode == Settings.EnvironmentExpansionMode_BuildHighestScoring and environments:
-				environment = self.__selectBestScoringEnvironment( environments )
-				mApp().debugN( self, 2, 'best scoring environment is "{0}" (out of {1})'
-					.format( environment.makeDescription(), len( environments ) ) )
-				environments = [ environment ]
 			self.__expandConfigurations( configs, environments )
 		elif mode == Settings.EnvironmentExpansionMode_Ignore:
+			# the matching environments are still detected, so that they are listed in the build report:
+			self.findMatchingEnvironments()
 			mApp().debugN( self, 2, 'environments will not be applied in build type {0}'.format( buildType ) )
 		else:
 			# should not happen
@@ -144,130 +146,49 @@ class Environments( ConfigurationBase ):
 	def detectMomDependencies( self ):
 		'''Detect all mom dependency packages in the configured base directory.'''
 		momEnvironmentsRoot = mApp().getSettings().get( Settings.EnvironmentsBaseDir )
-		detectedDependencies = self._findMomDependencies( momEnvironmentsRoot )
+		# the index finds the same packages as _findMomDependencies(), but only reads folders and control files that changed:
+		detectedDependencies = get_environments_index( momEnvironmentsRoot ).findDependencies()
 		deps = {}
 		for dep in detectedDependencies:
 			folder = os.path.normpath( os.path.abspath( dep.getFolder() ) )
 			deps[ folder ] = dep
 		self._setInstalledDependencies( deps )
 
-	def __recurseUpwards( self, packages, remainingDependencies, folders, packagesInFolder ):
-		matches = []
-		if not packagesInFolder:
-			# when all the packages in the current folder have been processed, traverse the directory tree 
-			# up one level, and continue there. Return an empty list if the root was reached. 
-			if len( folders ) > 1 and len( packages ) > 0:
-				folders = folders[1:]
-				packagesInFolder = os.listdir( folders[0] )
-			else:
-				return [] # done
-
-		folder = folders[0]
-		# check if packages + package is a match
-		package = packagesInFolder[0]
-		remainingPackages = packagesInFolder[1:]
-		path = os.path.join( folder, package )
-		for dependency in remainingDependencies:
-			if fnmatch( package, dependency ):
-				if path not in self._getInstalledDependencies():
-					mApp().debugN( self, 4, 'dependency {0} matches, but is not enabled'.format( package ) )
-					continue
-				newPackages = list( packages )
-				newPackages.append( [ path, dependency ] )
-				newDependencies = list( remainingDependencies )
-				newDependencies.remove( dependency )
-				if not newDependencies:
-					# all dependencies have been found
-					matches.append( newPackages )
-				else:
-					matches.extend( self.__recurseUpwards( newPackages, newDependencies, folders, remainingPackages ) )
-			else:
-				mApp().debugN( self, 4, 'dependency {0} does not match {1}'.format( package, dependency ) )
-		# recurse with remaining packages (there may be other matches for the same dependency)
-		matches.extend( self.__recurseUpwards( packages, remainingDependencies, folders, remainingPackages ) )
-		return matches
-
-	def __calculateMatches( self, packages, remainingDependencies, folders ):
-		'''Recursively find the matches for this environment and return a list of them.
-		Every match is a list of two-tuples: the folder, and the dependency it provides. This means that by definition, the number
-		of elements in every match is the number of original dependencies.
-		
-		A MOM package is a directory that contains a valid and enabled MOM_PACKAGE_CONFIGURATION file. 
-		
-		Matches are detected traversing the installation folders of the environment directory tree upwards. Installation folders are
-		those that contain any number of MOM packages. __calculateMatches will be called for every leaf installation folder. 
-		'''
-		mApp().debugN( self, 3, 'trying to find matching environments for {0}'.format( ", ".join( self.getDependencies() ) ) )
-		folder = folders[0]
-		if not os.path.isdir( folder ):
-			return []
-		packagesInFolder = os.listdir( folder )
-		return self.__recurseUpwards( [], remainingDependencies, folders, packagesInFolder )
-
-	def __ensureDependencyOrder( self, unsortedMatches, dependencies ):
-		matches = []
-		for match in unsortedMatches:
-			assert len( match ) == len( dependencies )
-			sortedMatch = []
-			for dep in dependencies:
-				for element in match:
-					if element[1] == dep:
-						sortedMatch.append( element[ 0 ] )
-			assert len( sortedMatch ) == len( match )
-			matches.append( sortedMatch )
-		return matches
+	def __getEnvironmentsRoot( self ):
+		return mApp().getSettings().get( Settings.EnvironmentsBaseDir )
 
-	def findMatchingEnvironments( self ):
-		'''Find and return all matches for the specified dependencies.'''
-		# find all leaf nodes:
-		momEnvironmentsRoot = mApp().getSettings().get( Settings.EnvironmentsBaseDir )
+	def __getMatcher( self ):
+		return EnvironmentMatcher( self.getDependencies() or [] )
 
+	def __detectInstalledDependencies( self ):
+		'''Detect the installed MOM packages and return them, or None if the MomEnvironments root does not exist.'''
+		momEnvironmentsRoot = self.__getEnvironmentsRoot()
 		if not os.path.isdir( momEnvironmentsRoot ):
 			mApp().debug( self, 'warning - MomEnvironments root not found at "{0}". Continuing.'.format( momEnvironmentsRoot ) )
-			return []
-
+			return None
 		mApp().debugN( self, 3, 'MomEnvironments root found at "{0}"'.format( momEnvironmentsRoot ) )
 		self.detectMomDependencies()
-		# make set of installation nodes
-		dependencyFolders = []
-		for dep in self._getInstalledDependencies():
-			dependencyFolders.append( self._getInstalledDependencies()[dep].getContainingFolder() )
-		uniqueDependencyFolders = frozenset( dependencyFolders )
-		allRawEnvironments = [] # these are the folders, that will be converted to Environment objects later
-		for folder in uniqueDependencyFolders:
-			# calculate the paths to look at
-			folders = folder.split( os.sep )
-			root = momEnvironmentsRoot.split( os.sep )
-			if root != folders[:len( root )]:
-				raise MomError( 'The MOM dependency is supposed to be a sub directory of the MOM environments folder!' )
-			subTree = folders[len( root ):]
-			reversePaths = [ momEnvironmentsRoot ]
-			current = momEnvironmentsRoot
-			for folder in subTree:
-				current = os.path.join( current, folder )
-				reversePaths.append( current )
-			reversePaths.reverse()
-			mApp().debugN( self, 5, 'incremental paths: {0}'.format( ', '.join( reversePaths ) ) )
-			matches = self.__calculateMatches( [], list( self.getDependencies() ), reversePaths )
-			if matches:
-				sortedMatches = self.__ensureDependencyOrder( matches, self.getDependencies() )
-				allRawEnvironments.extend( sortedMatches )
-		# convert to Environment objects, make them unique, because the matching algorithm potentially finds duplicates:
-		environments = []
-		for env in allRawEnvironments:
-			envs = []
-			for path in env:
-				envs.append( self._getInstalledDependencies()[ path ] )
-			envs = frozenset( envs )
-			match = Environment( parent = self )
-			match.setDependencies( envs )
-			match.setName( match.makeDescription() )
-			environments.append( match )
-		environments = frozenset( environments )
-		return environments
+		return self._getInstalledDependencies()
+
+	def __createEnvironment( self, match ):
+		environment = Environment( parent = self )
+		environment.setDependencies( list( match ) )
+		environment.setName( environment.makeDescription() )
+		return environment
+
+	def findMatchingEnvironments( self ):
+		'''Find and return all matches for the specified dependencies.
+		Every match is an Environment with one installed package per dependency, in the order of the dependencies. The packages
+		of a match are located in one installation folder (a folder that contains MOM packages) and the folders above it.'''
+		installedDependencies = self.__detectInstalledDependencies()
+		if installedDependencies is None:
+			return []
+		mApp().debugN( self, 3, 'trying to find matching environments for {0}'.format( ", ".join( self.getDependencies() ) ) )
+		matches = self.__getMatcher().findMatches( self.__getEnvironmentsRoot(), installedDependencies )
+		return [ self.__createEnvironment( match ) for match in matches ]
 
-	def createXmlNode( self, document ):
-		node = super( Environments, self ).createXmlNode( document )
+	def createXmlNode( self, document, recursive = True, includeSteps = True ):
+		node = super( Environments, self ).createXmlNode( document, recursive, includeSteps )
 		node.attributes["isOptional"] = str( self.isOptional() )
 		node.attributes["isEnabled"] = str( self.getChildren() > 0 ) # no configurations as children => disabled
 		return node
@@ -0,0 +1,168 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Settings import Settings
+from core.environments.Dependency import Dependency
+from core.helpers.CommandCache import CommandCache
+from core.helpers.GlobalMApp import mApp
+import json
+import os
+import tempfile
+import threading
+import time
+
+class EnvironmentsIndex( object ):
+	'''EnvironmentsIndex keeps a record of the folders of the MomEnvironments tree and of the parsed package control files 
+	in them, so that the tree does not have to be walked and every control file parsed again for every build.
+	A folder record is reused as long as the modification time of the folder is unchanged, and the record of a control 
+	file as long as its modification time and size are unchanged. The index is stored in an index file if one is set.'''
+
+	Version = 1
+	# folders modified less than this number of seconds before they are listed are listed again the next time, since a
+	# later modification in the same time stamp granularity would go unnoticed:
+	RacyInterval = 2
+
+	def __init__( self, root, indexFile = None ):
+		self.__root = os.path.normpath( os.path.abspath( root ) )
+		self.__indexFile = indexFile
+		self.__folders = None
+		self.__lock = threading.Lock()
+
+	def getRoot( self ):
+		return self.__root
+
+	def getIndexFile( self ):
+		return self.__indexFile
+
+	def findDependencies( self ):
+		'''Return the enabled MOM packages in the tree, in the same order as a recursive walk of the tree finds them.
+		Packages are not searched for inside of enabled packages.'''
+		with self.__lock:
+			oldFolders = self.__getFolders()
+			newFolders = {}
+			dependencies = []
+			if self.__getRecord( self.__root, oldFolders, newFolders ) is not None:
+				self.__walk( self.__root, oldFolders, newFolders, dependencies )
+			self.__folders = newFolders
+			if newFolders != oldFolders:
+				self.__save()
+			return dependencies
+
+	def __walk( self, folder, oldFolders, newFolders, dependencies ):
+		for name in newFolders[ folder ][ 'folders' ]:
+			path = os.path.join( folder, name )
+			record = self.__getRecord( path, oldFolders, newFolders )
+			if record is None:
+				continue # removed while walking the tree
+			package = record[ 'package' ]
+			if package and package[ 'valid' ] and package[ 'enabled' ]:
+				dependencies.append( Dependency.fromIndexEntry( path, package ) )
+			else:
+				self.__walk( path, oldFolders, newFolders, dependencies )
+
+	def __getRecord( self, folder, oldFolders, newFolders ):
+		'''Return the record of the folder, from the index if it is still valid, otherwise from the file system.'''
+		try:
+			mtime = os.stat( folder ).st_mtime
+		except OSError:
+			return None
+		oldRecord = oldFolders.get( folder )
+		record = oldRecord
+		if not record or record[ 'mtime' ] != mtime:
+			mApp().debugN( self, 4, 'indexing environments folder "{0}"'.format( folder ) )
+			try:
+				names = os.listdir( folder )
+			except OSError:
+				return None
+			record = {
+				'mtime' : mtime if time.time() - mtime > EnvironmentsIndex.RacyInterval else None,
+				'folders' : [ name for name in names if os.path.isdir( os.path.join( folder, name ) ) ],
+				'control' : None,
+				'package' : None }
+			if Dependency._ControlFileName in names:
+				# the control file record stays valid if only the folder changed, it is checked below:
+				if oldRecord and oldRecord[ 'control' ] is not None:
+					record.update( control = oldRecord[ 'control' ], package = oldRecord[ 'package' ] )
+				else:
+					record[ 'control' ] = [] # read below
+		if record[ 'control' ] is not None:
+			record = self.__updatePackage( folder, record )
+		newFolders[ folder ] = record
+		return record
+
+	def __updatePackage( self, folder, record ):
+		controlFile = os.path.join( folder, Dependency._ControlFileName )
+		try:
+			state = os.stat( controlFile )
+			control = [ state.st_mtime, state.st_size ] if time.time() - state.st_mtime > EnvironmentsIndex.RacyInterval else None
+		except OSError:
+			return dict( record, control = None, package = None )
+		if control and record[ 'control' ] == control:
+			return record
+		dependency = Dependency( folder )
+		dependency.verify()
+		return dict( record, control = control or [], package = dependency.getIndexEntry() )
+
+	def __getFolders( self ):
+		if self.__folders is None:
+			self.__folders = {}
+			if self.__indexFile and os.path.isfile( self.__indexFile ):
+				try:
+					with open( self.__indexFile ) as f:
+						index = json.load( f )
+					if index.get( 'version' ) == EnvironmentsIndex.Version and index.get( 'root' ) == self.__root:
+						self.__folders = index[ 'folders' ]
+				except ( IOError, ValueError, KeyError ):
+					pass # the index is rebuilt
+		return self.__folders
+
+	def __save( self ):
+		if not self.__indexFile:
+			return
+		# write to a temporary file and rename it, so that readers never see a partially written index:
+		folder = os.path.dirname( os.path.abspath( self.__indexFile ) )
+		temporaryFile = None
+		try:
+			if not os.path.isdir( folder ):
+				os.makedirs( folder )
+			handle, temporaryFile = tempfile.mkstemp( dir = folder, prefix = '.environmentsindex-' )
+			with os.fdopen( handle, 'w' ) as f:
+				json.dump( { 'version' : EnvironmentsIndex.Version, 'root' : self.__root, 'folders' : self.__folders }, f )
+			if os.name == 'nt' and os.path.exists( self.__indexFile ):
+				os.remove( self.__indexFile )
+			os.rename( temporaryFile, self.__indexFile )
+		except ( IOError, OSError, UnicodeError ):
+			if temporaryFile and os.path.exists( temporaryFile ):
+				os.remove( temporaryFile )
+
+_indexes = {}
+_indexesLock = threading.Lock()
+
+def get_environments_index( root ):
+	'''Return the index of the environments tree at root, shared by the process. The index file is stored in the caches 
+	folder, unless the environments.index setting is disabled.'''
+	settings = mApp().getSettings()
+	indexFile = None
+	if settings.get( Settings.EnvironmentsIndexEnabled, required = False ):
+		indexFile = os.path.join( settings.getCachesFolder(), 'environments-{0}.json'.format( CommandCache.makeKey( root )[:16] ) )
+	key = ( os.path.normpath( os.path.abspath( root ) ), indexFile )
+	with _indexesLock:
+		if key not in _indexes:
+			_indexes[ key ] = EnvironmentsIndex( root, indexFile )
+		return _indexes[ key ]
@@ -176,11 +176,20 @@ class Step( MObject ):
 		else:
 			container.append( action )
 
-	def _logEnvironment( self, executomat ):
+	def _logEnvironment( self, context ):
 		if not mApp().getSettings().get( Settings.ScriptEnableLogEnvironment ):
 			return
 
-		mApp().debugN( self, 5, 'environment before executing step "{0}": {1}'.format( self.getName(), os.environ ) )
+		mApp().debugN( self, 5, 'environment before executing step "{0}": {1}', self.getName(), context.getEnvironment() )
+
+	@staticmethod
+	def __getInstructionsPath( instructions ):
+		'''Return the names of the instructions and its parents, e.g. build/project/environment/configuration.'''
+		names = []
+		while instructions:
+			names.insert( 0, instructions.getName() )
+			instructions = instructions.getParent()
+		return '/'.join( names )
 
 	def execute( self, instructions ):
 		"""Execute the step"""
@@ -195,8 +204,10 @@ class Step( MObject ):
 			self.setStatus( Step.Status.Skipped_PreviousError )
 			return True
 
-		with self.getTimeKeeper():
-			self._logEnvironment( instructions )
+		with self.getTimeKeeper(), mApp().getTraceRecorder().span( self.getName(), 'step', 
+				configuration = instructions.getName(), path = self.__getInstructionsPath( instructions ) ):
+			context = instructions.getExecutionContext()
+			self._logEnvironment( context )
 
 			logfileName = '{0}.log'.format( make_foldername_from_string( self.getName() ) )
 			logfilePath = os.path.join( instructions.getLogDir(), logfileName )
@@ -213,7 +224,7 @@ class Step( MObject ):
 				for action in actions:
 					resultText = 'skipped'
 					if self.getResult() != Step.Result.Failure or action.getIgnorePreviousFailure():
-						result = action.executeAction( self.getLogfilePath() )
+						result = action.executeAction( self.getLogfilePath(), context )
 						resultText = 'successful' if result == 0 else 'failed'
 						if result != 0:
 							self.setResult( Step.Result.Failure )
@@ -232,7 +243,7 @@ class Step( MObject ):
 			for action in phase[1]:
 				action.describe( prefix, details = phase[0] )
 
-	def createXmlNode( self, document ):
+	def createXmlNode( self, document, includeActions = True ):
 		node = super( Step, self ).createXmlNode( document )
 		node.attributes["isEmpty"] = str ( self.isEmpty() )
 		node.attributes["isEnabled"] = str( self.isEnabled() )
@@ -240,11 +251,12 @@ class Step( MObject ):
 		node.attributes["result"] = str( self.Result.getKey( self.getResult() ) )
 		node.attributes["status"] = str( self.Status.getKey( self.getStatus() ) )
 
-		for actions in self.getAllActions():
-			if not actions:
-				continue
-			for action in actions:
-				element = action.createXmlNode( document )
-				node.appendChild( element )
+		if includeActions:
+			for actions in self.getAllActions():
+				if not actions:
+					continue
+				for action in actions:
+					element = action.createXmlNode( document )
+					node.appendChild( element )
 
 		return node
@@ -25,6 +25,7 @@ from core.Settings import Settings
 from core.helpers.GlobalMApp import mApp
 from core.loggers.ConsoleLogger import ConsoleLogger
 from core.loggers.FileLogger import FileLogger
+from core.plugins.helpers.TraceGenerator import TraceGenerator
 from core.plugins.helpers.XmlReportGenerator import XmlReportGenerator
 from core.plugins.reporters.ConsoleReporter import ConsoleReporter
 from core.plugins.selftest.IntegrityChecker import IntegrityChecker
@@ -38,6 +39,7 @@ def getBuild( name, minimumMomVersion ):
 		build.addLogger( ConsoleLogger() )
 		build.addLogger( FileLogger() )
 		build.addPlugin( XmlReportGenerator() )
+		build.addPlugin( TraceGenerator() )
 		build.addPlugin( ConsoleReporter() )
 		build.addPlugin( IntegrityChecker() )
 
@@ -0,0 +1,154 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from core.helpers.GlobalMApp import mApp
+from core.Settings import Settings
+
+class CommandCache( object ):
+	'''CommandCache stores the full paths of resolved commands and the detected tool versions, so that the search paths are 
+	not walked and the tools are not executed again for every plugin, configuration and build.
+	Every entry records the modification time, inode and size of the executable. If the executable changed or disappeared, 
+	the entry is ignored. Entries are kept for the process, and stored in a cache file if one is set. Commands that were not 
+	found are only remembered for the process.'''
+
+	def __init__( self, cacheFile = None ):
+		self.__lock = threading.RLock()
+		self.__entries = None
+		self.__missing = set()
+		self.__cacheFile = None
+		self.setCacheFile( cacheFile )
+
+	def setCacheFile( self, cacheFile ):
+		with self.__lock:
+			if cacheFile != self.__cacheFile:
+				self.__cacheFile = cacheFile
+				self.__entries = None
+
+	def getCacheFile( self ):
+		return self.__cacheFile
+
+	def clear( self ):
+		'''Forget all entries of the process. The cache file is not modified.'''
+		with self.__lock:
+			self.__entries = None
+			self.__missing = set()
+
+	@staticmethod
+	def makeKey( *parts ):
+		checksum = hashlib.sha1()
+		for part in parts:
+			checksum.update( unicode( part ).encode( 'utf-8' ) + '\0' )
+		return checksum.hexdigest()
+
+	@staticmethod
+	def __getFileState( path ):
+		try:
+			state = os.stat( path )
+		except OSError:
+			return None
+		return [ state.st_mtime, state.st_ino, state.st_size ]
+
+	def __getEntries( self ):
+		if self.__entries is None:
+			self.__entries = {}
+			if self.getCacheFile() and os.path.isfile( self.getCacheFile() ):
+				try:
+					with open( self.getCacheFile() ) as f:
+						self.__entries = json.load( f )
+				except ( IOError, ValueError ):
+					pass # the cache is rebuilt
+		return self.__entries
+
+	def __save( self ):
+		if not self.getCacheFile():
+			return
+		# write to a temporary file and rename it, so that readers never see a partially written cache:
+		folder = os.path.dirname( os.path.abspath( self.getCacheFile() ) )
+		temporaryFile = None
+		try:
+			if not os.path.isdir( folder ):
+				os.makedirs( folder )
+			handle, temporaryFile = tempfile.mkstemp( dir = folder, prefix = '.commandcache-' )
+			with os.fdopen( handle, 'w' ) as f:
+				json.dump( self.__getEntries(), f )
+			if os.name == 'nt' and os.path.exists( self.getCacheFile() ):
+				os.remove( self.getCacheFile() )
+			os.rename( temporaryFile, self.getCacheFile() )
+		except ( IOError, OSError, UnicodeError ):
+			if temporaryFile and os.path.exists( temporaryFile ):
+				os.remove( temporaryFile )
+
+	def __get( self, key ):
+		with self.__lock:
+			entry = self.__getEntries().get( key )
+			if not entry or self.__getFileState( entry[ 'path' ] ) != entry[ 'state' ]:
+				return None
+			return entry
+
+	def __set( self, key, path, **values ):
+		state = self.__getFileState( path )
+		if not state:
+			return
+		with self.__lock:
+			entry = dict( values, path = path, state = state )
+			self.__getEntries()[ key ] = entry
+			self.__save()
+
+	def getResolvedCommand( self, key ):
+		'''Return the cached full path for the resolution key, None if it is not known, or False if the command was not 
+		found before.'''
+		with self.__lock:
+			if key in self.__missing:
+				return False
+		entry = self.__get( key )
+		return entry[ 'path' ] if entry else None
+
+	def setResolvedCommand( self, key, path ):
+		'''Store the full path for the resolution key, or remember that the command was not found if path is None.'''
+		if path is None:
+			with self.__lock:
+				self.__missing.add( key )
+		else:
+			self.__set( key, path )
+
+	def getVersion( self, path, *arguments ):
+		'''Return the cached version reported by the executable for the arguments, or None.'''
+		entry = self.__get( self.makeKey( path, *arguments ) )
+		return entry[ 'version' ] if entry else None
+
+	def setVersion( self, path, arguments, version ):
+		self.__set( self.makeKey( path, *arguments ), path, version = version )
+
+_commandCache = CommandCache()
+
+def get_command_cache():
+	'''Return the command cache of the process. The cache file is stored in the caches folder, unless the 
+	system.commandcache setting is disabled.'''
+	settings = mApp().getSettings()
+	cacheFile = None
+	if settings.get( Settings.SystemCommandCache, required = False ):
+		cacheFile = os.path.join( settings.getCachesFolder(), 'commands.json' )
+	_commandCache.setCacheFile( cacheFile )
+	return _commandCache
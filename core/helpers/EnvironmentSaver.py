@@ -17,18 +17,33 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import os
+import threading
 from core.Exceptions import MomError
+from core.helpers.WorkerPool import WorkerPool
 
 class EnvironmentSaver( object ):
+	'''EnvironmentSaver saves the process environment variables and working directory, and restores them on exit.
+	Since both are process-global, EnvironmentSaver blocks are serialized between the threads of worker pools (for example, when 
+	configurations are built concurrently).'''
+
+	_ProcessStateLock = threading.RLock()
+
 	def __enter__( self ):
+		self.__locked = WorkerPool.isWorkerThread()
+		if self.__locked:
+			EnvironmentSaver._ProcessStateLock.acquire()
 		self.__environment = os.environ.copy()
 		self.__oldCwd = os.getcwd()
 
 	def __exit__( self, type, value, traceback ):
-		os.environ.clear()
-		for key in self.__environment:
-			os.environ[ key ] = self.__environment[ key ]
-		if not os.path.isdir( self.__oldCwd ):
-			raise MomError( 'The old working directory got deleted and cannot be restored!' )
-		if os.getcwd() != self.__oldCwd:
-			os.chdir( self.__oldCwd )
+		try:
+			os.environ.clear()
+			for key in self.__environment:
+				os.environ[ key ] = self.__environment[ key ]
+			if not os.path.isdir( self.__oldCwd ):
+				raise MomError( 'The old working directory got deleted and cannot be restored!' )
+			if os.getcwd() != self.__oldCwd:
+				os.chdir( self.__oldCwd )
+		finally:
+			if self.__locked:
+				EnvironmentSaver._ProcessStateLock.release()
@@ -19,15 +19,18 @@
 
 import os
 
-def add_to_path_collection( pathVariable, element, order = 'append' ):
+def add_to_path_collection( pathVariable, element, order = 'append', environment = None ):
 	# pathVariable is the name of the environment variable
+	# environment is the dictionary of variables to modify, os.environ by default
+	if environment is None:
+		environment = os.environ
 	# safely get the existing setting:
 	# try if the given path exists
 	#if 'packages' or 'Qt' in element and os.path.exists(element) == False:
 	#raise EnvironmentError('FatalError : ' + element + ' : does not exist')
 	variable = ''
 	try:
-		variable = os.environ[pathVariable]
+		variable = environment[pathVariable]
 	except KeyError:
 		pass
 	# prune it and split it up (not too aggressively): 
@@ -46,4 +49,4 @@ def add_to_path_collection( pathVariable, element, order = 'append' ):
 	elements = filter( white_space_filter, elements )
 
 	result = os.pathsep.join( elements )
-	os.environ[pathVariable] = result
+	environment[pathVariable] = result
@@ -0,0 +1,65 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.helpers.EnvironmentVariables import add_to_path_collection
+import os
+
+class ExecutionContext( object ):
+	'''ExecutionContext carries the working directory and the environment variables commands are executed with.
+	Commands receive them explicitly, instead of the process working directory and os.environ being changed. This way, 
+	actions of different configurations can be executed at the same time.
+	A new context is initialized from the process environment.'''
+
+	def __init__( self, workingDir = None, environment = None ):
+		self.setWorkingDir( workingDir )
+		if environment is None:
+			environment = os.environ
+		self.__environment = dict( environment )
+
+	def setWorkingDir( self, workingDir ):
+		self.__workingDir = str( workingDir ) if workingDir else None
+
+	def getWorkingDir( self ):
+		return self.__workingDir
+
+	def getEnvironment( self ):
+		'''Return the environment variables as a dictionary. Changes to the dictionary change the context.'''
+		return self.__environment
+
+	def getVariable( self, name, default = None ):
+		return self.__environment.get( name, default )
+
+	def setVariable( self, name, value ):
+		self.__environment[ name ] = value
+
+	def addToPathCollection( self, name, element, order = 'append' ):
+		'''Append or prepend element to the path collection (like PATH) in the variable name.'''
+		add_to_path_collection( name, element, order, self.__environment )
+
+	def clone( self, workingDir = None ):
+		'''Return a copy of the context. If workingDir is specified, it replaces the working directory of the copy.'''
+		return ExecutionContext( workingDir or self.getWorkingDir(), self.__environment )
+
+	def applyToProcess( self ):
+		'''Change the process environment and working directory to this context.
+		This is needed for actions that execute Python code instead of commands. It should be done in an EnvironmentSaver block.'''
+		os.environ.clear()
+		os.environ.update( self.__environment )
+		if self.getWorkingDir():
+			os.chdir( self.getWorkingDir() )
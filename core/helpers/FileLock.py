@@ -0,0 +1,108 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from core.Exceptions import MomError
+import os
+import sys
+import time
+
+if sys.platform == 'win32':
+	import msvcrt
+else:
+	import fcntl
+
+class FileLock( object ):
+	'''FileLock is an advisory lock on a file that coordinates processes (and threads) that access a shared resource.
+	A shared lock can be held by many readers at the same time, an exclusive lock by one writer only. On Windows, shared locks 
+	are exclusive. The lock file is created if it does not exist, and is not deleted afterwards. Locks held by a process are 
+	released by the operating system when it terminates, so there are no stale locks.
+	Usage: with FileLock( path, shared = True ): ...'''
+
+	PollInterval = 0.1
+
+	def __init__( self, path, shared = False, timeout = None ):
+		self.__path = path
+		self.__shared = shared
+		self.__timeout = timeout
+		self.__file = None
+
+	def getPath( self ):
+		return self.__path
+
+	def isShared( self ):
+		return self.__shared
+
+	def isLocked( self ):
+		return self.__file != None
+
+	def acquire( self ):
+		'''Wait until the lock is acquired. If the lock cannot be acquired within the timeout, a MomError is raised.'''
+		assert not self.isLocked()
+		directory = os.path.dirname( self.getPath() )
+		if directory and not os.path.isdir( directory ):
+			try:
+				os.makedirs( directory )
+			except OSError:
+				if not os.path.isdir( directory ): # created by another process in the meantime otherwise
+					raise
+		lockFile = open( self.getPath(), 'a' )
+		try:
+			if self.__timeout is None and sys.platform != 'win32':
+				fcntl.flock( lockFile.fileno(), fcntl.LOCK_SH if self.isShared() else fcntl.LOCK_EX )
+			else:
+				deadline = None if self.__timeout is None else time.time() + self.__timeout
+				while not self.__tryLock( lockFile ):
+					if deadline != None and time.time() >= deadline:
+						raise MomError( 'timeout waiting for the lock on "{0}"'.format( self.getPath() ) )
+					time.sleep( FileLock.PollInterval )
+		except:
+			lockFile.close()
+			raise
+		self.__file = lockFile
+
+	def __tryLock( self, lockFile ):
+		try:
+			if sys.platform == 'win32':
+				lockFile.seek( 0 )
+				msvcrt.locking( lockFile.fileno(), msvcrt.LK_NBLCK, 1 )
+			else:
+				fcntl.flock( lockFile.fileno(), ( fcntl.LOCK_SH if self.isShared() else fcntl.LOCK_EX ) | fcntl.LOCK_NB )
+			return True
+		except IOError:
+			return False
+
+	def release( self ):
+		assert self.isLocked()
+		try:
+			if sys.platform == 'win32':
+				self.__file.seek( 0 )
+				msvcrt.locking( self.__file.fileno(), msvcrt.LK_UNLCK, 1 )
+			else:
+				fcntl.flock( self.__file.fileno(), fcntl.LOCK_UN )
+		finally:
+			self.__file.close()
+			self.__file = None
+
+	def __enter__( self ):
+		self.acquire()
+		return self
+
+	def __exit__( self, type, value, traceback ):
+		self.release()
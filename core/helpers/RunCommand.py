@@ -18,16 +18,83 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import subprocess, time
+from collections import deque
 from threading import Thread
 from core.MObject import MObject
 from core.helpers.GlobalMApp import mApp
-from core.helpers.TypeCheckers import check_for_positive_int, check_for_path, check_for_list_of_paths
+from core.helpers.TypeCheckers import check_for_positive_int, check_for_nonnegative_int_or_none, check_for_path, \
+	check_for_list_of_paths
 import os.path
 import sys
-import copy
+import codecs
 from core.Exceptions import ConfigurationError
 from core.Settings import Settings
-from core.helpers.StringUtils import to_unicode_or_bust
+from core.helpers.CommandCache import get_command_cache
+
+class _OutputBuffer( object ):
+	'''_OutputBuffer collects the decoded output of one stream of a command.
+	The output is written to an optional stream as it arrives. If a maximum size is set, only the tail of the output is 
+	kept in memory.'''
+
+	def __init__( self, stream = None, maximumSize = None ):
+		self.__stream = stream
+		self.__maximumSize = maximumSize
+		self.__chunks = deque()
+		self.__size = 0
+		self.__omitted = 0
+
+	def append( self, text ):
+		if not text:
+			return
+		if self.__stream:
+			self.__stream.write( text )
+			self.__stream.flush()
+		self.__chunks.append( text )
+		self.__size += len( text )
+		if self.__maximumSize is None:
+			return
+		while self.__size > self.__maximumSize:
+			excess = self.__size - self.__maximumSize
+			first = self.__chunks[0]
+			if len( first ) <= excess:
+				self.__chunks.popleft()
+				removed = len( first )
+			else:
+				self.__chunks[0] = first[excess:]
+				removed = excess
+			self.__size -= removed
+			self.__omitted += removed
+
+	def getOmitted( self ):
+		return self.__omitted
+
+	def getText( self ):
+		text = u''.join( self.__chunks )
+		if self.__omitted:
+			text = u'[... {0} characters of earlier output omitted ...]\n{1}'.format( self.__omitted, text )
+		return text
+
+class _OutputReader( Thread ):
+	'''_OutputReader reads a pipe incrementally until it is closed, and appends the decoded output to a buffer.'''
+
+	def __init__( self, pipe, buffer, encoding ):
+		Thread.__init__( self )
+		self.daemon = True
+		self.__pipe = pipe
+		self.__buffer = buffer
+		self.__encoding = encoding
+
+	def run( self ):
+		decoder = codecs.getincrementaldecoder( self.__encoding )( 'replace' )
+		try:
+			while True:
+				data = os.read( self.__pipe.fileno(), 64 * 1024 )
+				if not data:
+					break
+				self.__buffer.append( decoder.decode( data ) )
+			self.__buffer.append( decoder.decode( '', True ) )
+		finally:
+			self.__pipe.close()
 
 class _CommandRunner( Thread ):
 
@@ -60,24 +127,36 @@ class _CommandRunner( Thread ):
 			stderrValue = subprocess.STDOUT
 		if self._getRunner().getCaptureOutput():
 			self._process = subprocess.Popen ( self._getRunner().getCommand(), shell = False,
-				cwd = self._getRunner().getWorkingDir(), stdout = subprocess.PIPE, stderr = stderrValue )
-			output, error = self._process.communicate()
-
+				cwd = self._getRunner().getWorkingDir(), env = self._getRunner().getEnvironment(),
+				stdout = subprocess.PIPE, stderr = stderrValue )
 			# override encoding for windows
 			if sys.platform == 'win32':
 				encoding = 'cp850'
 			else:
 				encoding = 'utf-8'
-			self._getRunner().setStdOut( to_unicode_or_bust( output, encoding ) )
-			self._getRunner().setStdErr( to_unicode_or_bust( error, encoding ) )
+			# the output is read and decoded while the command runs, instead of buffering all of it in communicate()
+			outputStream, errorStream = self._getRunner().getOutputStreams()
+			maximumSize = self._getRunner().getMaximumOutputSize()
+			output = _OutputBuffer( outputStream, maximumSize )
+			readers = [ _OutputReader( self._process.stdout, output, encoding ) ]
+			error = _OutputBuffer( errorStream, maximumSize )
+			if not self.__combineOutput:
+				readers.append( _OutputReader( self._process.stderr, error, encoding ) )
+			for reader in readers:
+				reader.start()
+			for reader in readers:
+				reader.join()
+			self._process.wait()
+			self._getRunner().setStdOut( output.getText() )
+			self._getRunner().setStdErr( error.getText() if not self.__combineOutput else None )
 
-			mApp().debugN( self._getRunner(), 5, u"STDOUT:\n{0}".format( self._getRunner().getStdOut() ) )
+			mApp().debugN( self._getRunner(), 5, u"STDOUT:\n{0}", self._getRunner().getStdOut() )
 			if not self.__combineOutput:
-				mApp().debugN( self._getRunner(), 5, u"STDERR:\n{0}".format( self._getRunner().getStdErr() ) )
+				mApp().debugN( self._getRunner(), 5, u"STDERR:\n{0}", self._getRunner().getStdErr() )
 			self._getRunner().setReturnCode( self._process.returncode )
 		else:
 			self._process = subprocess.Popen ( self._getRunner().getCommand(), shell = False,
-				cwd = self._getRunner().getWorkingDir() )
+				cwd = self._getRunner().getWorkingDir(), env = self._getRunner().getEnvironment() )
 			self._process.wait()
 			returnCode = self._process.returncode
 			self._getRunner().setReturnCode( returnCode )
@@ -113,10 +192,13 @@ class RunCommand( MObject ):
 			check_for_positive_int( timeoutSeconds, "The timeout period must be a positive integer number! " )
 		self.__timeoutSeconds = timeoutSeconds
 		self.__workingDir = None
+		self.__environment = None
 		self.__captureOutput = captureOutput
 		self.__combineOutput = combineOutput
 		self.__stdOut = None
 		self.__stdErr = None
+		self.__outputStreams = ( None, None )
+		self.__maximumOutputSize = None
 		self.__returnCode = None
 		self.__timedOut = False
 		if searchPaths is None:
@@ -138,12 +220,36 @@ class RunCommand( MObject ):
 	def getWorkingDir( self ):
 		return self.__workingDir
 
+	def setEnvironment( self, environment ):
+		'''Set the environment variables (a dictionary) for the command. By default, the process environment is used.'''
+		self.__environment = environment
+
+	def getEnvironment( self ):
+		return self.__environment
+
 	def getCombineOutput( self ):
 		return self.__combineOutput
 
 	def getCaptureOutput( self ):
 		return self.__captureOutput
 
+	def setOutputStreams( self, stdout = None, stderr = None ):
+		'''Write the output of the command to the given streams while it runs.
+		The streams receive unicode text. With combined output, all output is written to the stdout stream.'''
+		self.__outputStreams = ( stdout, stderr )
+
+	def getOutputStreams( self ):
+		return self.__outputStreams
+
+	def setMaximumOutputSize( self, size ):
+		'''Keep at most size characters of stdout and stderr in memory, the beginning of longer output is omitted.
+		None (the default) keeps the complete output. Use together with setOutputStreams() to not lose output.'''
+		check_for_nonnegative_int_or_none( size, 'The maximum output size must be a non-negative integer or None!' )
+		self.__maximumOutputSize = size
+
+	def getMaximumOutputSize( self ):
+		return self.__maximumOutputSize
+
 	def setReturnCode( self, code ):
 		self.__returnCode = code
 
@@ -186,9 +292,10 @@ class RunCommand( MObject ):
 		if fpath:
 			return
 
-		paths = copy.deepcopy( self.__searchPaths )
+		paths = [ str( path ) for path in self.__searchPaths ]
 
-		paths += os.environ["PATH"].split( os.pathsep )
+		environment = self.getEnvironment() or os.environ
+		paths += environment.get( "PATH", "" ).split( os.pathsep )
 
 		# These paths have been added by the local configuration so complain when we can't find them
 		extraPaths = mApp().getSettings().get( Settings.SystemExtraPaths )
@@ -200,21 +307,34 @@ class RunCommand( MObject ):
 					raise ConfigurationError( "RunCommand::resolveCommand: Can't find extra PATH '{0}' appended in configuration."
 											.format( extraPath ) )
 
+		cache = get_command_cache()
+		cacheKey = cache.makeKey( fname, os.pathsep.join( paths ), environment.get( "PATHEXT", "" ) )
+		cachedFile = cache.getResolvedCommand( cacheKey )
+		if cachedFile:
+			self.__cmd[0] = cachedFile
+			return
+		if cachedFile is None:
+			executableFile = self.__findExecutable( fname, paths, environment, isExecutableFullPath )
+			cache.setResolvedCommand( cacheKey, executableFile )
+			if executableFile:
+				self.__cmd[0] = executableFile
+				return
+
+		raise ConfigurationError( 'Cannot find command "{0}" in PATH or supplied search paths'.format( command ) )
+
+	def __findExecutable( self, fname, paths, environment, isExecutableFullPath ):
 		for path in paths:
 			path = os.path.normpath( str( path ) )
 			executableFile = os.path.join( path, fname )
 			if isExecutableFullPath( executableFile ):
-				self.__cmd[0] = executableFile
-				return
+				return executableFile
 			if sys.platform == "win32":
-				commandExtensions = os.environ["PATHEXT"].split( os.pathsep )
+				commandExtensions = environment["PATHEXT"].split( os.pathsep )
 				for extension in commandExtensions:
 					executableFileAndExtension = executableFile + extension
 					if isExecutableFullPath( executableFileAndExtension ):
-						self.__cmd[0] = executableFileAndExtension
-						return
-
-		raise ConfigurationError( 'Cannot find command "{0}" in PATH or supplied search paths'.format( command ) )
+						return executableFileAndExtension
+		return None
 
 	def checkVersion( self, parameter = "--version", lineNumber = 0, expectedReturnCode = 0 ):
 		"""Check if this command is installed.
@@ -224,45 +344,47 @@ class RunCommand( MObject ):
 		@param expectedReturnCode Return code which command should return on success"""
 		self.resolveCommand()
 
-		checkVersionCommand = RunCommand( [ self.__cmd[0], parameter ], combineOutput = True, searchPaths = self.__searchPaths )
-		checkVersionCommand.run()
-		returnCode = checkVersionCommand.getReturnCode()
-		getStdOut = checkVersionCommand.getStdOut()
-
-		if returnCode == expectedReturnCode:
-			version = getStdOut.splitlines()[ lineNumber ].strip()
-			mApp().debugN( self, 1, 'external tool detected: "{0}"'.format( version ), compareTo = self.getCommand() )
-			return version
-		else:
-			raise ConfigurationError( "RunCommand::checkVersion: {0} returned {1}, expected: {2}."
-				.format( self.__cmd[0], returnCode, expectedReturnCode ) )
+		# the version is cached per executable, it is detected again if the executable is modified:
+		cache = get_command_cache()
+		cacheArguments = ( parameter, lineNumber, expectedReturnCode )
+		version = cache.getVersion( self.__cmd[0], *cacheArguments )
+		if version is None:
+			checkVersionCommand = RunCommand( [ self.__cmd[0], parameter ], combineOutput = True, searchPaths = self.__searchPaths )
+			checkVersionCommand.setEnvironment( self.getEnvironment() )
+			checkVersionCommand.run()
+			returnCode = checkVersionCommand.getReturnCode()
+			if returnCode != expectedReturnCode:
+				raise ConfigurationError( "RunCommand::checkVersion: {0} returned {1}, expected: {2}."
+					.format( self.__cmd[0], returnCode, expectedReturnCode ) )
+			version = checkVersionCommand.getStdOut().splitlines()[ lineNumber ].strip()
+			cache.setVersion( self.__cmd[0], cacheArguments, version )
+		mApp().debugN( self, 1, 'external tool detected: "{0}"'.format( version ), compareTo = self.getCommand() )
+		return version
 
 	def run( self ):
 		self.resolveCommand()
 
-		timeoutString = 'without a timeout'
-		if self.getTimeoutSeconds() != None:
-			timeoutString = 'with timeout of {0} seconds'.format( self.getTimeoutSeconds() )
-		combinedOutputString = 'and separate output for stdout and stderr'
-		if self.getCombineOutput():
-			combinedOutputString = 'and combined stdout and stderr output'
-		mApp().debugN( self, 4, 'executing "{0}" {1} {2}'.format( ' '.join( self.getCommand() ),
-			timeoutString, combinedOutputString ) )
-		runner = _CommandRunner ( self )
-		runner.setCombineOutput( self.getCombineOutput() )
-		runner.start()
-		# this sucks, but seems to be needed on Windows at least
-		while not runner.wasStarted():
-			time.sleep( 0.1 )
-		if not self.getTimeoutSeconds():
-			runner.join()
-		else:
-			runner.join( self.getTimeoutSeconds() )
-		if runner.isAlive():
-			runner.terminate()
-			runner.join( 5 )
-			self.__timedOut = True
-		timeoutString = "timed out" if self.getTimedOut() else "completed"
-		mApp().debugN( self, 3, '"{0}" {1}, return code is {2}'.format( ' '.join( self.getCommand() ),
-			timeoutString, str( self.getReturnCode() ) ) )
+		mApp().debugN( self, 4, lambda: 'executing "{0}" {1} {2}'.format( ' '.join( self.getCommand() ),
+			'with timeout of {0} seconds'.format( self.getTimeoutSeconds() ) if self.getTimeoutSeconds() != None else 'without a timeout',
+			'and combined stdout and stderr output' if self.getCombineOutput() else 'and separate output for stdout and stderr' ) )
+		with mApp().getTraceRecorder().span( os.path.basename( self.getCommand()[0] ), 'subprocess',
+				command = ' '.join( self.getCommand() ) ) as traceArgs:
+			runner = _CommandRunner ( self )
+			runner.setCombineOutput( self.getCombineOutput() )
+			runner.start()
+			# this sucks, but seems to be needed on Windows at least
+			while not runner.wasStarted():
+				time.sleep( 0.1 )
+			if not self.getTimeoutSeconds():
+				runner.join()
+			else:
+				runner.join( self.getTimeoutSeconds() )
+			if runner.isAlive():
+				runner.terminate()
+				runner.join( 5 )
+				self.__timedOut = True
+			if runner._process:
+				traceArgs[ 'pid' ] = runner._process.pid
+		mApp().debugN( self, 3, lambda: '"{0}" {1}, return code is {2}'.format( ' '.join( self.getCommand() ),
+			"timed out" if self.getTimedOut() else "completed", str( self.getReturnCode() ) ) )
 		return self.getReturnCode()
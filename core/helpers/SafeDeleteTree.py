@@ -16,12 +16,19 @@
 # 
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from Queue import Queue
+from core.Exceptions import MomError
+from core.MObject import MObject
+from core.helpers.GlobalMApp import mApp
+import atexit
 import os
 import shutil
 import errno
 import stat
+import tempfile
+import threading
 
-def rmtree( path ):
+def _rmtree( path ):
 	def rmtreeErrorHandler( function, path, exception ):
 		error = exception[1].errno
 		if function in ( os.rmdir, os.remove ) and error == errno.EACCES:
@@ -31,3 +38,136 @@ def rmtree( path ):
 
 	if os.path.exists( path ):
 			shutil.rmtree( path, ignore_errors = False, onerror = rmtreeErrorHandler )
+
+def rmtree( path, background = False ):
+	'''Delete the directory tree at path.
+	If background is True, the tree is moved into a trash folder next to it, and deleted by the TreeDeleter of the process. 
+	If it cannot be moved, it is deleted immediately.'''
+	if background and get_tree_deleter().delete( path ):
+		return
+	_rmtree( path )
+
+class TreeDeleter( MObject ):
+	'''TreeDeleter deletes directory trees in the background.
+	A tree is renamed into the trash folder next to it, which is fast as long as both are on the same file system, and then 
+	deleted by a number of worker threads. Trees left in a trash folder by an earlier process are deleted as well when the 
+	trash folder is used again. drain() waits until all scheduled trees have been deleted. The deleter of the process is 
+	drained when the process exits. Trees that cannot be deleted are reported as messages, and stay in the trash folder 
+	until it is used again.'''
+
+	TrashFolderName = '.mom-trash'
+
+	def __init__( self, jobs = 2 ):
+		MObject.__init__( self )
+		self.__jobs = jobs
+		self.__queue = Queue()
+		self.__lock = threading.Lock()
+		self.__pending = set()
+		self.__workers = []
+		self.__errors = []
+		self.__failed = set()
+
+	def getTrashFolder( self, path ):
+		return os.path.join( os.path.dirname( os.path.abspath( path ) ), TreeDeleter.TrashFolderName )
+
+	def getErrors( self ):
+		'''Return the ( path, error ) tuples of the trees that could not be deleted.'''
+		with self.__lock:
+			return list( self.__errors )
+
+	def delete( self, path ):
+		'''Move the tree at path to the trash folder, and schedule its deletion.
+		Return False if the tree could not be moved, it has to be deleted by the caller then.'''
+		path = os.path.abspath( path )
+		if not os.path.isdir( path ) or os.path.islink( path ):
+			return False
+		trashFolder = self.getTrashFolder( path )
+		with self.__lock:
+			try:
+				if not os.path.isdir( trashFolder ):
+					os.makedirs( trashFolder )
+				entry = tempfile.mkdtemp( prefix = os.path.basename( path ) + '-', dir = trashFolder )
+			except OSError:
+				return False
+			try:
+				os.rename( path, os.path.join( entry, os.path.basename( path ) ) )
+			except OSError: # e.g. on a different file system, or a mount point
+				os.rmdir( entry )
+				return False
+			# trees left behind by earlier runs, or that could not be deleted before:
+			leftovers = [ os.path.join( trashFolder, name ) for name in os.listdir( trashFolder ) ]
+			leftovers = [ leftover for leftover in leftovers if leftover != entry and leftover not in self.__pending ]
+			failed = [ leftover for leftover in leftovers if leftover in self.__failed ]
+			if failed:
+				self.__log( 1, 'retrying to delete {0} tree(s) that could not be deleted before: {1}'
+					.format( len( failed ), ', '.join( failed ) ) )
+			if len( leftovers ) > len( failed ):
+				self.__log( 1, 'deleting {0} tree(s) left behind in "{1}" by an earlier run'
+					.format( len( leftovers ) - len( failed ), trashFolder ) )
+			for leftover in [ entry ] + leftovers:
+				self.__schedule( leftover )
+			self.__startWorkers()
+		return True
+
+	def drain( self ):
+		'''Wait until all scheduled trees have been deleted.'''
+		self.__queue.join()
+
+	def __log( self, level, text ):
+		'''Log through the application. The deleter may be used without one, or outlive it when it is drained at exit.'''
+		try:
+			application = mApp()
+		except MomError:
+			return
+		if level == 0:
+			application.message( self, text )
+		else:
+			application.debugN( self, level, text )
+
+	def __schedule( self, entry ):
+		if entry not in self.__pending:
+			self.__pending.add( entry )
+			self.__queue.put( entry )
+
+	def __startWorkers( self ):
+		self.__workers = [ worker for worker in self.__workers if worker.isAlive() ]
+		while len( self.__workers ) < min( self.__jobs, len( self.__pending ) ):
+			worker = threading.Thread( target = self.__work, name = 'TreeDeleter' )
+			worker.daemon = True
+			worker.start()
+			self.__workers.append( worker )
+
+	def __work( self ):
+		while True:
+			entry = self.__queue.get()
+			try:
+				_rmtree( entry )
+				with self.__lock:
+					self.__failed.discard( entry )
+			except ( OSError, IOError ) as e:
+				with self.__lock:
+					self.__errors.append( ( entry, e ) )
+					self.__failed.add( entry )
+				self.__log( 0, 'cannot delete "{0}" in the background, it is left in the trash folder: {1}'.format( entry, e ) )
+			finally:
+				with self.__lock:
+					self.__pending.discard( entry )
+					trashFolder = os.path.dirname( entry )
+					if not [ pending for pending in self.__pending if os.path.dirname( pending ) == trashFolder ]:
+						try:
+							os.rmdir( trashFolder )
+						except OSError:
+							pass # not empty, or deleted already
+				self.__queue.task_done()
+
+_treeDeleter = None
+_treeDeleterLock = threading.Lock()
+
+def get_tree_deleter():
+	'''Return the TreeDeleter of this process. It is drained when the process exits.'''
+	global _treeDeleter
+	with _treeDeleterLock:
+		if _treeDeleter is None:
+			_treeDeleter = TreeDeleter()
+			atexit.register( _treeDeleter.drain )
+		return _treeDeleter
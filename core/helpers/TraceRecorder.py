@@ -0,0 +1,93 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+class TraceRecorder( object ):
+	'''TraceRecorder records when the phases, steps, actions and sub-processes of a build start and end.
+	The events are saved in the Chrome trace event format, which can be loaded into chrome://tracing, Perfetto and other 
+	trace viewers. Every thread is shown as a separate track, so that concurrently built configurations are displayed 
+	side by side. Spans inherit the labels of the enclosing spans of the same thread, for example the configuration of a 
+	step is attached to all of its actions and sub-processes.'''
+
+	def __init__( self ):
+		self.__origin = time.time()
+		self.__events = []
+		self.__threadNames = {}
+		self.__threadState = threading.local()
+		self.__enabled = True
+
+	def setEnabled( self, onOff ):
+		self.__enabled = onOff
+
+	def isEnabled( self ):
+		return self.__enabled
+
+	def getEvents( self ):
+		return self.__events
+
+	def __getTimeStamp( self ):
+		return int( ( time.time() - self.__origin ) * 1000000 )
+
+	def __getLabels( self ):
+		labels = getattr( self.__threadState, 'labels', None )
+		if labels is None:
+			labels = self.__threadState.labels = [ {} ]
+		return labels
+
+	@contextmanager
+	def span( self, name, category, **labels ):
+		'''Record the execution of the enclosed block as one event. The labels are added to the arguments of the event 
+		and of all events recorded within the block in the same thread. The yielded dictionary can be used to add 
+		arguments that are only known after the block started, like process ids.'''
+		if not self.isEnabled():
+			yield {}
+			return
+		stack = self.__getLabels()
+		args = dict( stack[-1], **labels )
+		stack.append( args )
+		start = self.__getTimeStamp()
+		try:
+			yield args
+		finally:
+			end = self.__getTimeStamp()
+			stack.pop()
+			thread = threading.current_thread()
+			self.__threadNames[ thread.ident ] = thread.name
+			# list.append is atomic, no lock is needed when spans end in different threads at the same time:
+			self.__events.append( { 'name' : name, 'cat' : category, 'ph' : 'X', 'ts' : start, 'dur' : end - start,
+				'pid' : os.getpid(), 'tid' : thread.ident, 'args' : args } )
+
+	def getTrace( self ):
+		'''Return the trace in the Chrome trace event format.'''
+		metadata = [ { 'name' : 'process_name', 'ph' : 'M', 'pid' : os.getpid(), 'tid' : 0, 'args' : { 'name' : 'make-o-matic' } } ]
+		for tid, threadName in sorted( self.__threadNames.items() ):
+			metadata.append( { 'name' : 'thread_name', 'ph' : 'M', 'pid' : os.getpid(), 'tid' : tid, 'args' : { 'name' : threadName } } )
+		events = sorted( self.__events, key = lambda event: ( event[ 'ts' ], -event[ 'dur' ] ) )
+		return { 'traceEvents' : metadata + events, 'displayTimeUnit' : 'ms',
+			'otherData' : { 'startTime' : time.strftime( '%Y-%m-%dT%H:%M:%SZ', time.gmtime( self.__origin ) ) } }
+
+	def save( self, path ):
+		with open( path, 'w' ) as f:
+			json.dump( self.getTrace(), f )
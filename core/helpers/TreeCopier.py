@@ -0,0 +1,190 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError, ConfigurationError
+from core.helpers.TypeCheckers import check_for_positive_int
+from core.helpers.WorkerPool import WorkerPool
+import errno
+import os
+import shutil
+import threading
+
+try:
+	import fcntl
+except ImportError: # Windows
+	fcntl = None
+
+try:
+	WindowsError
+except NameError:
+	WindowsError = None
+
+class TreeCopier( object ):
+	'''TreeCopier copies directory trees, using a number of threads for the file copies.
+	Files that exist in the destination are skipped, unless overwrite is set. In that case, only files whose size or 
+	modification time differ from the source are copied again. In the hardlink and reflink modes, files are linked or 
+	cloned instead of copied where the file system supports it, and copied otherwise. The copier counts the files and 
+	bytes copied, linked and skipped.'''
+
+	Mode_Copy = 'copy'
+	Mode_HardLink = 'hardlink'
+	Mode_Reflink = 'reflink'
+	Modes = ( Mode_Copy, Mode_HardLink, Mode_Reflink )
+
+	_FICLONE = 0x40049409 # Linux ioctl that clones the extents of a file, see ioctl_ficlone(2)
+
+	def __init__( self, ignore = None, overwrite = False, mode = Mode_Copy, jobs = 1 ):
+		if mode not in TreeCopier.Modes:
+			raise ConfigurationError( 'Unknown tree copy mode "{0}", valid modes are "{1}"'.format( mode, '", "'.join( TreeCopier.Modes ) ) )
+		check_for_positive_int( jobs, 'The number of copy jobs must be a positive integer!' )
+		self.__ignore = ignore
+		self.__overwrite = overwrite
+		self.__mode = mode
+		self.__jobs = jobs
+		self.__lock = threading.Lock()
+		self.__linkSupported = True
+		self.__filesCopied = self.__bytesCopied = 0
+		self.__filesLinked = self.__bytesLinked = 0
+		self.__filesSkipped = 0
+
+	def getMode( self ):
+		return self.__mode
+
+	def getJobs( self ):
+		return self.__jobs
+
+	def getFilesCopied( self ):
+		return self.__filesCopied
+
+	def getBytesCopied( self ):
+		return self.__bytesCopied
+
+	def getFilesLinked( self ):
+		return self.__filesLinked
+
+	def getBytesLinked( self ):
+		return self.__bytesLinked
+
+	def getFilesSkipped( self ):
+		return self.__filesSkipped
+
+	def getSummary( self ):
+		return 'copied {0} files ({1} bytes), linked {2} files ({3} bytes), skipped {4} files'.format( 
+			self.__filesCopied, self.__bytesCopied, self.__filesLinked, self.__bytesLinked, self.__filesSkipped )
+
+	def copyTree( self, src, dst ):
+		'''Copy the directory tree at src to dst. Raises MomError if a directory or file cannot be copied.'''
+		directories = []
+		files = []
+		self._collect( src, dst, directories, files )
+		jobs = [ lambda source = source, destination = destination: self._copyFile( source, destination ) for source, destination in files ]
+		if self.__jobs > 1 and len( jobs ) > 1:
+			WorkerPool( self.__jobs ).run( jobs )
+		else:
+			for job in jobs:
+				job()
+		# writing the files changes the modification times of the directories, copy them last:
+		for source, destination in reversed( directories ):
+			try:
+				shutil.copystat( source, destination )
+			except OSError as why:
+				if WindowsError is not None and isinstance( why, WindowsError ): #@UndefinedVariable
+					pass # Copying file access times may fail on Windows
+				else:
+					raise MomError( 'Could not copy stat from {0} to {1}: {2}'.format( source, destination, str( why ) ) )
+
+	def _collect( self, src, dst, directories, files ):
+		'''Create the destination directories, and collect the files to copy.'''
+		try:
+			names = os.listdir( src )
+		except OSError as e:
+			raise MomError( 'Could not read directory {0}: {1}'.format( src, str( e ) ) )
+		if self.__ignore is not None:
+			ignoredNames = self.__ignore( src, names )
+		else:
+			ignoredNames = set()
+
+		if not os.path.exists( dst ):
+			try:
+				os.makedirs( dst )
+			except OSError as e:
+				raise MomError( 'Could not create Directory {0}: {1}'.format( dst, str( e ) ) )
+		directories.append( ( src, dst ) )
+		for name in names:
+			if name in ignoredNames:
+				continue
+			srcname = os.path.join( src, name )
+			dstname = os.path.join( dst, name )
+			if os.path.isdir( srcname ):
+				self._collect( srcname, dstname, directories, files )
+			else:
+				# XXX What about devices, sockets etc.?
+				files.append( ( srcname, dstname ) )
+
+	def _copyFile( self, srcname, dstname ):
+		try:
+			if os.path.isfile( dstname ):
+				if not self.__overwrite or self._isUnchanged( srcname, dstname ):
+					with self.__lock:
+						self.__filesSkipped += 1
+					return
+			size = os.path.getsize( srcname )
+			if self.__mode != TreeCopier.Mode_Copy and self.__linkSupported and not os.path.islink( srcname ):
+				if self._linkFile( srcname, dstname ):
+					with self.__lock:
+						self.__filesLinked += 1
+						self.__bytesLinked += size
+					return
+			shutil.copy2( srcname, dstname )
+			with self.__lock:
+				self.__filesCopied += 1
+				self.__bytesCopied += size
+		except ( IOError, OSError ) as e:
+			raise MomError( 'Could not copy file from {0} to {1}: {2}'.format( srcname, dstname, str( e ) ) )
+
+	def _isUnchanged( self, srcname, dstname ):
+		'''Return True if the destination has the size and modification time of the source (as preserved by copy2).'''
+		srcStat = os.stat( srcname )
+		dstStat = os.stat( dstname )
+		return srcStat.st_size == dstStat.st_size and int( srcStat.st_mtime ) == int( dstStat.st_mtime )
+
+	def _linkFile( self, srcname, dstname ):
+		'''Hard-link or clone the source file. Return False if the file system does not support it, the file is then copied.'''
+		try:
+			if self.__mode == TreeCopier.Mode_HardLink:
+				if not hasattr( os, 'link' ):
+					raise OSError( errno.EOPNOTSUPP, 'hard links are not supported' )
+				if os.path.lexists( dstname ):
+					os.remove( dstname )
+				os.link( srcname, dstname )
+			else:
+				if fcntl is None:
+					raise OSError( errno.EOPNOTSUPP, 'reflinks are not supported' )
+				with open( srcname, 'rb' ) as source:
+					with open( dstname, 'wb' ) as destination:
+						fcntl.ioctl( destination.fileno(), TreeCopier._FICLONE, source.fileno() )
+				shutil.copystat( srcname, dstname )
+			return True
+		except ( IOError, OSError ) as e:
+			if e.errno not in ( errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.EPERM, errno.EMLINK ):
+				raise
+			# do not try again for every file if the file system does not support links at all:
+			if e.errno in ( errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV ):
+				self.__linkSupported = False
+			return False
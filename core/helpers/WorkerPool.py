@@ -0,0 +1,77 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from Queue import Queue, Empty
+from core.helpers.TypeCheckers import check_for_positive_int
+import sys
+import threading
+
+class WorkerPool( object ):
+	'''WorkerPool executes a list of jobs (callables) on a bounded number of threads.
+	The pool is created for one batch of jobs, run() returns when all of them are done.'''
+
+	_threadState = threading.local()
+
+	def __init__( self, maxWorkers ):
+		check_for_positive_int( maxWorkers, 'The number of workers must be a positive integer!' )
+		self.__maxWorkers = maxWorkers
+
+	def getMaxWorkers( self ):
+		return self.__maxWorkers
+
+	@staticmethod
+	def isWorkerThread():
+		'''Return True if the calling thread is a worker of any WorkerPool.'''
+		return getattr( WorkerPool._threadState, 'isWorker', False )
+
+	def run( self, jobs ):
+		'''Execute all jobs, and return their results in the order of the jobs.
+		A failing job does not stop the other jobs. After all jobs have finished, the exception of the first failed job
+		(in the order of the jobs) is re-raised.'''
+		jobs = list( jobs )
+		results = [ None ] * len( jobs )
+		errors = {}
+		queue = Queue()
+		for index, job in enumerate( jobs ):
+			queue.put( ( index, job ) )
+
+		def work():
+			WorkerPool._threadState.isWorker = True
+			while True:
+				try:
+					index, job = queue.get_nowait()
+				except Empty:
+					return
+				try:
+					results[ index ] = job()
+				except: # the exception is re-raised in the calling thread
+					errors[ index ] = sys.exc_info()
+
+		threads = [ threading.Thread( target = work ) for _ in range( min( self.getMaxWorkers(), len( jobs ) ) ) ]
+		for thread in threads:
+			thread.daemon = True
+			thread.start()
+		for thread in threads:
+			# join with a timeout, otherwise the main thread does not receive KeyboardInterrupt
+			while thread.isAlive():
+				thread.join( 0.5 )
+		if errors:
+			excType, excValue, excTraceback = errors[ min( errors ) ]
+			raise excType, excValue, excTraceback
+		return results
@@ -23,24 +23,63 @@ from core.Instructions import Instructions
 import traceback
 from core.helpers.XmlUtils import create_exception_xml_node
 from core.helpers.GlobalMApp import mApp
+from xml.sax.saxutils import XMLGenerator
+import codecs
+import shutil
 import xml.dom.minidom
+import xml.etree.ElementTree
 
 class XmlReportInterface( object ):
+	"""The report model that is shared by the converters and the plugins that report or publish the build results.
+	The XML text and its parsed forms are created once, when they are first requested, and reused after that."""
+
+	def __init__( self ):
+		self.__report = None
+		self.__elementTree = None
+		self.__documents = {}
+
+	def _createReport( self ):
+		"""\return String representing a valid Make-O-Matic XML report"""
+
+		raise NotImplementedError()
 
 	def getReport( self ):
 		"""\return String representing a valid Make-O-Matic XML report
 
 		\note Be sure to call this *after* the build run has completed!"""
 
-		raise NotImplementedError()
+		if self.__report is None:
+			self.__report = self._createReport()
+		return self.__report
+
+	def getElementTree( self ):
+		"""\return The report parsed by xml.etree.ElementTree, as used by the text converters"""
+
+		if self.__elementTree is None:
+			self.__elementTree = self._parseReport( xml.etree.ElementTree )
+		return self.__elementTree
+
+	def getDocument( self, etree ):
+		"""\return The report parsed by the specified etree implementation, e.g. lxml for XSLT transformations"""
+
+		if etree not in self.__documents:
+			self.__documents[ etree ] = self._parseReport( etree )
+		return self.__documents[ etree ]
+
+	def _parseReport( self, etree ):
+		"""\return The root element of the report, parsed by the specified etree implementation"""
+
+		# etree.XML requires encoded data, fails otherwise
+		return etree.XML( self.getReport().encode( "utf-8" ) )
 
 class StringBasedXmlReport( XmlReportInterface ):
 
 	def __init__( self, xmlString ):
-		self.__doc = xml.dom.minidom.parseString( xmlString )
+		XmlReportInterface.__init__( self )
+		self.__xmlString = xml.dom.minidom.parseString( xmlString ).toxml()
 
-	def getReport( self ):
-		return self.__doc.toxml()
+	def _createReport( self ):
+		return self.__xmlString
 
 class InstructionsXmlReport( XmlReportInterface ):
 	"""Represents an report of the current build
@@ -50,10 +89,11 @@ class InstructionsXmlReport( XmlReportInterface ):
 	REPORT_XML_VERSION = 1
 
 	def __init__( self, instructions ):
+		XmlReportInterface.__init__( self )
 		assert isinstance( instructions, Instructions )
 		self.__instructions = instructions
 
-	def getReport( self ):
+	def _createReport( self ):
 		doc = xml.dom.minidom.Document()
 		rootNode = self._createRootNode( doc )
 
@@ -97,3 +137,116 @@ class InstructionsXmlReport( XmlReportInterface ):
 			node.appendChild( childNode )
 
 		return node
+
+class StreamedXmlReport( InstructionsXmlReport ):
+	"""Represents a report of the current build that is written incrementally to a file
+
+	The report is created from the same nodes as InstructionsXmlReport, but only the nodes of one object at a time are kept 
+	in memory. Output of actions that is longer than maximumOutputSize is not embedded completely. Only the end of it is, 
+	and the stdout and stderr nodes reference the step log file that contains the complete output. The converters parse the 
+	report from the file."""
+
+	def __init__( self, instructions, fileName, maximumOutputSize = None ):
+		InstructionsXmlReport.__init__( self, instructions )
+		self.__instructions = instructions
+		self.__fileName = fileName
+		self.__maximumOutputSize = maximumOutputSize
+		self.__written = False
+
+	def getFileName( self ):
+		"""\return The file the report is written to
+
+		\note The file is written when the report is first requested, or by calling write()"""
+
+		return self.__fileName
+
+	def write( self ):
+		"""Write the report to the file, replacing an earlier version of it."""
+
+		exception = mApp().getException()
+		if exception:
+			tracebackToUnicode = u"".join( [x.decode( "utf-8" ) for x in exception[1] ] )
+			self._writeFile( lambda generator, document: self._writeExceptionNode( generator, document, exception[0], tracebackToUnicode ) )
+		else:
+			try:
+				self._writeFile( lambda generator, document: self._writeInstructions( generator, document, self.__instructions ) )
+			except Exception as e:
+				# the file is incomplete, write it again with the error:
+				self._writeFile( lambda generator, document: self._writeExceptionNode( generator, document,
+						"Caught exception during report generation: {0}".format( e ), traceback.format_exc() ) )
+		self.__written = True
+
+	def copyTo( self, stream ):
+		"""Copy the report text to the stream, without reading all of it into memory"""
+
+		self._writeIfNeeded()
+		with codecs.open( self.__fileName, 'r', 'utf-8' ) as f:
+			shutil.copyfileobj( f, stream )
+
+	def _createReport( self ):
+		self._writeIfNeeded()
+		with codecs.open( self.__fileName, 'r', 'utf-8' ) as f:
+			return f.read()
+
+	def _parseReport( self, etree ):
+		self._writeIfNeeded()
+		return etree.parse( self.__fileName ).getroot()
+
+	def _writeIfNeeded( self ):
+		if not self.__written:
+			self.write()
+
+	def _writeFile( self, writeContent ):
+		with open( self.__fileName, 'wb' ) as stream:
+			# same declaration as minidom's, the report text can be parsed like the one of InstructionsXmlReport:
+			stream.write( b'<?xml version="1.0" ?>' )
+			generator = XMLGenerator( stream, "utf-8" )
+			document = xml.dom.minidom.Document()
+			rootNode = self._createRootNode( document )
+			self._startElement( generator, rootNode )
+			writeContent( generator, document )
+			generator.endElement( rootNode.tagName )
+			generator.endDocument()
+
+	def _writeExceptionNode( self, generator, document, exception, tracebackText ):
+		instructionsNode = mApp().createXmlNode( document, recursive = False )
+		instructionsNode.appendChild( create_exception_xml_node( document, exception, tracebackText ) )
+		self._writeNode( generator, instructionsNode )
+
+	def _writeInstructions( self, generator, document, instructions ):
+		"""Write the node of the instructions object, its steps and actions and the nodes of its children"""
+
+		node = instructions.createXmlNode( document, includeSteps = False )
+		self._startElement( generator, node )
+		for child in node.childNodes:
+			self._writeNode( generator, child )
+		generator.startElement( "steps", {} )
+		for step in instructions.getSteps():
+			self._writeStep( generator, document, step )
+		generator.endElement( "steps" )
+		for child in instructions.getChildren():
+			self._writeInstructions( generator, document, child ) # enter recursion
+		generator.endElement( node.tagName )
+
+	def _writeStep( self, generator, document, step ):
+		node = step.createXmlNode( document, includeActions = False )
+		self._startElement( generator, node )
+		for child in node.childNodes:
+			self._writeNode( generator, child )
+		logFile = step.getRelativeLinkTarget()[0] if step.getLogfilePath() else None
+		for actions in step.getAllActions():
+			for action in actions:
+				self._writeNode( generator, action.createXmlNode( document, self.__maximumOutputSize, logFile ) )
+		generator.endElement( node.tagName )
+
+	def _startElement( self, generator, node ):
+		generator.startElement( node.tagName, dict( node.attributes.items() ) )
+
+	def _writeNode( self, generator, node ):
+		if node.nodeType == node.ELEMENT_NODE:
+			self._startElement( generator, node )
+			for child in node.childNodes:
+				self._writeNode( generator, child )
+			generator.endElement( node.tagName )
+		elif node.nodeType in ( node.TEXT_NODE, node.CDATA_SECTION_NODE ):
+			generator.characters( node.data )
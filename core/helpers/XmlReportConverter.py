@@ -32,8 +32,8 @@ from textwrap import TextWrapper
 import codecs
 import os.path
 import sys
+import threading
 import traceback
-import xml.etree.ElementTree
 
 
 try:
@@ -118,6 +118,12 @@ class XmlReportConverter( MObject ):
 		ReportFormat.HTML : "xmlreport2html.xsl",
 	}
 
+	# Compiled stylesheets and the files read by the converters are shared by all converters of the process. 
+	# Stylesheets are keyed by the stylesheet file and the plugin templates merged into it.
+	_transformsCache = {}
+	_filesCache = {}
+	_cacheLock = threading.Lock()
+
 	def __init__( self, xmlReport ):
 		MObject.__init__( self )
 
@@ -126,12 +132,10 @@ class XmlReportConverter( MObject ):
 			mApp().debug( self, "Lacking support for XSLT transformations. Support for HTML conversion not available. Please install the python-lxml package." )
 
 		self.__xmlReport = xmlReport
-
-		# ElementTree.fromstring requires encoded data, fails otherwise
-		encodedData = xmlReport.getReport().encode( "utf-8" )
-		self.__elementTree = xml.etree.ElementTree.fromstring( encodedData ) # cache ElementTree object
+		self.__elementTree = xmlReport.getElementTree() # parsed once by the shared report
 
 		self.__xslTemplateSnippets = {}
+		self.__xslTemplateKeys = {}
 		self.__xmlTemplateFunctions = {}
 		self.__registeredPlugins = []
 
@@ -154,15 +158,36 @@ class XmlReportConverter( MObject ):
 		for key, value in self._XSL_STYLESHEETS.items():
 			try:
 				fileName = os.path.dirname( __file__ ) + '/xslt/{0}'.format( value )
-				f = codecs.open( fileName, 'r', encoding = "utf-8" )
 				parser = etree.XMLParser()
-				self.__xslTemplateSnippets[key] = etree.parse( StringIO( f.read() ), parser )
-				f.close()
-			except KeyError:
+				self.__xslTemplateSnippets[key] = etree.parse( StringIO( self._readFile( fileName ) ), parser )
+				self.__xslTemplateKeys[key] = [ fileName ]
+			except ( KeyError, IOError ):
 				raise MomError( "XSL Stylesheet missing: {0}".format( value ) )
 			except etree.XMLSyntaxError, e:
 				raise MomError( "XSL Stylesheet for {0} is malformed: {1}".format( ReportFormat.toString( key ), e ) )
 
+	@classmethod
+	def _readFile( cls, filePath ):
+		"""\return The content of the file, read only once per process"""
+
+		with cls._cacheLock:
+			if filePath not in cls._filesCache:
+				with codecs.open( filePath, 'r', encoding = "utf-8" ) as f:
+					content = f.read()
+
+				# Note: bug in python-lxml affecting win32: if content contains CR-chars, XSLT.strparam() will HTML-encode these.
+				# We don't want that, obviously. Strip out CRs.
+				cls._filesCache[filePath] = content.replace( '\r\n', '\n' )
+			return cls._filesCache[filePath]
+
+	@classmethod
+	def clearCache( cls ):
+		"""Discard the compiled stylesheets and files cached by the converters of this process"""
+
+		with cls._cacheLock:
+			cls._transformsCache.clear()
+			cls._filesCache.clear()
+
 	def _fetchTemplates( self, instructions ):
 		"""Fetches templates from all registered plugins in the Instruction object
 		
@@ -211,6 +236,7 @@ class XmlReportConverter( MObject ):
 
 			# insert new element in the placeholder from the stylesheet
 			placeholder.insert( 0, element )
+			self.__xslTemplateKeys[destinationReportFormat].append( ( plugin.getName(), markup ) )
 
 	def _addXmlTemplate( self, plugin ):
 		"""Adds lxml conversion code if plugin provides one
@@ -234,6 +260,23 @@ class XmlReportConverter( MObject ):
 
 		return self.__xslTemplateSnippets[destinationReportFormat]
 
+	def getTransform( self, destinationReportFormat ):
+		"""Get the compiled XSL stylesheet for the requested format
+
+		The stylesheet is compiled once per process for every combination of plugin templates merged into it.
+
+		\return A etree.XSLT object or None"""
+
+		stylesheet = self.getXslTemplate( destinationReportFormat )
+		if stylesheet is None or not self.hasXsltSupport():
+			return None
+
+		key = tuple( self.__xslTemplateKeys[destinationReportFormat] )
+		with self._cacheLock:
+			if key not in self._transformsCache:
+				self._transformsCache[key] = etree.XSLT( stylesheet )
+			return self._transformsCache[key]
+
 	@classmethod
 	def hasXsltSupport( self ):
 		return ( etree.__name__ == "lxml.etree" )
@@ -252,26 +295,15 @@ class XmlReportConverter( MObject ):
 		enableCrossLinkingParam = "1" if enableCrossLinking else "0"
 
 		try:
-			def readFile( filePath ):
-				f = codecs.open( filePath, 'r', encoding = "utf-8" )
-				content = f.read()
-
-				# Note: bug in python-lxml affecting win32: if content contains CR-chars, XSLT.strparam() will HTML-encode these.
-				# We don't want that, obviously. Strip out CRs.
-				content = content.replace( '\r\n', '\n' )
-
-				f.close()
-				return content
-
 			javaScriptFilePath = os.path.join( os.path.dirname( __file__ ), "xslt", "xmlreport2html.js" )
 			cssFilePath = os.path.join( os.path.dirname( __file__ ), "xslt", "xmlreport2html.css" )
 
-			transform = etree.XSLT( self.__xslTemplateSnippets[ ReportFormat.HTML ] )
-			result = unicode( transform( etree.XML( self.__xmlReport.getReport() ),
+			transform = self.getTransform( ReportFormat.HTML )
+			result = unicode( transform( self.__xmlReport.getDocument( etree ),
 					summaryOnly = etree.XSLT.strparam( summaryOnly ),
 					enableCrossLinking = etree.XSLT.strparam( enableCrossLinkingParam ),
-					javaScriptContent = etree.XSLT.strparam( readFile( javaScriptFilePath ) ),
-					cssContent = etree.XSLT.strparam( readFile( cssFilePath ) ) )
+					javaScriptContent = etree.XSLT.strparam( self._readFile( javaScriptFilePath ) ),
+					cssContent = etree.XSLT.strparam( self._readFile( cssFilePath ) ) )
 			)
 		except Exception, e:
 			innerTraceback = "".join( traceback.format_tb( sys.exc_info()[2] ) )
@@ -413,14 +445,25 @@ Could not create HTML report. Caught exception:\n {0}\nTraceback:\n{1}
 
 				out += ["* Action: {0} *".format( action.find( "logdescription" ).text )]
 				out += ["STDOUT:"]
-				out += [action.find( "stdout" ).text or ""]
+				out += self._outputToStringList( action.find( "stdout" ) )
 				out += ["STDERR:"]
-				out += [action.find( "stderr" ).text or ""]
+				out += self._outputToStringList( action.find( "stderr" ) )
 				out += " "
 			out += " "
 
 		return "\n".join( out )
 
+	@classmethod
+	def _outputToStringList( self, element ):
+		"""\return The output of an action, with a reference to the log file if the report only contains the end of it"""
+
+		out = []
+		if element.attrib.get( "truncated" ) == "True":
+			out += ["(last {0} of {1} characters, see {2} for the complete output)".format( 
+					len( element.text or "" ), element.attrib["size"], element.attrib["logfile"] )]
+		out += [element.text or ""]
+		return out
+
 	@classmethod
 	def _statesToStringList( self, element ):
 		states = []
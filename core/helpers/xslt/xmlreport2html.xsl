@@ -385,18 +385,45 @@ toggle(logView, 'table-row');
 			<xsl:if test="string-length(stderr) > 0">
 				<tr>
 					<td colspan="3">
-						<pre>STDERR: <xsl:value-of select="stderr" /></pre>
+						<pre>STDERR: <xsl:apply-templates select="stderr" mode="output" /></pre>
 					</td>
 				</tr>
 			</xsl:if>
 			<xsl:if test="string-length(stdout) > 0">
 				<tr>
 					<td colspan="3">
-						<pre>STDOUT: <xsl:value-of select="stdout" /></pre>
+						<pre>STDOUT: <xsl:apply-templates select="stdout" mode="output" /></pre>
 					</td>
 				</tr>
 			</xsl:if>
 		</xsl:if>
 	</xsl:template>
 
+	<!-- Output of an action, the streamed report only contains the end of long output -->
+	<xsl:template match="stdout|stderr" mode="output">
+		<xsl:if test="@truncated = 'True'">
+			<xsl:text>(last </xsl:text>
+			<xsl:value-of select="string-length(.)" />
+			<xsl:text> of </xsl:text>
+			<xsl:value-of select="@size" />
+			<xsl:text> characters, see </xsl:text>
+			<xsl:choose>
+				<xsl:when test="$enableCrossLinking = '1'">
+					<a>
+						<xsl:attribute name="href">
+							<xsl:value-of select="@logfile"/>
+						</xsl:attribute>
+						<xsl:value-of select="@logfile"/>
+					</a>
+				</xsl:when>
+				<xsl:otherwise>
+					<xsl:value-of select="@logfile"/>
+				</xsl:otherwise>
+			</xsl:choose>
+			<xsl:text> for the complete output)
+</xsl:text>
+		</xsl:if>
+		<xsl:value-of select="." />
+	</xsl:template>
+
 </xsl:stylesheet>
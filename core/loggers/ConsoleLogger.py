@@ -31,13 +31,21 @@ class ConsoleLogger( Logger ):
 
 	def __init__( self, name = None ):
 		super( ConsoleLogger, self ).__init__( name )
-
-	@staticmethod
-	def __getLevel( mapp ):
-		verbosity = mapp.getSettings().get( Settings.ScriptLogLevel )
-		check_for_nonnegative_int( verbosity, "The debug level needs to be an integer of zero or more" )
+		self.__level = ( None, None, None )
+
+	def __getLevel( self, mapp ):
+		# the level is only read from the settings again after they have been changed:
+		settings = mapp.getSettings()
+		cachedSettings, revision, verbosity = self.__level
+		if cachedSettings is not settings or revision != settings.getRevision():
+			verbosity = settings.get( Settings.ScriptLogLevel )
+			check_for_nonnegative_int( verbosity, "The debug level needs to be an integer of zero or more" )
+			self.__level = ( settings, settings.getRevision(), verbosity )
 		return verbosity
 
+	def isEnabledFor( self, mapp, level ):
+		return self.__getLevel( mapp ) >= level
+
 	def _logError( self, mapp, mobject, msg ):
 		self._log( mapp, mobject, '*** ERROR: {0}'.format( msg ) )
 
@@ -27,6 +27,11 @@ class Logger( Plugin ):
 		Plugin.__init__( self, name )
 		self.__cachedMessages = {}
 
+	def isEnabledFor( self, mapp, level ):
+		'''Return whether the logger writes debug messages of the level (0 for messages and errors). The application only 
+		formats lazy messages if at least one of the loggers is enabled for them.'''
+		return True
+
 	def error( self, mapp, mobject, msg, compareTo = None ):
 		if not self._checkForDuplicateMessage( msg, compareTo ):
 			return self._logError( mapp, mobject, msg )
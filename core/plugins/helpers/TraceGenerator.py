@@ -0,0 +1,57 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from core.Exceptions import ConfigurationError
+from core.Plugin import Plugin
+from core.helpers.GlobalMApp import mApp
+import os.path
+
+class TraceGenerator( Plugin ):
+	"""
+	This plugin saves the timeline of the build in the Chrome trace event format.
+	Attach to a Build object to get build-trace.json in the log directory. The file can be loaded into chrome://tracing or
+	any other viewer of the format to see where the wall clock time of the build is spent.
+	"""
+
+	def __init__( self ):
+		Plugin.__init__( self )
+		self.__traceFile = None
+
+	def getFileName( self ):
+		return "{0}-trace.json".format( self.getInstructions().getTagName() )
+
+	def getTraceFile( self ):
+		return self.__traceFile
+
+	def report( self ):
+		logDirectory = self.getInstructions().getLogDir()
+		if not os.path.isdir( logDirectory ):
+			raise ConfigurationError( 'Log directory at "{0}" does not exist.'.format( str( logDirectory ) ) )
+		traceFile = os.path.join( logDirectory, self.getFileName() )
+		try:
+			mApp().getTraceRecorder().save( traceFile )
+		except ( IOError, OSError ) as e:
+			raise ConfigurationError( 'Cannot write the build trace to "{0}": {1}'.format( traceFile, e ) )
+		self.__traceFile = traceFile
+
+	def getObjectStatus( self ):
+		if self.getTraceFile():
+			return "Trace saved to: {0}".format( self.getTraceFile() )
+		return "No trace saved"
@@ -20,9 +20,9 @@
 from __future__ import unicode_literals
 
 from core.Plugin import Plugin
-from core.helpers.XmlReport import InstructionsXmlReport
 import os.path
 from core.Exceptions import ConfigurationError
+from core.helpers.XmlReport import StreamedXmlReport
 from core.helpers.XmlReportConverter import ReportFormat, XmlReportConverter
 import codecs
 from core.helpers.GlobalMApp import mApp
@@ -49,7 +49,7 @@ class XmlReportGenerator( Plugin ):
 		if self.__finished:
 			return
 
-		report = InstructionsXmlReport( self.getInstructions() )
+		report = mApp().getXmlReport( self.getInstructions() )
 		try:
 			self._openReportFile()
 			self._writeReport( report )
@@ -82,6 +82,9 @@ class XmlReportGenerator( Plugin ):
 
 	def _writeReport( self, report ):
 		if self.__fileHandle and report:
+			if self.__reportFormat == ReportFormat.XML and isinstance( report, StreamedXmlReport ):
+				report.copyTo( self.__fileHandle )
+				return
 			convertedText = self.convert( report )
 
 			if convertedText:
@@ -36,6 +36,7 @@ class PackageProvider( Plugin ):
 		command = [ self.getCommand() ]
 		command.extend( self.getCommandArguments() )
 		makePackage = ShellCommandAction( command, searchPaths = self.getCommandSearchPaths() )
+		makePackage.setKeepCompleteOutput( True ) # packagers parse the generated package names from the output
 		makePackage.setWorkingDirectory( self.getInstructions().getBuildDir() )
 		step.addMainAction( makePackage )
 		return makePackage
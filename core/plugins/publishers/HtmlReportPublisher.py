@@ -20,7 +20,6 @@
 from core.actions.filesystem.CopyActionBase import CopyActionBase
 from core.helpers.GlobalMApp import mApp
 from core.helpers.PathResolver import PathResolver
-from core.helpers.XmlReport import InstructionsXmlReport
 from core.helpers.XmlReportConverter import XmlReportConverter
 from core.plugins.publishers.Publisher import Publisher
 import codecs
@@ -63,7 +62,7 @@ class HtmlReportPublisher( Publisher ):
 		# create temporary directories
 		self._cloneDirectories()
 
-		report = InstructionsXmlReport( mApp() )
+		report = mApp().getXmlReport()
 		converter = XmlReportConverter( report )
 		html = converter.convertToHtml( enableCrossLinking = True )
 
@@ -95,4 +94,4 @@ class HtmlReportPublisher( Publisher ):
 
 		rc = uploaderAction.executeAction()
 		if rc != 0:
-			mApp().debug( self, "Uploading failed:", uploaderAction.getStdErr() )
+			mApp().debug( self, "Uploading failed: {0}", uploaderAction.getStdErr() )
@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from core.helpers.XmlReport import InstructionsXmlReport
+from core.helpers.GlobalMApp import mApp
 from core.helpers.XmlReportConverter import XmlReportConverter
 from core.plugins.reporters.Reporter import Reporter
 
@@ -30,7 +30,7 @@ class ConsoleReporter( Reporter ):
 		if self.isReportSent():
 			return
 
-		report = InstructionsXmlReport( self.getInstructions() )
+		report = mApp().getXmlReport( self.getInstructions() )
 		converter = XmlReportConverter( report )
 
 		print( " " )
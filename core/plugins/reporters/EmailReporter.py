@@ -25,7 +25,6 @@ from core.helpers.Emailer import Email, Emailer
 from core.helpers.GlobalMApp import mApp
 from core.helpers.RevisionInfo import RevisionInfo
 from core.helpers.TypeCheckers import check_for_list_of_strings_or_none, check_for_string, check_for_list_of_strings
-from core.helpers.XmlReport import InstructionsXmlReport
 from core.helpers.XmlReportConverter import XmlReportConverter
 from core.plugins.reporters.Reporter import Reporter
 
@@ -197,7 +196,7 @@ class EmailReporter( Reporter ):
 		# body
 		reporterUseCompression = mApp().getSettings().get( Settings.EmailReporterUseCompressionForAttachments, False )
 
-		report = InstructionsXmlReport( mApp() )
+		report = mApp().getXmlReport()
 		converter = XmlReportConverter( report )
 
 		### text and html part
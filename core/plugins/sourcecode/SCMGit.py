@@ -22,8 +22,10 @@ from core.Exceptions import ConfigurationError, MomError
 from core.helpers.RunCommand import RunCommand
 from core.actions.ShellCommandAction import ShellCommandAction
 from core.actions.Action import Action
-import os, sys
+import os, sys, time
+from threading import Lock
 from core.helpers.FilesystemAccess import make_foldername_from_string
+from core.helpers.FileLock import FileLock
 import re
 from core.helpers.GlobalMApp import mApp
 from core.helpers.RevisionInfo import RevisionInfo
@@ -49,9 +51,26 @@ class _UpdateHiddenCloneAction( Action ):
 		"""Provide a textual description for the Action that can be added to the execution log file."""
 		return self.getName()
 
+class _HiddenCloneReaderAction( ShellCommandAction ):
+	'''Executes a git command that reads from the hidden clone, while holding a shared lock on it.'''
+
+	def __init__( self, scmgit, command ):
+		ShellCommandAction.__init__( self, command, searchPaths = scmgit.getCommandSearchPaths() )
+		self.__scmgit = scmgit
+
+	def run( self ):
+		with self.__scmgit._getHiddenCloneLock( shared = True ):
+			return ShellCommandAction.run( self )
+
 class SCMGit( SourceCodeProvider ):
 	"""Git SCM Provider Class"""
 
+	CheckoutMode_Clone = 'clone'
+	CheckoutMode_Worktree = 'worktree'
+
+	_lastFetches = {} # hidden clone path -> time of the last fetch performed by this process
+	_lastFetchesLock = Lock()
+
 	def __init__( self, name = None ):
 		SourceCodeProvider.__init__( self, name )
 		searchPaths = []
@@ -62,21 +81,11 @@ class SCMGit( SourceCodeProvider ):
 		self._setCommandSearchPaths( searchPaths )
 		self.__cloneArmy = self._findCloneArmyDir()
 		self.__cachedCheckoutsDir = self._findCachedCheckoutsDir()
+		self.setCheckoutMode( None )
 
 	def getIdentifier( self ):
 		return 'git'
 
-	def _getCachesDir( self ):
-		directory = None
-		if sys.platform == 'darwin':
-			directory = os.path.expanduser( "~/Library/Caches/Make-O-Matic" )
-		elif sys.platform == 'win32':
-			directory = os.getenv( 'LOCALAPPDATA' ) or os.getenv( 'APPDATA' )
-			directory = os.path.join( directory, "Make-O-Matic", 'caches' )
-		else:
-			directory = os.path.expanduser( "~/.mom/caches" )
-		return directory
-
 	def _findCloneArmyDir( self ):
 		name = 'clonearmy'
 		if sys.platform == 'darwin':
@@ -89,9 +98,30 @@ class SCMGit( SourceCodeProvider ):
 		path = os.path.join( self._getCachesDir(), name )
 		return path
 
+	def setCheckoutMode( self, mode ):
+		'''Select how the source code is checked out. In clone mode (the default), the hidden clone is cloned into the source 
+		directory. In worktree mode, the source directory is added as a worktree of the hidden clone. If mode is None, the 
+		mode is read from the scm.git.checkoutmode setting.'''
+		if mode not in ( None, SCMGit.CheckoutMode_Clone, SCMGit.CheckoutMode_Worktree ):
+			raise ConfigurationError( 'Unknown git checkout mode "{0}", valid modes are "{1}" and "{2}"'
+				.format( mode, SCMGit.CheckoutMode_Clone, SCMGit.CheckoutMode_Worktree ) )
+		self.__checkoutMode = mode
+
+	def getCheckoutMode( self ):
+		mode = self.__checkoutMode or mApp().getSettings().get( Settings.SCMGitCheckoutMode )
+		if mode not in ( SCMGit.CheckoutMode_Clone, SCMGit.CheckoutMode_Worktree ):
+			raise ConfigurationError( 'Unknown git checkout mode "{0}" in setting {1}'.format( mode, Settings.SCMGitCheckoutMode ) )
+		return mode
+
+	def setCloneArmyDir( self, directory ):
+		self.__cloneArmy = directory
+
 	def getCloneArmyDir( self ):
 		return self.__cloneArmy
 
+	def setCachedCheckoutsDir( self, directory ):
+		self.__cachedCheckoutsDir = directory
+
 	def getCachedCheckoutsDir( self ):
 		return self.__cachedCheckoutsDir
 
@@ -103,7 +133,8 @@ class SCMGit( SourceCodeProvider ):
 		cmd = [ self.getCommand(), '--no-pager', 'log', '--pretty=format:{0}'.format( formatStr ), '{0}~1..{0}'.format( self.getTreeish() )]
 		runner = RunCommand( cmd, 3600, searchPaths = self.getCommandSearchPaths() )
 		runner.setWorkingDir( self._getHiddenClonePath() )
-		runner.run()
+		with self._getHiddenCloneLock( shared = True ):
+			runner.run()
 
 		info = RevisionInfo( "GitRevisionInfo" )
 
@@ -131,7 +162,8 @@ class SCMGit( SourceCodeProvider ):
 		cmd = [ self.getCommand(), 'log', '{0}..'.format( revision ) ]
 		runner = RunCommand( cmd, 3600, searchPaths = self.getCommandSearchPaths() )
 		runner.setWorkingDir( self._getHiddenClonePath() )
-		runner.run()
+		with self._getHiddenCloneLock( shared = True ):
+			runner.run()
 
 		if runner.getReturnCode() == 0:
 			revisions = []
@@ -166,7 +198,8 @@ class SCMGit( SourceCodeProvider ):
 		self.updateHiddenClone()
 		runner = RunCommand( [ self.getCommand(), 'log', '-n1' ], searchPaths = self.getCommandSearchPaths() )
 		runner.setWorkingDir( self._getHiddenClonePath() )
-		runner.run()
+		with self._getHiddenCloneLock( shared = True ):
+			runner.run()
 
 		if runner.getReturnCode() == 0:
 			parts = runner.getStdOut().decode().splitlines()[0].strip().split()
@@ -184,11 +217,15 @@ class SCMGit( SourceCodeProvider ):
 		updateHiddenCloneAction = _UpdateHiddenCloneAction( self )
 		step.addMainAction( updateHiddenCloneAction )
 
+		if self.getCheckoutMode() == SCMGit.CheckoutMode_Worktree:
+			self.__makeWorktreeCheckoutActions( step )
+			return
+
 		updateCommand = [ self.getCommand(), 'clone', '--local', '--depth', '1', self._getHiddenClonePath(), "." ]
 		# fix 'failed to create link' errors on windows, seems like windows does not like cross-device (hard) links 
 		if sys.platform == 'win32':
 			updateCommand.append( '--no-hardlinks' )
-		updateClone = ShellCommandAction( updateCommand, searchPaths = self.getCommandSearchPaths() )
+		updateClone = _HiddenCloneReaderAction( self, updateCommand )
 		updateClone.setWorkingDirectory( self.getSrcDir() )
 		step.addMainAction( updateClone )
 
@@ -197,6 +234,23 @@ class SCMGit( SourceCodeProvider ):
 		checkout.setWorkingDirectory( self.getSrcDir() )
 		step.addMainAction( checkout )
 
+	def __makeWorktreePruneAction( self ):
+		prune = _HiddenCloneReaderAction( self, [ self.getCommand(), 'worktree', 'prune' ] )
+		prune.setWorkingDirectory( self._getHiddenClonePath() )
+		return prune
+
+	def __makeWorktreeCheckoutActions( self, step ):
+		'''The source directory is added as a worktree of the hidden clone. It shares the object database of the hidden 
+		clone, so nothing is copied. Worktrees of deleted build directories are pruned before and after the build, 
+		otherwise a build in the same directory fails.'''
+		step.addMainAction( self.__makeWorktreePruneAction() )
+		addCommand = [ self.getCommand(), 'worktree', 'add', '--detach', self.getSrcDir(), self.getTreeish() ]
+		addWorktree = _HiddenCloneReaderAction( self, addCommand )
+		addWorktree.setWorkingDirectory( self._getHiddenClonePath() )
+		step.addMainAction( addWorktree )
+		# the cleanup step deletes the build directory first, the worktree can be pruned after that:
+		self.getInstructions().getStep( 'cleanup' ).addMainAction( self.__makeWorktreePruneAction() )
+
 	def getTreeish( self, remote = None ):
 		# TODO Work out sensible ordering here or fail if we have more than one of these parameters
 		treeish = self.getRevision()
@@ -220,12 +274,76 @@ class SCMGit( SourceCodeProvider ):
 		cachedCheckout = os.path.join( self.getCachedCheckoutsDir(), self.__getTempRepoName() )
 		return cachedCheckout
 
-	def updateHiddenClone( self ):
+	def _getHiddenCloneLock( self, shared = False ):
+		'''Return the lock that coordinates the processes using the hidden clone.
+		Readers hold a shared lock. Creating the hidden clone and fetching into it requires the exclusive lock. When both 
+		are needed, the lock of the cached checkout is taken first.'''
+		return FileLock( self._getHiddenClonePath() + '.lock', shared )
+
+	def _getCachedCheckoutLock( self ):
+		'''Return the lock that serializes the updates of the cached checkout.'''
+		return FileLock( self._getCachedCheckoutPath() + '.lock' )
+
+	def _getFetchStampPath( self ):
+		'''The time of the last fetch into the hidden clone is recorded next to it, so that it is shared between processes.'''
+		return self._getHiddenClonePath() + '.lastfetch'
+
+	def __getLastFetchTime( self ):
+		hiddenClone = self._getHiddenClonePath()
+		with SCMGit._lastFetchesLock:
+			lastFetch = SCMGit._lastFetches.get( hiddenClone, 0 )
+		try:
+			with open( self._getFetchStampPath() ) as stamp:
+				lastFetch = max( lastFetch, float( stamp.read() ) )
+		except ( IOError, ValueError ):
+			pass # never fetched, or recorded by a process that was interrupted
+		return lastFetch
+
+	def __recordFetch( self, fetchTime ):
+		with SCMGit._lastFetchesLock:
+			SCMGit._lastFetches[ self._getHiddenClonePath() ] = fetchTime
+		try:
+			with open( self._getFetchStampPath(), 'w' ) as stamp:
+				stamp.write( repr( fetchTime ) )
+		except IOError as e:
+			mApp().debugN( self, 2, 'cannot record the fetch time of the hidden clone: {0}'.format( e ) )
+
+	def __hasRevision( self, revision ):
+		runner = RunCommand( [ self.getCommand(), 'cat-file', '-e', '{0}^{{commit}}'.format( revision ) ],
+			searchPaths = self.getCommandSearchPaths() )
+		runner.setWorkingDir( self._getHiddenClonePath() )
+		runner.run()
+		return runner.getReturnCode() == 0
+
+	def _isHiddenCloneFresh( self ):
+		'''Return True if the hidden clone was fetched within the freshness window, and contains the requested revision.'''
+		freshness = mApp().getSettings().get( Settings.SCMGitFetchFreshness, required = False )
+		if not freshness:
+			return False
+		age = time.time() - self.__getLastFetchTime()
+		if age < 0 or age >= freshness:
+			return False
+		if self.getRevision() and not self.__hasRevision( self.getRevision() ):
+			return False
+		return True
+
+	def updateHiddenClone( self, force = False ):
+		'''Create the hidden clone, or fetch new revisions into it.
+		The fetch is skipped if the hidden clone was fetched by this or another process within the freshness window 
+		(scm.git.fetchfreshness), unless force is True.'''
+		with self._getHiddenCloneLock():
+			self.__updateHiddenClone( force )
+
+	def __updateHiddenClone( self, force ):
 		hiddenClone = self._getHiddenClonePath()
+		fetchTime = time.time()
 		# check if the clone directory exists, create if necessary: 
 		if os.path.exists( hiddenClone ):
 			if not os.path.isdir( hiddenClone ):
 				raise MomError( 'hidden clone exists at "{0}", but is not a directory. Help!'.format( hiddenClone ) )
+			if not force and self._isHiddenCloneFresh():
+				mApp().debugN( self, 4, 'the hidden clone at "{0}" was fetched recently, not fetching'.format( hiddenClone ) )
+				return
 			# FIXME get timeout value from settings
 			fetchCommand = [ self.getCommand(), 'fetch', '--all' ]
 			runner = RunCommand( fetchCommand, 1200, True, searchPaths = self.getCommandSearchPaths() )
@@ -233,6 +351,7 @@ class SCMGit( SourceCodeProvider ):
 			runner.run()
 			if runner.getReturnCode() == 0:
 				mApp().debugN( self, 4, 'updated the hidden clone at "{0}"'.format( hiddenClone ) )
+				self.__recordFetch( fetchTime )
 			else:
 				raise MomError( 'cannot update the clone of "{0}" at "{1}"'.format( self.getUrl(), hiddenClone ) )
 		else:
@@ -245,19 +364,25 @@ class SCMGit( SourceCodeProvider ):
 
 			if runner.getReturnCode() == 0:
 				mApp().debugN( self, 2, 'Created a hidden clone at "{0}"'.format( hiddenClone ) )
+				self.__recordFetch( fetchTime )
 			else:
 				if runner.getStdOut().find( "unknown option `mirror'" ) != -1:
 					raise ConfigurationError( 'Please install newer version of Git that supports the "--mirror" option' )
 				raise MomError( 'cannot create clone of "{0}" at "{1}"'.format( self.getUrl(), hiddenClone ) )
 
 	def updateCachedCheckout( self ):
-		treeish = self.getTreeish( 'origin' )
 		if not os.path.exists( self.getCachedCheckoutsDir() ):
 			try:
 				os.makedirs( self.getCachedCheckoutsDir() )
 			except ( IOError, OSError ) as e:
-				raise MomError( 'Error creating cached checkouts dir at {0}: {1}'.format( 
-					self.getCachedCheckoutsDir(), e ) )
+				if not os.path.isdir( self.getCachedCheckoutsDir() ): # created by another process in the meantime otherwise
+					raise MomError( 'Error creating cached checkouts dir at {0}: {1}'.format( 
+						self.getCachedCheckoutsDir(), e ) )
+		with self._getCachedCheckoutLock():
+			self.__updateCachedCheckout()
+
+	def __updateCachedCheckout( self ):
+		treeish = self.getTreeish( 'origin' )
 		if os.path.exists( self._getCachedCheckoutPath() ):
 			# update an existing repository
 			mApp().debugN( self, 3, 'updating the cached checkout at "{0}" to treeish {1}'.format( 
@@ -265,7 +390,8 @@ class SCMGit( SourceCodeProvider ):
 			# reset the hidden clone to a branch
 			resetRunner = RunCommand( [ self.getCommand(), 'fetch', '--all' ], searchPaths = self.getCommandSearchPaths() )
 			resetRunner.setWorkingDir( self._getCachedCheckoutPath() )
-			resetRunner.run()
+			with self._getHiddenCloneLock( shared = True ):
+				resetRunner.run()
 			if resetRunner.getReturnCode() != 0:
 				raise MomError( 'error fetching revisions into the hidden clone' )
 			# FIXME we may not be on the master branch:
@@ -276,7 +402,8 @@ class SCMGit( SourceCodeProvider ):
 			cloneCmd = [ self.getCommand(), 'clone', self._getHiddenClonePath(), self.__getTempRepoName() ]
 			cloneRunner = RunCommand( cloneCmd, searchPaths = self.getCommandSearchPaths() )
 			cloneRunner.setWorkingDir( self.getCachedCheckoutsDir() )
-			cloneRunner.run()
+			with self._getHiddenCloneLock( shared = True ):
+				cloneRunner.run()
 			if cloneRunner.getReturnCode() != 0:
 				raise ConfigurationError( 'Cannot create the cached checkout at {0}'.format( 
 					self.getCachedCheckoutsDir() ) )
@@ -23,6 +23,7 @@ from core.helpers.RunCommand import RunCommand
 from core.actions.ShellCommandAction import ShellCommandAction
 import time
 from xml.dom import minidom
+from xml.etree.cElementTree import XMLParser
 from core.helpers.RevisionInfo import RevisionInfo
 import os
 import tempfile
@@ -36,10 +37,79 @@ import calendar
 from core.helpers.TimeUtils import formatted_time
 import re
 from core.Defaults import Defaults
+from core.plugins.sourcecode.SubversionCache import SubversionCache
 
 if sys.platform == "win32":
 	from core.helpers.RegistryHelper import getPathsFromRegistry
 
+class _SvnLogParser( object ):
+	'''_SvnLogParser parses the XML output of svn log incrementally while the command runs, it is used as the output stream 
+	of the command. Only the log entry that is being parsed is kept in memory. After maximumEntries log entries have been 
+	parsed, the remaining output is ignored.'''
+
+	Fields = ( 'author', 'date', 'msg' )
+
+	def __init__( self, maximumEntries = None ):
+		self.__parser = XMLParser( target = self )
+		self.__maximumEntries = maximumEntries
+		self.__entries = []
+		self.__entry = None
+		self.__text = []
+		self.__error = None
+
+	def isDone( self ):
+		return self.__maximumEntries is not None and len( self.__entries ) >= self.__maximumEntries
+
+	def getEntries( self ):
+		'''Return the parsed log entries (see parse_log_entry()) in the order of the log.'''
+		return self.__entries
+
+	def write( self, text ):
+		if self.isDone() or self.__error:
+			return
+		try:
+			self.__parser.feed( text.encode( 'utf-8' ) )
+		except SyntaxError as e:
+			self.__error = e
+
+	def flush( self ):
+		pass
+
+	def finish( self ):
+		'''Call after the command finished. Raises a ConfigurationError if the output was not a valid log.'''
+		if not self.isDone() and not self.__error:
+			try:
+				self.__parser.close()
+			except SyntaxError as e:
+				self.__error = e
+		if self.__error:
+			raise ConfigurationError( 'Cannot parse the svn log: {0}'.format( self.__error ) )
+
+	# the parser target interface:
+	def start( self, tag, attributes ):
+		if tag == 'logentry':
+			self.__entry = { 'revision' : attributes.get( 'revision' ), 'author' : '', 'date' : None, 'msg' : '' }
+		self.__text = []
+
+	def data( self, text ):
+		if self.__entry is not None:
+			self.__text.append( text )
+
+	def end( self, tag ):
+		if self.__entry is None:
+			return
+		if tag in _SvnLogParser.Fields:
+			self.__entry[ tag ] = u''.join( self.__text )
+		elif tag == 'logentry':
+			entry = self.__entry
+			self.__entry = None
+			if not self.isDone():
+				self.__entries.append( make_log_entry( entry[ 'revision' ], entry[ 'author' ], entry[ 'date' ], entry[ 'msg' ] ) )
+		self.__text = []
+
+	def close( self ):
+		pass
+
 class SCMSubversion( SourceCodeProvider ):
 	"""Subversion SCM Provider Class"""
 
@@ -52,9 +122,16 @@ class SCMSubversion( SourceCodeProvider ):
 			searchPaths += getPathsFromRegistry( keys, ".." )
 		self._setCommand( "svn" )
 		self._setCommandSearchPaths( searchPaths )
-		self.__revisionInfoCache = {} # key: revision, value: RevisionInfo instance
+		self.setCache( SubversionCache( os.path.join( self._getCachesDir(), 'subversion.sqlite' ) ) )
 		self.__rootTrunk = False
 
+	def setCache( self, cache ):
+		'''Set the cache for log entries and summarized diffs of committed revisions, or None to disable caching.'''
+		self.__cache = cache
+
+	def getCache( self ):
+		return self.__cache
+
 	def setRootTrunk( self, rootTrunk ):
 		self.__rootTrunk = rootTrunk
 
@@ -79,34 +156,43 @@ class SCMSubversion( SourceCodeProvider ):
 	def getIdentifier( self ):
 		return 'svn'
 
-	def _retrieveRevisionInfo( self ):
-		# check if specified revision is in cache. do not check for 'HEAD'
-		if self.getRevision() in self.__revisionInfoCache:
-			return self.__revisionInfoCache[self.getRevision()]
+	def __getCachedLogEntry( self, url, revision ):
+		if not self.getCache() or not revision or not str( revision ).isdigit():
+			return None # HEAD, dates and other symbolic revisions cannot be cached
+		return self.getCache().getLogEntry( url, revision )
 
-		info = RevisionInfo( "SvnRevisionInfo" )
+	def __cacheLogEntries( self, url, entries ):
+		if self.getCache() and entries:
+			self.getCache().setLogEntries( url, entries )
 
-		revisionParameter = ['-r', str( self.getRevision() )] if self.getRevision() else []
-		cmd = [ self.getCommand(), '--non-interactive', 'log', '--xml', '--limit', '1', self.getUrl() ] + revisionParameter
-		runner = RunCommand( cmd, searchPaths = self.getCommandSearchPaths() )
-		runner.run()
+	def _retrieveRevisionInfo( self ):
+		info = RevisionInfo( "SvnRevisionInfo" )
 
-		if runner.getReturnCode() == 0:
+		results = self.__getCachedLogEntry( self.getUrl(), self.getRevision() )
+		if results:
+			mApp().debugN( self, 3, 'using the cached log entry for {0}@{1}'.format( self.getUrl(), self.getRevision() ) )
+		else:
+			revisionParameter = ['-r', str( self.getRevision() )] if self.getRevision() else []
+			cmd = [ self.getCommand(), '--non-interactive', 'log', '--xml', '--limit', '1', self.getUrl() ] + revisionParameter
+			runner = RunCommand( cmd, searchPaths = self.getCommandSearchPaths() )
+			runner.run()
+			if runner.getReturnCode() != 0:
+				return info
 			xmldoc = minidom.parseString( runner.getStdOut().encode( "utf-8" ) )
 			logentries = xmldoc.getElementsByTagName( 'logentry' )
 			assert len( logentries ) == 1
 			results = parse_log_entry( logentries[0] )
-			( info.committerName, info.commitMessage, info.revision, info.commitTime, info.commitTimeReadable ) = results
-			info.shortRevision = info.revision
+			# HEAD is stored under the revision it resolved to:
+			revision = self.getRevision() if str( self.getRevision() ).isdigit() else results[2]
+			self.__cacheLogEntries( self.getUrl(), [ ( revision, results ) ] )
 
-			if self.getSCMUidMapper():
-				email = self.getSCMUidMapper().getEmail( info.committerName )
-				mApp().debugN( self, 5, "E-Mail address for {0} from SCM uid mapper: {1}".format( info.committerName, email ) )
-				info.committerEmail = email
+		( info.committerName, info.commitMessage, info.revision, info.commitTime, info.commitTimeReadable ) = results
+		info.shortRevision = info.revision
 
-		# add to cache. do not add 'HEAD'
-		if self.getRevision():
-			self.__revisionInfoCache[self.getRevision()] = info
+		if self.getSCMUidMapper():
+			email = self.getSCMUidMapper().getEmail( info.committerName )
+			mApp().debugN( self, 5, "E-Mail address for {0} from SCM uid mapper: {1}".format( info.committerName, email ) )
+			info.committerEmail = email
 
 		return info
 
@@ -114,8 +200,8 @@ class SCMSubversion( SourceCodeProvider ):
 		"""Print revisions committed since the specified revision."""
 		revision = int( revision )
 		assert revision
-		xmlLog = self.__getXmlSvnLog( self.getUrl(), revision, cap )
-		buildInfos = self.__getXmlSvnLogEntries( xmlLog, revision, cap )
+		logEntries = self.__getSvnLog( self.getUrl(), revision, cap )
+		buildInfos = self.__getBuildInfosForLogEntries( logEntries, revision, cap )
 		return buildInfos
 
 	def _getRevisionsSinceAllBranches( self, revision, cap = None ):
@@ -124,8 +210,8 @@ class SCMSubversion( SourceCodeProvider ):
 		revision = int( revision )
 		assert revision
 		url = self.__getRootUrl()
-		xmlLog = self.__getXmlSvnLog( url, revision, cap )
-		buildInfos = self.__getXmlSvnLogEntries( xmlLog, revision, cap )
+		logEntries = self.__getSvnLog( url, revision, cap )
+		buildInfos = self.__getBuildInfosForLogEntries( logEntries, revision, cap )
 		locationMap = mApp().getSettings().get( Defaults.SCMSvnLocationBuildTypeMap, True )
 		branchBuildInfos = []
 		for buildInfo in buildInfos:
@@ -133,27 +219,40 @@ class SCMSubversion( SourceCodeProvider ):
 			branchBuildInfos.extend( self._splitIntoBuildInfos( buildInfo, diff, locationMap ) )
 		return branchBuildInfos
 
-	def __getXmlSvnLog( self, url, revision, cap ):
+	def __getSvnLog( self, url, revision, cap ):
+		'''Return the parsed log entries of the URL since the revision, oldest first.
+		The log is parsed while svn prints it. If cap is specified, svn stops after the first cap revisions following the 
+		specified one.'''
 		cmd = [ self.getCommand(), '--non-interactive', 'log', '--xml' ]
+		parser = _SvnLogParser( cap + 1 if cap else None ) # plus the specified revision
 		if revision == 0:
-			cmd.extend( ['--limit', '1' ] )
-		cmd.extend( ['-rHEAD:{0}'.format( str( revision ).strip() ), url ] )
+			cmd.extend( ['--limit', '1', '-rHEAD:0' ] )
+		else:
+			if cap:
+				cmd.extend( [ '--limit', str( cap + 1 ) ] )
+			cmd.append( '-r{0}:HEAD'.format( str( revision ).strip() ) )
+		cmd.append( url )
 		runner = RunCommand( cmd, 3600, searchPaths = self.getCommandSearchPaths() )
+		runner.setOutputStreams( parser )
+		runner.setMaximumOutputSize( 64 * 1024 ) # the log is not kept in memory, only the tail for error messages
 		runner.run()
 		if runner.getReturnCode() == 0:
-			return minidom.parseString( runner.getStdOut().encode( "utf-8" ) )
+			parser.finish()
+			entries = parser.getEntries()
+			# the URL was changed in all of these revisions, so these are also the log entries of the URL at each revision:
+			self.__cacheLogEntries( url, [ ( entry[2], entry ) for entry in entries ] )
+			return entries
 		elif runner.getTimedOut() == True:
 			raise ConfigurationError( 'Getting svn log for "{0}" timed out.'.format( self.getUrl() ) )
 		else:
 			msg = runner.getStdErrAsString().strip()
 			raise ConfigurationError( 'Getting svn log failed: "{0}"'.format( msg ) )
 
-	def __getXmlSvnLogEntries( self, xmlLog, startRevision, cap ):
+	def __getBuildInfosForLogEntries( self, logEntries, startRevision, cap ):
+		'''Return BuildInfo objects for the log entries (oldest first) after the start revision, latest revision first.'''
 		revisions = []
-		logentries = xmlLog.getElementsByTagName( 'logentry' )
-		for entry in logentries:
-			result = parse_log_entry( entry )
-			if int( result[2] ) != startRevision: # svn log always spits out the last revision
+		for result in logEntries:
+			if int( result[2] ) != startRevision: # svn log always spits out the start revision
 				info = BuildInfo()
 				info.setProjectName( mApp().getSettings().get( Settings.ScriptBuildName ) )
 				info.setBuildType( 'C' )
@@ -164,9 +263,9 @@ class SCMSubversion( SourceCodeProvider ):
 				info.setTag( None )
 				revisions.append( info )
 		if cap:
-			return revisions[-cap:]
-		else:
-			return revisions
+			revisions = revisions[:cap]
+		revisions.reverse()
+		return revisions
 
 	def _splitIntoBuildInfos( self, buildInfo, diff, locationBuildTypeMapping ):
 		changes = {}
@@ -249,6 +348,10 @@ class SCMSubversion( SourceCodeProvider ):
 				buildInfo.setBuildType( buildType )
 
 	def __getSummarizedDiffForRevision( self, url, revision ):
+		if self.getCache():
+			lines = self.getCache().getSummarizedDiff( url, revision )
+			if lines is not None:
+				return lines
 		previous = revision - 1
 		cmd = [ self.getCommand(), 'diff', '--summarize', '-r', str( previous ) + ':' + str( revision ), url ]
 		runner = RunCommand( cmd, 3600, searchPaths = self.getCommandSearchPaths() )
@@ -258,7 +361,10 @@ class SCMSubversion( SourceCodeProvider ):
 			mApp().debugN( self, 2, 'cannot retrieve summarized diff for revision "{0}"'.format( revision ) )
 			return None
 		else:
-			return runner.getStdOut().encode( "utf-8" ).split( '\n' )
+			lines = runner.getStdOut().encode( "utf-8" ).split( '\n' )
+			if self.getCache():
+				self.getCache().setSummarizedDiff( url, revision, lines )
+			return lines
 
 	def _getCurrentRevision( self ):
 		'''Return the identifier of the current revisions.'''
@@ -324,11 +430,15 @@ def parse_log_entry( logentry ):
 		elif child.localName == 'date':
 			commitTime = get_node_text( child )
 		elif child.localName == 'msg':
-			message = get_node_text( child ).rstrip()
+			message = get_node_text( child )
 		else:
 			# this might be indentation whitespace
 			pass
+	return make_log_entry( revision, committer, commitTime, message )
 
+def make_log_entry( revision, committer, commitTime, message ):
+	"""Return the tuple (committer, message, revision, commitTime, commitTimeReadable) for the fields of a SVN log entry"""
+	message = message.rstrip()
 	# now turn commiTime into a Python datetime:
 	timeString = commitTime.split( '.' )[0] # strip microseconds
 	timeTuple = time.strptime( timeString, '%Y-%m-%dT%H:%M:%S' )
@@ -46,6 +46,10 @@ class SourceCodeProvider( Plugin ):
 	def getObjectStatus( self ):
 		return self.getUrl()
 
+	def _getCachesDir( self ):
+		'''Return the directory where source code providers keep data that is shared between builds.'''
+		return mApp().getSettings().getCachesFolder()
+
 	def getIdentifier( self ):
 		raise NotImplementedError
 
@@ -0,0 +1,105 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from core.MObject import MObject
+from core.helpers.GlobalMApp import mApp
+import json
+import os
+import sqlite3
+import threading
+
+class SubversionCache( MObject ):
+	'''SubversionCache stores parsed svn log entries and summarized diffs in a sqlite database.
+	Committed revisions never change, so the results for a URL at a specific revision can be reused by all later queries and 
+	processes. Results for HEAD must not be stored. The cache is an optimization only, if the database cannot be used, 
+	lookups return None and stores are ignored.'''
+
+	def __init__( self, databaseFile = None, name = None ):
+		MObject.__init__( self, name )
+		self.__lock = threading.Lock()
+		self.__connection = None
+		self.setDatabaseFile( databaseFile )
+
+	def setDatabaseFile( self, databaseFile ):
+		with self.__lock:
+			self.__databaseFile = databaseFile
+			if self.__connection:
+				self.__connection.close()
+			self.__connection = None
+
+	def getDatabaseFile( self ):
+		return self.__databaseFile
+
+	def __getConnection( self ):
+		if self.__connection is None:
+			folder = os.path.dirname( os.path.abspath( self.getDatabaseFile() ) )
+			if not os.path.isdir( folder ):
+				os.makedirs( folder )
+			connection = sqlite3.connect( self.getDatabaseFile(), timeout = 60, check_same_thread = False )
+			connection.execute( 'PRAGMA journal_mode=WAL' )
+			connection.execute( '''CREATE TABLE IF NOT EXISTS log_entries (
+url text, revision int, committer text, message text, entry_revision text, commit_time int, commit_time_readable text,
+PRIMARY KEY ( url, revision ) )''' )
+			connection.execute( '''CREATE TABLE IF NOT EXISTS diff_summaries (
+url text, revision int, lines text, PRIMARY KEY ( url, revision ) )''' )
+			connection.commit()
+			self.__connection = connection
+		return self.__connection
+
+	def __execute( self, operation, *args ):
+		if not self.getDatabaseFile():
+			return None
+		with self.__lock:
+			try:
+				return operation( self.__getConnection(), *args )
+			except ( sqlite3.Error, OSError ) as e:
+				mApp().debug( self, 'cannot use the Subversion cache "{0}": {1}'.format( self.getDatabaseFile(), e ) )
+				return None
+
+	def getLogEntry( self, url, revision ):
+		'''Return the parsed log entry of the URL at the revision, as returned by parse_log_entry(), or None.'''
+		def lookup( connection ):
+			row = connection.execute( '''select committer, message, entry_revision, commit_time, commit_time_readable
+from log_entries where url=? and revision=?''', [ url, int( revision ) ] ).fetchone()
+			return tuple( row ) if row else None
+		return self.__execute( lookup )
+
+	def setLogEntries( self, url, entries ):
+		'''Store parsed log entries of the URL. entries is a list of ( revision, entry ) tuples.'''
+		def store( connection ):
+			with connection:
+				connection.executemany( 'insert or replace into log_entries values ( ?, ?, ?, ?, ?, ?, ? )',
+					[ [ url, int( revision ) ] + list( entry ) for revision, entry in entries ] )
+		self.__execute( store )
+
+	def getSummarizedDiff( self, url, revision ):
+		'''Return the lines of the summarized diff of the URL between the revision and its predecessor, or None.'''
+		def lookup( connection ):
+			row = connection.execute( 'select lines from diff_summaries where url=? and revision=?',
+				[ url, int( revision ) ] ).fetchone()
+			return [ line.encode( 'utf-8' ) for line in json.loads( row[0] ) ] if row else None
+		return self.__execute( lookup )
+
+	def setSummarizedDiff( self, url, revision, lines ):
+		def store( connection ):
+			with connection:
+				connection.execute( 'insert or replace into diff_summaries values ( ?, ?, ? )',
+					[ url, int( revision ), json.dumps( lines ) ] )
+		self.__execute( store )
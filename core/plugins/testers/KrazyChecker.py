@@ -27,6 +27,7 @@ class CallbackShellCommandAction( ShellCommandAction ):
 
 	def __init__( self, command = None, timeout = None, combineOutput = True, callback = None ):
 		ShellCommandAction.__init__( self, command, timeout, combineOutput = combineOutput )
+		self.setKeepCompleteOutput( True ) # the callback parses the output
 		self.__callback = callback
 
 	def run( self ):
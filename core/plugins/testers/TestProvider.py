@@ -23,6 +23,7 @@ from core.actions.ShellCommandAction import ShellCommandAction
 class TestProviderAction( ShellCommandAction ):
 	def __init__( self, tester, command = None, timeout = None ):
 		ShellCommandAction.__init__( self, command, timeout )
+		self.setKeepCompleteOutput( True ) # the test results are parsed from the output
 		self.__tester = tester
 
 	def run( self ):
@@ -0,0 +1,82 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Build import Build
+from core.Configuration import Configuration
+from core.MApplication import MApplication
+from core.Project import Project
+from core.Settings import Settings
+from core.environments.Environments import Environments
+from core.helpers.SafeDeleteTree import rmtree
+import os
+import tempfile
+
+class Benchmark( object ):
+	'''Benchmark is the base class of the benchmarks of the benchmark suite.
+	setUp() generates the input data in a temporary directory, only run() is measured, and tearDown() removes the input 
+	data again. The scale factor multiplies the size of the generated input, the default of 1 is meant to take a few 
+	seconds per benchmark.'''
+
+	def __init__( self, scale = 1 ):
+		self.__scale = scale
+		self.__directory = None
+		self.__previousDirectory = None
+
+	def getName( self ):
+		return self.__class__.__name__
+
+	def getScale( self ):
+		return self.__scale
+
+	def _scaled( self, count ):
+		return max( 1, int( count * self.getScale() ) )
+
+	def getDirectory( self ):
+		return self.__directory
+
+	def getUnavailableReason( self ):
+		'''Return why the benchmark cannot be executed on this machine, or None if it can be executed.'''
+		return None
+
+	def setUp( self ):
+		self.__directory = tempfile.mkdtemp( prefix = 'tmp-mom-benchmark-' )
+		self.__previousDirectory = os.getcwd()
+		os.chdir( self.__directory )
+
+	def run( self ):
+		raise NotImplementedError()
+
+	def tearDown( self ):
+		MApplication.instance = None
+		os.chdir( self.__previousDirectory )
+		rmtree( self.__directory )
+
+	def _createBuild( self, name, configurations = 0 ):
+		'''Create a build with one project, and the specified number of configurations.
+		The build does not load the configuration files of the user, so that the results are comparable between machines.'''
+		os.environ[ 'MOM_TESTS_RUNNING' ] = '1'
+		MApplication.instance = None
+		build = Build( name = name )
+		build.getSettings().set( Settings.ProjectBuildType, 'm' )
+		project = Project( '{0}Project'.format( name ) )
+		build.setProject( project )
+		environments = Environments( parent = project )
+		for index in range( configurations ):
+			Configuration( 'Configuration-{0}'.format( index ), environments )
+		return build
@@ -0,0 +1,184 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from mom.benchmarks.BuildBenchmarks import ConfigurationsBenchmark, CommandOutputBenchmark, XmlReportBenchmark
+from mom.benchmarks.BuildStatusBenchmark import BuildStatusBenchmark
+from mom.benchmarks.EnvironmentsBenchmark import EnvironmentsBenchmark, BestScoringEnvironmentBenchmark, \
+	EnvironmentExpansionBenchmark
+from mom.benchmarks.FilesystemBenchmarks import TreeCopyBenchmark, TreeDeleteBenchmark
+from mom.benchmarks.LoggingBenchmark import LoggingBenchmark
+from mom.benchmarks.ScmBenchmarks import GitBenchmark, SubversionBenchmark
+from subprocess import Popen, PIPE
+import json
+import optparse
+import os
+import sys
+import time
+
+BENCHMARKS = [
+	ConfigurationsBenchmark,
+	CommandOutputBenchmark,
+	XmlReportBenchmark,
+	EnvironmentsBenchmark,
+	BestScoringEnvironmentBenchmark,
+	EnvironmentExpansionBenchmark,
+	BuildStatusBenchmark,
+	TreeCopyBenchmark,
+	TreeDeleteBenchmark,
+	GitBenchmark,
+	SubversionBenchmark,
+	LoggingBenchmark
+]
+
+_ResultMarker = 'MOM-BENCHMARK-RESULT '
+
+def get_peak_memory():
+	'''Return the peak resident memory of the process in kilobytes, or None if it cannot be determined.'''
+	try:
+		import resource
+	except ImportError:
+		return None # not available on Windows
+	peak = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+	if sys.platform == 'darwin':
+		peak /= 1024 # reported in bytes
+	return peak
+
+def run_benchmark( name, scale ):
+	'''Execute one benchmark in this process and print the result. Called by BenchmarkRunner in a new process per 
+	measurement, so that the peak memory is measured for every benchmark separately.'''
+	benchmarkClass = dict( ( benchmark.__name__, benchmark ) for benchmark in BENCHMARKS )[ name ]
+	benchmark = benchmarkClass( scale )
+	benchmark.setUp()
+	try:
+		start = time.time()
+		benchmark.run()
+		seconds = time.time() - start
+	finally:
+		benchmark.tearDown()
+	sys.stdout.write( _ResultMarker + json.dumps( { 'seconds' : seconds, 'memory' : get_peak_memory() } ) + '\n' )
+
+class BenchmarkRunner( object ):
+	'''BenchmarkRunner executes the benchmarks, and compares the results to a baseline.
+	Every repetition of a benchmark is executed in a separate process. The fastest repetition is reported, together with 
+	the highest peak memory usage.'''
+
+	def __init__( self, scale = 1, repeat = 3 ):
+		self.__scale = scale
+		self.__repeat = repeat
+
+	def getScale( self ):
+		return self.__scale
+
+	def getRepeat( self ):
+		return self.__repeat
+
+	def __runInProcess( self, name ):
+		root = os.path.dirname( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+		script = 'import sys\nsys.path.insert( 0, {0!r} )\nfrom mom.benchmarks.BenchmarkRunner import run_benchmark\n' \
+			'run_benchmark( {1!r}, {2!r} )\n'.format( root, name, self.getScale() )
+		process = Popen( [ sys.executable, '-c', script ], stdout = PIPE )
+		output = process.communicate()[0]
+		if process.returncode != 0:
+			raise RuntimeError( 'benchmark {0} failed with return code {1}'.format( name, process.returncode ) )
+		for line in output.splitlines():
+			if line.startswith( _ResultMarker ):
+				return json.loads( line[ len( _ResultMarker ): ] )
+		raise RuntimeError( 'benchmark {0} did not report a result'.format( name ) )
+
+	def runBenchmark( self, benchmarkClass ):
+		'''Return the result of the benchmark as a dictionary with the time in seconds and the peak memory in kilobytes, 
+		or with the reason why the benchmark was skipped.'''
+		reason = benchmarkClass( self.getScale() ).getUnavailableReason()
+		if reason:
+			return { 'skipped' : reason }
+		results = [ self.__runInProcess( benchmarkClass.__name__ ) for _ in range( self.getRepeat() ) ]
+		memory = [ result[ 'memory' ] for result in results if result[ 'memory' ] is not None ]
+		return { 'seconds' : min( result[ 'seconds' ] for result in results ), 'memory' : max( memory ) if memory else None }
+
+	def run( self, names = None ):
+		'''Run the named benchmarks (all if no names are specified), and return the results by benchmark name.'''
+		known = [ benchmark.__name__ for benchmark in BENCHMARKS ]
+		for name in names or []:
+			if name not in known:
+				raise ValueError( 'unknown benchmark {0}, known benchmarks are: {1}'.format( name, ', '.join( known ) ) )
+		results = {}
+		for benchmark in BENCHMARKS:
+			if names and benchmark.__name__ not in names:
+				continue
+			results[ benchmark.__name__ ] = self.runBenchmark( benchmark )
+			yield benchmark.__name__, results[ benchmark.__name__ ]
+
+	@staticmethod
+	def compare( results, baseline, tolerance ):
+		'''Return a list of ( name, seconds ratio, memory ratio, regressed ) tuples for the benchmarks in both results.
+		A benchmark regressed if it became slower or used more memory than the tolerance (0.2 means 20%).'''
+		comparison = []
+		for name, result in sorted( results.items() ):
+			reference = baseline.get( name )
+			if not reference or 'seconds' not in result or 'seconds' not in reference:
+				continue
+			timeRatio = result[ 'seconds' ] / max( reference[ 'seconds' ], 0.000001 )
+			memoryRatio = None
+			if result.get( 'memory' ) and reference.get( 'memory' ):
+				memoryRatio = float( result[ 'memory' ] ) / reference[ 'memory' ]
+			regressed = timeRatio > 1 + tolerance or ( memoryRatio or 0 ) > 1 + tolerance
+			comparison.append( ( name, timeRatio, memoryRatio, regressed ) )
+		return comparison
+
+def main():
+	parser = optparse.OptionParser( usage = '%prog [options] [benchmark...]',
+		description = 'Run the Make-O-Matic benchmark suite. Benchmarks: {0}'.format( 
+			', '.join( benchmark.__name__ for benchmark in BENCHMARKS ) ) )
+	parser.add_option( '-s', '--scale', type = 'float', default = 1.0, help = 'scale factor for the size of the generated input' )
+	parser.add_option( '-r', '--repeat', type = 'int', default = 3, help = 'number of measurements per benchmark' )
+	parser.add_option( '-o', '--save', metavar = 'FILE', help = 'save the results as a baseline' )
+	parser.add_option( '-b', '--baseline', metavar = 'FILE', help = 'compare the results to a saved baseline' )
+	parser.add_option( '-t', '--tolerance', type = 'float', default = 0.2,
+		help = 'relative slowdown or memory increase that is reported as a regression [default: %default]' )
+	options, names = parser.parse_args()
+
+	runner = BenchmarkRunner( options.scale, options.repeat )
+	results = {}
+	for name, result in runner.run( names ):
+		results[ name ] = result
+		if 'skipped' in result:
+			print( '{0:<26} skipped: {1}'.format( name, result[ 'skipped' ] ) )
+		else:
+			memory = '{0} KB'.format( result[ 'memory' ] ) if result[ 'memory' ] else 'unknown'
+			print( '{0:<26} {1:9.3f} s   peak memory {2}'.format( name, result[ 'seconds' ], memory ) )
+		sys.stdout.flush()
+
+	if options.save:
+		with open( options.save, 'w' ) as f:
+			json.dump( { 'scale' : options.scale, 'results' : results }, f, indent = 2, sort_keys = True )
+	regressions = 0
+	if options.baseline:
+		with open( options.baseline ) as f:
+			baseline = json.load( f )
+		if baseline.get( 'scale' ) != options.scale:
+			print( 'warning: the baseline was measured with scale {0}'.format( baseline.get( 'scale' ) ) )
+		print( '\nCompared to {0}:'.format( options.baseline ) )
+		for name, timeRatio, memoryRatio, regressed in runner.compare( results, baseline[ 'results' ], options.tolerance ):
+			memory = '{0:6.2f}x'.format( memoryRatio ) if memoryRatio else '     -'
+			print( '{0:<26} time {1:6.2f}x   memory {2}{3}'.format( name, timeRatio, memory, '   REGRESSION' if regressed else '' ) )
+			regressions += 1 if regressed else 0
+	return 1 if regressions else 0
+
+if __name__ == "__main__":
+	sys.exit( main() )
@@ -0,0 +1,107 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Plugin import Plugin
+from core.actions.Action import Action
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.RunCommand import RunCommand
+from core.helpers.XmlReport import InstructionsXmlReport
+from core.helpers.XmlReportConverter import XmlReportConverter
+from mom.benchmarks.Benchmark import Benchmark
+import os
+import sys
+
+class _NoOpAction( Action ):
+	'''An action that does nothing, except reporting the specified output.'''
+
+	def __init__( self, output = None ):
+		Action.__init__( self )
+		self.__output = output
+
+	def getLogDescription( self ):
+		return 'no-op'
+
+	def run( self ):
+		self._setStdOut( self.__output )
+		return 0
+
+class _SyntheticStepsPlugin( Plugin ):
+	'''Adds synthetic actions to the build steps of the configuration it is attached to.'''
+
+	def __init__( self, noOpActions, shellCommands, output = None ):
+		Plugin.__init__( self )
+		self.__noOpActions = noOpActions
+		self.__shellCommands = shellCommands
+		self.__output = output
+
+	def setup( self ):
+		for stepName in [ 'configure', 'build', 'test', 'install' ]:
+			step = self.getInstructions().getStep( stepName )
+			for _ in range( self.__noOpActions ):
+				step.addMainAction( _NoOpAction( self.__output ) )
+			for _ in range( self.__shellCommands ):
+				step.addMainAction( ShellCommandAction( [ sys.executable, '-c', 'pass' ] ) )
+
+def _addSyntheticSteps( build, noOpActions, shellCommands, output = None ):
+	for environments in build.getProject().getChildren():
+		for configuration in environments.getChildren():
+			configuration.addPlugin( _SyntheticStepsPlugin( noOpActions, shellCommands, output ) )
+
+class ConfigurationsBenchmark( Benchmark ):
+	'''Build many configurations with many no-op actions and a few shell commands per step.'''
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self.__build = self._createBuild( self.getName(), configurations = self._scaled( 10 ) )
+		_addSyntheticSteps( self.__build, noOpActions = 50, shellCommands = 1 )
+
+	def run( self ):
+		self.__build.buildAndReturn()
+		assert self.__build.getReturnCode() == 0
+
+class CommandOutputBenchmark( Benchmark ):
+	'''Run commands that produce a lot of output, once captured in memory and once written to a step log file.'''
+
+	SCRIPT = 'import sys\nline = "x" * 99 + "\\n"\nfor _ in range( {0} ): sys.stdout.write( line )\n'
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self._createBuild( self.getName() )
+		self.__command = [ sys.executable, '-c', self.SCRIPT.format( self._scaled( 200000 ) ) ]
+
+	def run( self ):
+		runner = RunCommand( self.__command )
+		runner.run()
+		assert runner.getReturnCode() == 0
+		action = ShellCommandAction( self.__command )
+		assert action.executeAction( os.path.join( self.getDirectory(), 'output.log' ) ) == 0
+
+class XmlReportBenchmark( Benchmark ):
+	'''Create the XML report of a build with many configurations and actions with output, and convert it to text.'''
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self.__build = self._createBuild( self.getName(), configurations = self._scaled( 20 ) )
+		_addSyntheticSteps( self.__build, noOpActions = 25, shellCommands = 0, output = 'output line\n' * 100 )
+		self.__build.buildAndReturn()
+		assert self.__build.getReturnCode() == 0
+
+	def run( self ):
+		report = InstructionsXmlReport( self.__build )
+		XmlReportConverter( report ).convertToText()
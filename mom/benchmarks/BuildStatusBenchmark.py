@@ -0,0 +1,59 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from buildcontrol.common.BuildInfo import BuildInfo
+from buildcontrol.common.BuildStatus import BuildStatus
+from mom.benchmarks.Benchmark import Benchmark
+import os
+
+class BuildStatusBenchmark( Benchmark ):
+	'''Query and claim builds in a SimpleCI build status database with many rows.'''
+
+	BuildNames = 50
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self._createBuild( self.getName() )
+		self.__status = BuildStatus()
+		self.__status.setDatabaseFilename( os.path.join( self.getDirectory(), 'buildstatus.sqlite' ) )
+		buildInfos = []
+		for index in range( self._scaled( 20000 ) ):
+			buildInfo = BuildInfo()
+			buildInfo.setProjectName( 'build-{0}'.format( index % self.BuildNames ) )
+			# most rows are the history of completed builds:
+			buildInfo.setBuildStatus( BuildInfo.Status.NewRevision if index % 10 == 0 else BuildInfo.Status.Completed )
+			buildInfo.setPriority( index % 3 )
+			buildInfo.setBuildType( 'c' )
+			buildInfo.setRevision( str( index ) )
+			buildInfo.setUrl( 'git://example.com/project-{0}.git'.format( index % self.BuildNames ) )
+			buildInfo.setBuildScript( 'build-{0}.py'.format( index % self.BuildNames ) )
+			buildInfos.append( buildInfo )
+		self.__status.saveBuildInfo( buildInfos )
+
+	def run( self ):
+		status = self.__status
+		assert status.loadBuildInfo( BuildInfo.Status.NewRevision )
+		buildNames = [ 'build-{0}'.format( index ) for index in range( 0, self.BuildNames, 5 ) ]
+		for _ in range( 200 ):
+			with status.getConnection() as connection:
+				buildInfo = status._claimBuildInfo( connection, buildNames, 'benchmark', 60 )
+			if not buildInfo:
+				break
+			buildInfo.setBuildStatus( BuildInfo.Status.Completed )
+			status.updateBuildInfo( buildInfo )
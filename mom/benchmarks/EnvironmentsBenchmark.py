@@ -0,0 +1,95 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.environments.Environment import Environment
+from core.environments.Environments import Environments
+from core.helpers.PathResolver import PathResolver
+from mom.benchmarks.Benchmark import Benchmark
+import os
+
+def create_environments_tree( directory, categories, levels, versions, packages = ( 'dep-a-1', 'dep-b-2' ) ):
+	'''Create a synthetic MomEnvironments tree in directory, and return the number of created packages.
+	Every category is a chain of nested installation folders (levels deep). Every installation folder contains the 
+	specified number of versions of each package, named like dep-a-1.<version>.0, with the version as the score.'''
+	count = 0
+	for category in range( categories ):
+		folder = os.path.join( directory, 'category-{0}'.format( category ) )
+		for level in range( levels ):
+			folder = os.path.join( folder, 'level-{0}'.format( level ) )
+			for package in packages:
+				for version in range( versions ):
+					packageFolder = os.path.join( folder, '{0}.{1}.0'.format( package, version ) )
+					os.makedirs( packageFolder )
+					with open( os.path.join( packageFolder, 'MOM_PACKAGE_CONFIGURATION' ), 'w' ) as f:
+						f.write( 'MOM_PACKAGE_ENABLED true\n' )
+						f.write( 'MOM_PACKAGE_SCORE {0}\n'.format( version ) )
+						f.write( 'MOM_PACKAGE_DESCRIPTION {0}.{1}.0 in category {2}\n'.format( package, version, category ) )
+					count += 1
+	return count
+
+class EnvironmentsBenchmark( Benchmark ):
+	'''Find the matching environments for two dependencies in a large MomEnvironments tree.'''
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		build = self._createBuild( self.getName() )
+		root = os.path.join( self.getDirectory(), 'environments' )
+		create_environments_tree( root, categories = self._scaled( 8 ), levels = 3, versions = 8 )
+		build.getSettings().set( Settings.EnvironmentsBaseDir, root )
+		self.__environments = Environments( [ 'dep-a-1.*', 'dep-b-2.*' ], 'Benchmark dependencies', build.getProject() )
+
+	def run( self ):
+		assert self.__environments.findMatchingEnvironments()
+
+class BestScoringEnvironmentBenchmark( Benchmark ):
+	'''Find the best scoring environment for six dependencies, where enumerating all matches would be infeasible.'''
+
+	Packages = ( 'dep-a-1', 'dep-b-2', 'dep-c-3', 'dep-d-4', 'dep-e-5', 'dep-f-6' )
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		build = self._createBuild( self.getName() )
+		root = os.path.join( self.getDirectory(), 'environments' )
+		create_environments_tree( root, categories = self._scaled( 4 ), levels = 4, versions = 6, packages = self.Packages )
+		build.getSettings().set( Settings.EnvironmentsBaseDir, root )
+		dependencies = [ '{0}.*'.format( package ) for package in self.Packages ]
+		self.__environments = Environments( dependencies, 'Benchmark dependencies', build.getProject() )
+
+	def run( self ):
+		assert self.__environments.findBestScoringEnvironment()
+
+class EnvironmentExpansionBenchmark( Benchmark ):
+	'''Clone many configurations with plug-ins into many matched environments.'''
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		build = self._createBuild( self.getName(), configurations = 20 )
+		self.__environments = build.getProject().getChildren()[0]
+		for configuration in self.__environments.getChildren():
+			for index in range( 5 ):
+				plugin = Plugin( 'Plugin-{0}'.format( index ) )
+				plugin._setCommandArguments( [ PathResolver( build.getProject().getSourceDir, 'argument' ) ] )
+				configuration.addPlugin( plugin )
+
+	def run( self ):
+		configurations = self.__environments.getChildren()[:]
+		for _ in range( self._scaled( 100 ) ):
+			Environment( parent = self.__environments ).cloneConfigurations( configurations )
@@ -0,0 +1,64 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.actions.filesystem.DirectoryTreeCopyAction import DirectoryTreeCopyAction
+from core.actions.filesystem.RmDirAction import RmDirAction
+from core.helpers.SafeDeleteTree import get_tree_deleter
+from mom.benchmarks.Benchmark import Benchmark
+import os
+
+def create_source_tree( directory, directories, filesPerDirectory, fileSize = 4096 ):
+	'''Create a synthetic source tree with the specified number of directories and files.'''
+	content = 'x' * fileSize
+	for index in range( directories ):
+		path = os.path.join( directory, 'module-{0}'.format( index % 10 ), 'dir-{0}'.format( index ) )
+		os.makedirs( path )
+		for fileIndex in range( filesPerDirectory ):
+			with open( os.path.join( path, 'file-{0}.cpp'.format( fileIndex ) ), 'w' ) as f:
+				f.write( content )
+
+class TreeCopyBenchmark( Benchmark ):
+	'''Copy a source tree like an in-source build does, with the default tree copy settings.'''
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self._createBuild( self.getName() )
+		self.__source = os.path.join( self.getDirectory(), 'src' )
+		create_source_tree( self.__source, self._scaled( 200 ), 25 )
+
+	def run( self ):
+		action = DirectoryTreeCopyAction( self.__source, os.path.join( self.getDirectory(), 'build' ), [ '.git' ] )
+		assert action.run() == 0
+
+class TreeDeleteBenchmark( Benchmark ):
+	'''Delete a build tree like the cleanup step does. Only the time the build waits for the deletion is measured.'''
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self._createBuild( self.getName() )
+		self.__tree = os.path.join( self.getDirectory(), 'build' )
+		create_source_tree( self.__tree, self._scaled( 200 ), 25 )
+
+	def run( self ):
+		action = RmDirAction( self.__tree )
+		assert action.run() == 0
+
+	def tearDown( self ):
+		get_tree_deleter().drain()
+		Benchmark.tearDown( self )
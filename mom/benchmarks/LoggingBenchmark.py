@@ -0,0 +1,74 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Settings import Settings
+from core.loggers.ConsoleLogger import ConsoleLogger
+from mom.benchmarks.Benchmark import Benchmark
+import optparse
+import timeit
+
+class LoggingBenchmark( Benchmark ):
+	'''LoggingBenchmark measures the cost of debug messages that are discarded because of the log level, which is the 
+	common case in builds. The messages mimic RunCommand logging the complete output of a command at level 5.'''
+
+	def __init__( self, scale = 1, outputSize = 64 * 1024 ):
+		Benchmark.__init__( self, scale )
+		self.__output = ( 'x' * 79 + '\n' ) * ( outputSize / 80 )
+
+	def getIterations( self ):
+		return self._scaled( 20000 )
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self.__build = self._createBuild( self.getName() )
+		self.__build.addLogger( ConsoleLogger() )
+		self.__build.getSettings().set( Settings.ScriptLogLevel, 0 )
+
+	def run( self ):
+		build = self.__build
+		output = self.__output
+		for _ in range( self.getIterations() ):
+			build.debugN( build, 5, u'command completed' )
+			build.debugN( build, 5, u'STDOUT:\n{0}', output )
+
+	def __measure( self, function ):
+		return min( timeit.repeat( function, number = self.getIterations(), repeat = 3 ) ) / self.getIterations()
+
+	def measure( self ):
+		'''Return a list of ( description, seconds per call ) tuples for the different ways to log a message.'''
+		build = self.__build
+		output = self.__output
+		return [
+			( 'constant message', self.__measure( lambda: build.debugN( build, 5, u'command completed' ) ) ),
+			( 'eager formatting', self.__measure( lambda: build.debugN( build, 5, u'STDOUT:\n{0}'.format( output ) ) ) ),
+			( 'format arguments', self.__measure( lambda: build.debugN( build, 5, u'STDOUT:\n{0}', output ) ) ),
+			( 'callable', self.__measure( lambda: build.debugN( build, 5, lambda: u'STDOUT:\n{0}'.format( output ) ) ) ) ]
+
+if __name__ == "__main__":
+	parser = optparse.OptionParser( description = 'Measure the cost of discarded debug messages.' )
+	parser.add_option( '-s', '--scale', type = 'float', default = 1.0, help = 'scale factor for the number of messages' )
+	parser.add_option( '-b', '--bytes', type = 'int', default = 64 * 1024, help = 'size of the logged output in bytes' )
+	options, _ = parser.parse_args()
+	benchmark = LoggingBenchmark( options.scale, options.bytes )
+	benchmark.setUp()
+	try:
+		for description, seconds in benchmark.measure():
+			print( '{0:<20} {1:10.3f} microseconds per message'.format( description, seconds * 1000000 ) )
+	finally:
+		benchmark.tearDown()
@@ -0,0 +1,92 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.plugins.sourcecode.SCMGit import SCMGit
+from core.plugins.sourcecode.SCMSubversion import SCMSubversion
+from distutils.spawn import find_executable
+from mom.benchmarks.Benchmark import Benchmark
+from subprocess import Popen, PIPE, check_call, check_output
+import os
+import urllib
+
+class GitBenchmark( Benchmark ):
+	'''Clone a local git repository with many commits into the clone army, and query the revisions since the first commit.'''
+
+	def getUnavailableReason( self ):
+		if not find_executable( 'git' ):
+			return 'git is not installed'
+		return None
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self._createBuild( self.getName() )
+		repository = os.path.join( self.getDirectory(), 'repository' )
+		check_call( [ 'git', 'init', '-q', repository ] )
+		# fast-import creates the history much faster than individual commits:
+		commands = []
+		for index in range( self._scaled( 2000 ) ):
+			content = 'revision {0}\n'.format( index )
+			commands.append( 'commit refs/heads/master\ncommitter mom <mom@example.com> {0} +0000\ndata 9\nrevision\n'
+				.format( 1300000000 + index ) )
+			commands.append( 'M 644 inline file.txt\ndata {0}\n{1}\n'.format( len( content ), content ) )
+		process = Popen( [ 'git', 'fast-import', '--quiet' ], stdin = PIPE, cwd = repository )
+		process.communicate( ''.join( commands ) )
+		assert process.returncode == 0
+		check_call( [ 'git', 'checkout', '-q', 'master' ], cwd = repository )
+		self.__firstRevision = check_output( [ 'git', 'rev-list', '--max-parents=0', 'HEAD' ], cwd = repository ).strip()
+		self.__scm = SCMGit()
+		self.__scm.setUrl( repository )
+		self.__scm.setCloneArmyDir( os.path.join( self.getDirectory(), 'clonearmy' ) )
+		self.__scm.setCachedCheckoutsDir( os.path.join( self.getDirectory(), 'checkouts' ) )
+
+	def run( self ):
+		assert self.__scm._getCurrentRevision()
+		assert self.__scm.printRevisionsSince( [ self.__firstRevision ] )
+
+class SubversionBenchmark( Benchmark ):
+	'''Query the revisions of a local Subversion repository with many revisions.'''
+
+	def getUnavailableReason( self ):
+		for command in [ 'svn', 'svnadmin' ]:
+			if not find_executable( command ):
+				return '{0} is not installed'.format( command )
+		return None
+
+	def setUp( self ):
+		Benchmark.setUp( self )
+		self._createBuild( self.getName() )
+		repository = os.path.join( self.getDirectory(), 'repository' )
+		check_call( [ 'svnadmin', 'create', repository ] )
+		url = 'file://' + urllib.pathname2url( repository )
+		workingCopy = os.path.join( self.getDirectory(), 'workingcopy' )
+		check_call( [ 'svn', 'checkout', '-q', url, workingCopy ] )
+		fileName = os.path.join( workingCopy, 'file.txt' )
+		for index in range( self._scaled( 200 ) ):
+			with open( fileName, 'w' ) as f:
+				f.write( 'revision {0}\n'.format( index ) )
+			if index == 0:
+				check_call( [ 'svn', 'add', '-q', fileName ] )
+			check_call( [ 'svn', 'commit', '-q', '-m', 'revision {0}'.format( index ), workingCopy ] )
+		self.__scm = SCMSubversion()
+		self.__scm.setUrl( url )
+		self.__scm.setCache( None ) # measure svn, not the persistent cache
+
+	def run( self ):
+		assert self.__scm._getCurrentRevision()
+		assert self.__scm.printRevisionsSince( [ '1' ] )
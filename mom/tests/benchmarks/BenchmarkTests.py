@@ -0,0 +1,55 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from mom.benchmarks.BenchmarkRunner import BENCHMARKS, BenchmarkRunner
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import unittest
+
+class BenchmarkTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self, False )
+
+	def testBenchmarksRun( self ):
+		'''Execute every available benchmark with a tiny input, to make sure the benchmark suite does not rot.'''
+		cwd = os.getcwd()
+		for benchmarkClass in BENCHMARKS:
+			benchmark = benchmarkClass( 0.01 )
+			if benchmark.getUnavailableReason():
+				continue
+			benchmark.setUp()
+			directory = benchmark.getDirectory()
+			try:
+				benchmark.run()
+			finally:
+				benchmark.tearDown()
+			self.assertFalse( os.path.exists( directory ) )
+			self.assertEqual( os.getcwd(), cwd )
+
+	def testCompare( self ):
+		baseline = { 'A' : { 'seconds' : 1.0, 'memory' : 1000 }, 'B' : { 'seconds' : 2.0, 'memory' : 1000 },
+			'C' : { 'skipped' : 'not installed' } }
+		results = { 'A' : { 'seconds' : 1.1, 'memory' : 1500 }, 'B' : { 'seconds' : 1.0, 'memory' : None },
+			'C' : { 'seconds' : 1.0, 'memory' : 1000 }, 'D' : { 'seconds' : 1.0, 'memory' : 1000 } }
+		comparison = BenchmarkRunner.compare( results, baseline, 0.2 )
+		self.assertEqual( comparison, [ ( 'A', 1.1, 1.5, True ), ( 'B', 0.5, None, False ) ] )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -17,6 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+from buildcontrol.common.BuildScriptCache import BuildScriptCache
 from buildcontrol.common.BuildScriptInterface import BuildScriptInterface
 from core.Exceptions import MomError
 from core.Settings import Settings
@@ -24,6 +25,9 @@ from core.helpers.GlobalMApp import mApp
 from core.helpers.SafeDeleteTree import rmtree
 from mom.tests.helpers.MomTestCase import MomTestCase
 import os
+import shutil
+import tempfile
+import time
 import unittest
 
 class BuildScriptInterfaceTests( MomTestCase ):
@@ -44,6 +48,27 @@ class BuildScriptInterfaceTests( MomTestCase ):
 		variable = self.iface.querySetting( Settings.MomVersionNumber )
 		self.assertEquals( variable, mApp().getSettings().get( Settings.MomVersionNumber ) )
 
+	def testQueryBatch( self ):
+		directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		try:
+			cache = BuildScriptCache( os.path.join( directory, 'cache.json' ) )
+			iface = BuildScriptInterface( BuildScriptInterfaceTests.BuildScriptName, cache = cache )
+			result = iface.queryBatch( [ Settings.ScriptBuildName, Settings.MomVersionNumber ] )
+			self.assertEquals( result[ 'settings' ][ Settings.MomVersionNumber ],
+				mApp().getSettings().get( Settings.MomVersionNumber ) )
+			self.assertEquals( result[ 'settings' ][ Settings.ScriptBuildName ], self.iface.querySetting( Settings.ScriptBuildName ) )
+			self.assertTrue( 'current-revision' not in result )
+			# the results are cached for the individual queries:
+			self.assertEquals( cache.get( BuildScriptInterfaceTests.BuildScriptName, 'query {0}'.format( Settings.ScriptBuildName ) ),
+				result[ 'settings' ][ Settings.ScriptBuildName ] )
+			self.assertRaises( MomError, iface.queryBatch, [ 'no.such.setting' ] )
+		finally:
+			shutil.rmtree( directory )
+
+	def testQueryBatchSyntaxError( self ):
+		iface = BuildScriptInterface( BuildScriptInterfaceTests.SyntaxErrorBuildScriptName )
+		self.assertRaises( MomError, iface.queryBatch, [ Settings.ScriptBuildName ] )
+
 	def testPrintCurrentRevision( self ):
 		variable = self.iface.queryCurrentRevision()
 		self.assertTrue( variable )
@@ -80,5 +105,54 @@ class BuildScriptInterfaceTests( MomTestCase ):
 		except MomError:
 			pass
 
+	def _writeCountingBuildScript( self, directory, value ):
+		'''Write a build script that answers every query with value, and counts how often it is executed.'''
+		script = os.path.join( directory, 'counting_buildscript.py' )
+		with open( script, 'w' ) as f:
+			f.write( 'import sys\n' )
+			f.write( 'open( sys.argv[0] + ".count", "a" ).write( "x" )\n' )
+			f.write( 'print( "setting: {0}" )\n'.format( value ) )
+		return script
+
+	def _getExecutionCount( self, script ):
+		with open( script + '.count' ) as f:
+			return len( f.read() )
+
+	def testCachedQueries( self ):
+		directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		try:
+			cacheFile = os.path.join( directory, 'cache.json' )
+			script = self._writeCountingBuildScript( directory, 'first' )
+			iface = BuildScriptInterface( script, cache = BuildScriptCache( cacheFile ) )
+			self.assertEquals( iface.querySetting( Settings.ScriptBuildName ), 'first' )
+			self.assertEquals( iface.querySetting( Settings.ScriptBuildName ), 'first' )
+			self.assertEquals( self._getExecutionCount( script ), 1 )
+			# the cache is persistent:
+			iface = BuildScriptInterface( script, cache = BuildScriptCache( cacheFile ) )
+			self.assertEquals( iface.querySetting( Settings.ScriptBuildName ), 'first' )
+			self.assertEquals( self._getExecutionCount( script ), 1 )
+			# changing the build script invalidates the cache:
+			time.sleep( 0.01 )
+			self._writeCountingBuildScript( directory, 'second' )
+			self.assertEquals( iface.querySetting( Settings.ScriptBuildName ), 'second' )
+			self.assertEquals( self._getExecutionCount( script ), 2 )
+		finally:
+			shutil.rmtree( directory )
+
+	def testRevisionCacheLifetime( self ):
+		directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		try:
+			script = self._writeCountingBuildScript( directory, 'revision' )
+			iface = BuildScriptInterface( script, cache = BuildScriptCache( os.path.join( directory, 'cache.json' ) ) )
+			mApp().getSettings().set( Settings.SimpleCIRevisionCacheLifetime, 3600 )
+			iface.queryCurrentRevision()
+			iface.queryCurrentRevision()
+			self.assertEquals( self._getExecutionCount( script ), 1 )
+			mApp().getSettings().set( Settings.SimpleCIRevisionCacheLifetime, -1 )
+			iface.queryCurrentRevision()
+			self.assertEquals( self._getExecutionCount( script ), 2 )
+		finally:
+			shutil.rmtree( directory )
+
 if __name__ == "__main__":
 	unittest.main()
@@ -21,9 +21,12 @@ from buildcontrol.common.BuildInfo import BuildInfo
 from buildcontrol.common.BuildStatus import BuildStatus
 from tempfile import NamedTemporaryFile
 from mom.tests.helpers.MomTestCase import MomTestCase
+from core.helpers.WorkerPool import WorkerPool
 import os
 import random
+import sqlite3
 import string
+import time
 import unittest
 
 class BuildStatusPersistenceTests( MomTestCase ):
@@ -53,6 +56,106 @@ class BuildStatusPersistenceTests( MomTestCase ):
 		self.assertEqual( revs[0].__dict__, info.__dict__ )
 		os.remove( filename )
 
+	def _makeBuildStatus( self, count ):
+		status = BuildStatus()
+		status.setDatabaseFilename( NamedTemporaryFile( suffix = '.sqlite' ).name )
+		infos = []
+		for index in range( count ):
+			info = BuildInfo()
+			info.setProjectName( 'project' )
+			info.setPriority( index )
+			info.setBuildStatus( BuildInfo.Status.NewRevision )
+			info.setRevision( str( index ) )
+			infos.append( info )
+		status.saveBuildInfo( infos )
+		return status
+
+	def testClaimBuildInfo( self ):
+		status = self._makeBuildStatus( 2 )
+		with status.getConnection() as connection:
+			first = status._claimBuildInfo( connection, [ 'project' ], 'A', 60 )
+			second = status._claimBuildInfo( connection, [ 'project' ], 'B', 60 )
+			self.assertEqual( first.getRevision(), '1' ) # the highest priority is built first
+			self.assertEqual( second.getRevision(), '0' )
+			self.assertEqual( status._claimBuildInfo( connection, [ 'project' ], 'C', 60 ), None )
+			self.assertEqual( status._claimBuildInfo( connection, [ 'other' ], 'C', 60 ), None )
+		# A crashed, its lease expires:
+		with status.getConnection() as connection:
+			connection.execute( 'update {0} set lease_expiry=? where id=?'.format( BuildStatus.TableName ),
+				[ time.time() - 1, first.getBuildId() ] )
+		with status.getConnection() as connection:
+			taken = status._claimBuildInfo( connection, [ 'project' ], 'C', 60 )
+			self.assertEqual( taken.getBuildId(), first.getBuildId() )
+			# B finishes its build, renewing and releasing a lease only works for the owner:
+			status._releaseBuildInfo( connection, second, 'A' )
+			self.assertEqual( len( status._loadBuildInfo( connection, BuildInfo.Status.Completed ) ), 0 )
+			status._releaseBuildInfo( connection, second, 'B' )
+			self.assertEqual( len( status._loadBuildInfo( connection, BuildInfo.Status.Completed ) ), 1 )
+		os.remove( status.getDatabaseFilename() )
+
+	def testConcurrentClaims( self ):
+		status = self._makeBuildStatus( 40 )
+
+		def claimAll( owner ):
+			claimed = []
+			while True:
+				with status.getConnection() as connection:
+					buildInfo = status._claimBuildInfo( connection, [ 'project' ], owner, 60 )
+				if not buildInfo:
+					return claimed
+				claimed.append( buildInfo.getBuildId() )
+
+		jobs = [ lambda owner = owner: claimAll( owner ) for owner in 'ABCD' ]
+		claimed = sum( WorkerPool( 4 ).run( jobs ), [] )
+		self.assertEqual( sorted( claimed ), range( 1, 41 ) )
+		os.remove( status.getDatabaseFilename() )
+
+	def testDatabaseWithoutLeaseColumns( self ):
+		filename = NamedTemporaryFile( suffix = '.sqlite' ).name
+		connection = sqlite3.connect( filename )
+		connection.execute( '''CREATE TABLE {0} ( id INTEGER PRIMARY KEY AUTOINCREMENT, build_name text, status int,
+priority int, type text, revision text, url text, branch text, tag text, script text )'''.format( BuildStatus.TableName ) )
+		connection.commit()
+		connection.close()
+		status = BuildStatus()
+		status.setDatabaseFilename( filename )
+		with status.getConnection() as connection:
+			self.assertEqual( status._claimBuildInfo( connection, [ 'project' ], 'A', 60 ), None )
+		os.remove( filename )
+
+	def testSchemaUpgrade( self ):
+		filename = NamedTemporaryFile( suffix = '.sqlite' ).name
+		connection = sqlite3.connect( filename )
+		connection.execute( '''CREATE TABLE {0} ( id INTEGER PRIMARY KEY AUTOINCREMENT, build_name text, status int,
+priority int, type text, revision text, url text, branch text, tag text, script text )'''.format( BuildStatus.TableName ) )
+		connection.execute( 'insert into {0} ( build_name, status, priority, revision ) values ( ?, ?, ?, ? )'
+			.format( BuildStatus.TableName ), [ 'project', BuildInfo.Status.NewRevision, 0, 'abcdef' ] )
+		connection.commit()
+		connection.close()
+		status = BuildStatus()
+		status.setDatabaseFilename( filename )
+		connection = status.getConnection()
+		self.assertEqual( connection.execute( 'PRAGMA journal_mode' ).fetchone()[0], 'wal' )
+		self.assertEqual( connection.execute( 'select version from {0}'.format( BuildStatus.SchemaVersionTableName ) ).fetchall(),
+			[ ( BuildStatus.SchemaVersion, ) ] )
+		indexes = [ row[1] for row in connection.execute( 'PRAGMA index_list({0})'.format( BuildStatus.TableName ) ) ]
+		self.assertTrue( 'build_status_status_priority' in indexes )
+		self.assertTrue( 'build_status_build_name_revision' in indexes )
+		self.assertEqual( [ info.getRevision() for info in status.loadBuildInfo() ], [ 'abcdef' ] )
+		# the claim query uses the status index instead of scanning the table:
+		plan = ' '.join( str( row ) for row in connection.execute( '''EXPLAIN QUERY PLAN select * from {0}
+where status=? order by priority desc'''.format( BuildStatus.TableName ), [ BuildInfo.Status.NewRevision ] ) )
+		self.assertTrue( 'build_status_status_priority' in plan )
+		os.remove( filename )
+
+	def testConnectionPerThread( self ):
+		status = self._makeBuildStatus( 1 )
+		connection = status.getConnection()
+		self.assertTrue( status.getConnection() is connection )
+		other = WorkerPool( 1 ).run( [ status.getConnection ] )[0]
+		self.assertFalse( other is connection )
+		os.remove( status.getDatabaseFilename() )
+
 	def testParsingPrintableRepresentation( self ):
 		info = BuildInfo()
 		info.setBuildType( self._randomString() )
@@ -0,0 +1,133 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from buildcontrol.simple_ci.Scheduler import Scheduler
+from core.helpers.SafeDeleteTree import rmtree
+from mom.tests.helpers.MomTestCase import MomTestCase
+from mom.tests.helpers.TestUtils import replace_bound_method
+import os
+import tempfile
+import time
+import unittest
+
+class SchedulerTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.addCleanup( rmtree, self.directory )
+		self.triggerDir = os.path.join( self.directory, 'triggers' )
+		self.controlDir = os.path.join( self.directory, 'control' )
+		os.makedirs( self.controlDir )
+		self.buildScripts = [ os.path.join( self.controlDir, name ) for name in ( 'first.py', 'second.py' ) ]
+		for buildScript in self.buildScripts:
+			open( buildScript, 'w' ).close()
+
+	def _createScheduler( self, **kwargs ):
+		scheduler = Scheduler( self.triggerDir, self.controlDir, idleInterval = 300, pollInterval = 0.05, minimumBackoff = 60,
+			maximumBackoff = 600, **kwargs )
+		self.addCleanup( scheduler.close )
+		scheduler.setBuildScripts( self.buildScripts )
+		return scheduler
+
+	def _setTime( self, scheduler, now ):
+		def _getTime( self ):
+			return now
+		replace_bound_method( scheduler, scheduler._getTime, _getTime )
+
+	def _processAll( self, scheduler ):
+		'''Process all build scripts successfully, so that none is due until the idle interval passed.'''
+		self.assertEqual( scheduler.getDueBuildScripts(), self.buildScripts )
+		for buildScript in self.buildScripts:
+			scheduler.recordSuccess( buildScript )
+		self.assertEqual( scheduler.getDueBuildScripts(), [] )
+
+	def testBackoffPerBuildScript( self ):
+		scheduler = self._createScheduler()
+		first, second = self.buildScripts
+		self._setTime( scheduler, 1000 )
+		delays = [ scheduler.recordFailure( first ) for _ in range( 6 ) ]
+		self.assertEqual( delays, [ 60, 120, 240, 480, 600, 600 ] )
+		scheduler.recordSuccess( second )
+		self._setTime( scheduler, 1300 )
+		self.assertEqual( scheduler.getDueBuildScripts(), [ second ] )
+		# triggers do not shorten the backoff of a failing build script:
+		scheduler.trigger()
+		self.assertEqual( scheduler.getDueBuildScripts(), [ second ] )
+		self._setTime( scheduler, 1600 )
+		self.assertEqual( scheduler.getDueBuildScripts(), self.buildScripts )
+		scheduler.recordSuccess( first )
+		self.assertEqual( scheduler.getFailures( first ), 0 )
+		self.assertEqual( scheduler.recordFailure( first ), 60 )
+
+	def testMoreWorkIsDueImmediately( self ):
+		scheduler = self._createScheduler()
+		first, second = self.buildScripts
+		scheduler.recordSuccess( first, moreWork = True )
+		scheduler.recordSuccess( second )
+		self.assertEqual( scheduler.getDueBuildScripts(), [ first ] )
+		self.assertEqual( scheduler.getSecondsUntilDue(), 0 )
+
+	def testTriggerFile( self ):
+		scheduler = self._createScheduler()
+		self._processAll( scheduler )
+		triggerFile = os.path.join( self.triggerDir, 'second.trigger' )
+		open( triggerFile, 'w' ).close()
+		started = time.time()
+		self.assertFalse( scheduler.wait( 30 ) )
+		self.assertTrue( time.time() - started < 10 )
+		self.assertEqual( scheduler.getDueBuildScripts(), [ self.buildScripts[1] ] )
+		self.assertTrue( scheduler.isTriggered( self.buildScripts[1] ) )
+		self.assertFalse( os.path.exists( triggerFile ) )
+
+	def testTriggerFifo( self ):
+		if not hasattr( os, 'mkfifo' ):
+			return # FIFOs are not supported on this platform
+		scheduler = self._createScheduler()
+		self._processAll( scheduler )
+		fifo = os.open( os.path.join( self.triggerDir, Scheduler.FifoName ), os.O_WRONLY | os.O_NONBLOCK )
+		try:
+			os.write( fifo, 'first\n' )
+		finally:
+			os.close( fifo )
+		self.assertFalse( scheduler.wait( 30 ) )
+		self.assertEqual( scheduler.getDueBuildScripts(), [ self.buildScripts[0] ] )
+		# the FIFO is opened again after the writer closed it:
+		self.assertFalse( scheduler.wait( 0.2 ) )
+		fifo = os.open( os.path.join( self.triggerDir, Scheduler.FifoName ), os.O_WRONLY | os.O_NONBLOCK )
+		os.close( fifo )
+
+	def testControlDirChange( self ):
+		scheduler = self._createScheduler( useFifo = False )
+		self._processAll( scheduler )
+		self.assertFalse( scheduler.wait( 0.1 ) )
+		open( os.path.join( self.controlDir, 'third.py' ), 'w' ).close()
+		self.assertTrue( scheduler.wait( 30 ) )
+		self.assertEqual( scheduler.getDueBuildScripts(), self.buildScripts )
+
+	def testWaitTimesOut( self ):
+		scheduler = self._createScheduler()
+		self._processAll( scheduler )
+		started = time.time()
+		self.assertFalse( scheduler.wait( 0.3 ) )
+		self.assertTrue( time.time() - started >= 0.3 )
+		self.assertEqual( scheduler.getDueBuildScripts(), [] )
+
+if __name__ == "__main__":
+	unittest.main()
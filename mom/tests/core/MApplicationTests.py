@@ -18,6 +18,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from core.Exceptions import MomError
+from core.loggers.ConsoleLogger import ConsoleLogger
+from core.Settings import Settings
 from mom.tests.helpers.CrashMePlugin import CrashMePlugin
 from mom.tests.helpers.MomTestCase import MomTestCase
 from mom.tests.helpers.TestUtils import replace_bound_method
@@ -39,6 +41,36 @@ class MApplicationTests( MomTestCase ):
 		build.buildAndReturn()
 		self.assertTrue( build.getException()[0].getPhase() == Instructions.Phase.Setup )
 
+	def testLazyLogging( self ):
+		build = self.build
+		messages = []
+		logger = ConsoleLogger()
+		logger._write = messages.append
+		build.addLogger( logger )
+		build.getSettings().set( Settings.ScriptLogLevel, 2 )
+		calls = []
+		def describe():
+			calls.append( True )
+			return 'expensive'
+		build.debugN( build, 3, describe )
+		build.debugN( build, 3, 'formatted {0}', 'never' )
+		self.assertEqual( calls, [] )
+		self.assertFalse( [ message for message in messages if 'never' in message ] )
+		build.debugN( build, 2, describe )
+		build.debugN( build, 2, 'formatted {0} {1}', 'lazily', 42 )
+		self.assertEqual( calls, [ True ] )
+		self.assertTrue( [ message for message in messages if 'expensive' in message ] )
+		self.assertTrue( [ message for message in messages if 'formatted lazily 42' in message ] )
+		# the cached log level follows changes of the setting:
+		build.getSettings().set( Settings.ScriptLogLevel, 3 )
+		build.debugN( build, 3, describe )
+		self.assertEqual( len( calls ), 2 )
+		self.assertRaises( TypeError, build.debug, build, 'text', unknown = True )
+		# a format argument without a replacement field is an error, even if the message is not logged:
+		self.assertRaises( TypeError, build.debugN, build, 5, 'Uploading failed:', 'details' )
+		build.debug( build, 'Uploading failed: {0}', 'details' )
+		self.assertTrue( [ message for message in messages if 'Uploading failed: details' in message ] )
+
 
 if __name__ == "__main__":
 	unittest.main()
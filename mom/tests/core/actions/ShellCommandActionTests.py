@@ -0,0 +1,68 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.Settings import Settings
+from mom.tests.helpers.MomTestCase import MomTestCase
+import codecs
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+class ShellCommandActionTests( MomTestCase ):
+
+	COMMAND = [ sys.executable, '-c', 'import sys; sys.stdout.write( "o" * 1000 ); sys.stderr.write( "e" * 1000 )' ]
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.logFile = os.path.join( self.directory, 'action.log' )
+
+	def tearDown( self ):
+		MomTestCase.tearDown( self )
+		shutil.rmtree( self.directory )
+
+	def _readLog( self ):
+		with codecs.open( self.logFile, 'r', 'utf-8' ) as f:
+			return f.read()
+
+	def testOutputIsWrittenToLog( self ):
+		self.build.getSettings().set( Settings.BuildActionOutputTailSize, 100 )
+		action = ShellCommandAction( ShellCommandActionTests.COMMAND, combineOutput = False )
+		self.assertEquals( action.executeAction( self.logFile ), 0 )
+		log = self._readLog()
+		self.assertEquals( log.count( '*** Log from' ), 1 )
+		self.assertTrue( '=== Standard output ===\n' + 'o' * 1000 + '\n=== Error output ===\n' + 'e' * 1000 in log )
+		self.assertTrue( log.endswith( '*** End of log ***\n\n' ) )
+		# only the tail of the output is kept in memory:
+		self.assertTrue( action.getStdOut().endswith( '\n' + 'o' * 100 ) )
+		self.assertTrue( action.getStdErr().endswith( '\n' + 'e' * 100 ) )
+
+	def testKeepCompleteOutput( self ):
+		self.build.getSettings().set( Settings.BuildActionOutputTailSize, 100 )
+		action = ShellCommandAction( ShellCommandActionTests.COMMAND, combineOutput = False )
+		action.setKeepCompleteOutput( True )
+		self.assertEquals( action.executeAction( self.logFile ), 0 )
+		self.assertEquals( action.getStdOut(), 'o' * 1000 )
+		self.assertEquals( action.getStdErr(), 'e' * 1000 )
+
+if __name__ == "__main__":
+	unittest.main()
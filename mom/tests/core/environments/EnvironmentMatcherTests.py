@@ -0,0 +1,104 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError
+from core.environments.Dependency import Dependency
+from core.environments.EnvironmentMatcher import EnvironmentMatcher
+from core.environments.Environments import Environments
+from core.helpers.SafeDeleteTree import rmtree
+from fnmatch import fnmatch
+from mom.benchmarks.EnvironmentsBenchmark import create_environments_tree
+from mom.tests.helpers.MomTestCase import MomTestCase
+import itertools
+import os
+import tempfile
+import unittest
+
+class EnvironmentMatcherTests( MomTestCase ):
+
+	Dependencies = [ 'dep-a-1.*', 'dep-b-2.*', 'dep-?-*' ]
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.root = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.addCleanup( rmtree, self.root )
+		create_environments_tree( self.root, categories = 2, levels = 3, versions = 2, packages = ( 'dep-a-1', 'dep-b-2', 'dep-c-3' ) )
+		self.installed = {}
+		for dependency in Environments()._findMomDependencies( self.root ):
+			self.installed[ os.path.normpath( os.path.abspath( dependency.getFolder() ) ) ] = dependency
+
+	def _findMatchesExhaustively( self, dependencies, installed = None ):
+		'''Try every combination of packages, the way the matches are defined. Return the matches as tuples of the package 
+		folders, in the order of the dependencies.'''
+		installed = installed or self.installed
+		matches = set()
+		for folder in set( dependency.getContainingFolder() for dependency in installed.values() ):
+			packages = [ path for path in installed if os.path.join( folder, '' ).startswith( os.path.join( os.path.dirname( path ), '' ) ) ]
+			for combination in itertools.permutations( packages, len( dependencies ) ):
+				if all( fnmatch( os.path.basename( path ), pattern ) for path, pattern in zip( combination, dependencies ) ) \
+					and any( os.path.dirname( path ) == folder for path in combination ):
+					matches.add( combination )
+		return matches
+
+	def _folders( self, match ):
+		return frozenset( dependency.getFolder() for dependency in match )
+
+	def testMatchesEqualExhaustiveSearch( self ):
+		matcher = EnvironmentMatcher( self.Dependencies )
+		matches = matcher.findMatches( self.root, self.installed )
+		expected = set( frozenset( match ) for match in self._findMatchesExhaustively( self.Dependencies ) )
+		self.assertEqual( len( matches ), len( expected ) )
+		self.assertEqual( set( self._folders( match ) for match in matches ), expected )
+		for match in matches:
+			for dependency, pattern in zip( match, self.Dependencies ):
+				self.assertTrue( fnmatch( os.path.basename( dependency.getFolder() ), pattern ) )
+
+	def testBestMatchHasTheHighestScores( self ):
+		matcher = EnvironmentMatcher( self.Dependencies )
+		best = matcher.findBestMatch( self.root, self.installed )
+		scores = [ tuple( dependency.getScore() for dependency in match ) for match in matcher.findMatches( self.root, self.installed ) ]
+		self.assertEqual( tuple( dependency.getScore() for dependency in best ), max( scores ) )
+
+	def testBestMatchWithOverlappingPatterns( self ):
+		# a-1 is a candidate for both dependencies, taking it for the first one leaves only a-2 for the second:
+		root = os.path.join( self.root, 'overlapping' )
+		installed = {}
+		for name, score in ( ( 'a-1', 5 ), ( 'b-1', 5 ), ( 'a-2', 1 ) ):
+			folder = os.path.join( root, name )
+			installed[ folder ] = Dependency( folder )
+			installed[ folder ].setScore( score )
+		for dependencies in ( [ '*-1', 'a*' ], [ 'a*', '*-1' ], [ '*', '*', '*' ], [ '*-1', '*', 'a-?' ] ):
+			best = EnvironmentMatcher( dependencies ).findBestMatch( root, installed )
+			expected = max( tuple( installed[ path ].getScore() for path in match )
+				for match in self._findMatchesExhaustively( dependencies, installed ) )
+			self.assertEqual( tuple( dependency.getScore() for dependency in best ), expected )
+
+	def testNoMatches( self ):
+		# a chain of three installation folders contains six versions of every package:
+		self.assertEqual( EnvironmentMatcher( [ 'dep-a-1.*', 'dep-d-*' ] ).findMatches( self.root, self.installed ), [] )
+		self.assertEqual( EnvironmentMatcher( [ 'dep-a-1.*' ] * 7 ).findBestMatch( self.root, self.installed ), None )
+		self.assertEqual( EnvironmentMatcher( [] ).findMatches( self.root, self.installed ), [] )
+
+	def testPackageOutsideOfTheRoot( self ):
+		folder = os.path.join( os.path.dirname( self.root ), 'dep-a-1.0.0' )
+		installed = { folder : Dependency( folder ) }
+		self.assertRaises( MomError, EnvironmentMatcher( [ 'dep-a-1.*' ] ).findMatches, self.root, installed )
+
+if __name__ == "__main__":
+	unittest.main()
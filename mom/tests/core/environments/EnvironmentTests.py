@@ -17,10 +17,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+from core.Plugin import Plugin
+from core.executomat.Step import Step
+from core.plugins.builders.generators.CMakeBuilder import CMakeBuilder
 from core.Settings import Settings
 from core.environments.Dependency import Dependency
+from core.environments.Environment import Environment
 from core.environments.Environments import Environments
 from core.helpers.EnvironmentSaver import EnvironmentSaver
+from core.helpers.ExecutionContext import ExecutionContext
 from core.helpers.GlobalMApp import mApp
 from core.loggers.ConsoleLogger import ConsoleLogger
 from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
@@ -87,6 +92,17 @@ class EnvironmentTests( MomBuildMockupTestCase ):
 			self.assertEquals( os.environ[ 'EXAMPLE_VARIABLE'], 'example_variable' )
 			self.assertTrue( os.environ['PATH'].startswith( 'example_path' ) )
 
+	def testApplyPackageConfigurationToContext( self ):
+		packageFolder = os.path.join( self.TEST_MOM_ENVIRONMENTS, 'dep-a-1.1.0' )
+		dep = Dependency()
+		dep.setFolder( packageFolder )
+		self.assertTrue( dep._readControlFile( dep._getControlFileName( packageFolder ) ) )
+		context = ExecutionContext()
+		dep.apply( context )
+		self.assertEquals( context.getVariable( 'EXAMPLE_VARIABLE' ), 'example_variable' )
+		self.assertTrue( context.getVariable( 'PATH' ).startswith( 'example_path' ) )
+		self.assertTrue( 'EXAMPLE_VARIABLE' not in os.environ )
+
 	def testApplyDisabledPackageConfiguration( self ):
 		packageFolder = os.path.join( self.TEST_MOM_ENVIRONMENTS, 'dep-a-1.2.0' )
 		packageFile = os.path.join( packageFolder, Dependency._ControlFileName )
@@ -119,5 +135,55 @@ class EnvironmentTests( MomBuildMockupTestCase ):
 		self._printMatches( matches )
 		self.assertEquals( len( matches ), 7 )
 
+	def testCloneConfigurations( self ):
+		environments = self.project.getChildren()[0]
+		configurations = environments.getChildren()[:]
+		plugin = Plugin( 'TestPlugin' )
+		plugin._setCommandArguments( [ 'argument' ] )
+		configurations[0].addPlugin( plugin )
+		clones = []
+		for _ in range( 2 ):
+			environment = Environment( parent = environments )
+			environment.cloneConfigurations( configurations )
+			clones.append( environment.getChildren()[0] )
+		first, second = clones
+		self.assertTrue( first is not second and first is not configurations[0] )
+		self.assertEquals( first.getName(), configurations[0].getName() )
+		self.assertTrue( first.getParent() is not second.getParent() )
+		# the plug-ins are copied, and refer to the clones, but share their state with the original:
+		self.assertEquals( len( first.getPlugins() ), 1 )
+		firstPlugin, secondPlugin = first.getPlugins()[0], second.getPlugins()[0]
+		self.assertTrue( firstPlugin is not plugin and firstPlugin is not secondPlugin )
+		self.assertTrue( firstPlugin.getInstructions() is first )
+		self.assertTrue( plugin.getInstructions() is configurations[0] )
+		self.assertEquals( firstPlugin.getCommandArguments(), plugin.getCommandArguments() )
+		self.assertTrue( firstPlugin.getCommandArguments() is not plugin.getCommandArguments() )
+		secondPlugin._setCommandArguments( [ 'other' ] )
+		first.setName( 'Changed' )
+		self.assertEquals( firstPlugin.getCommandArguments(), [ 'argument' ] )
+		self.assertEquals( plugin.getCommandArguments(), [ 'argument' ] )
+		self.assertEquals( second.getName(), configurations[0].getName() )
+
+	def testClonedBuildersAreIndependent( self ):
+		environments = self.project.getChildren()[0]
+		configurations = environments.getChildren()[:]
+		configurations[0].addPlugin( CMakeBuilder() )
+		self.project._setBaseDir( os.path.join( self.cwd, 'project' ) )
+		arguments = []
+		for index in range( 2 ):
+			environment = Environment( parent = environments )
+			environment.cloneConfigurations( configurations )
+			clone = environment.getChildren()[0]
+			clone._setBaseDir( os.path.join( self.cwd, 'environment-{0}'.format( index ) ) )
+			clone.addStep( Step( 'configure' ) )
+			builder = clone.getPlugins()[0]
+			builder.createConfigureActions()
+			arguments.append( builder.getCommandArguments() )
+		for index, argument in enumerate( arguments ):
+			prefixes = [ arg for arg in argument if arg.startswith( '-DCMAKE_INSTALL_PREFIX' ) ]
+			self.assertEquals( len( prefixes ), 1 )
+			self.assertTrue( 'environment-{0}'.format( index ) in prefixes[0] )
+		self.assertEquals( configurations[0].getPlugins()[0].getCMakeVariables(), [] )
+
 if __name__ == "__main__":
 	unittest.main()
@@ -0,0 +1,104 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from core.environments.Dependency import Dependency
+from core.environments.Environments import Environments
+from core.environments.EnvironmentsIndex import EnvironmentsIndex
+from core.helpers.SafeDeleteTree import rmtree
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import tempfile
+import time
+import unittest
+
+class EnvironmentsIndexTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.addCleanup( rmtree, self.directory )
+		self.root = os.path.join( self.directory, 'MomEnvironments' )
+		self.indexFile = os.path.join( self.directory, 'caches', 'environments.json' )
+		self.past = time.time() - 3600
+		self._createPackage( os.path.join( 'category-a', 'dep-a-1.0.0' ) )
+		self._createPackage( os.path.join( 'category-a', 'dep-b-2.0.0' ) )
+		self._createPackage( 'dep-a-1.1.0', 'false' )
+		self._createPackage( os.path.join( 'dep-a-1.1.0', 'dep-b-2.1.0' ) )
+		self.parsed = []
+		original = Dependency.verify
+		def verify( dependency ):
+			self.parsed.append( os.path.basename( dependency.getFolder() ) )
+			return original( dependency )
+		Dependency.verify = verify
+		self.addCleanup( setattr, Dependency, 'verify', original )
+
+	def _touch( self, path ):
+		'''Move the modification time into the past, out of the racy interval of the index.'''
+		self.past += 10
+		os.utime( path, ( self.past, self.past ) )
+
+	def _createPackage( self, name, enabled = 'true', score = 1 ):
+		folder = os.path.join( self.root, name )
+		if not os.path.isdir( folder ):
+			os.makedirs( folder )
+		with open( os.path.join( folder, Dependency._ControlFileName ), 'w' ) as f:
+			f.write( '# test package\nMOM_PACKAGE_ENABLED {0}\nMOM_PACKAGE_SCORE {1}\nMOM_EXPORT NAME {2}\n'.format( enabled, score, name ) )
+		self._touch( os.path.join( folder, Dependency._ControlFileName ) )
+		while folder != self.directory:
+			self._touch( folder )
+			folder = os.path.dirname( folder )
+
+	def _describe( self, dependencies ):
+		return [ ( dependency.getFolder(), dependency.isEnabled(), dependency.getScore(), dependency.getObjectStatus(),
+			dependency.getCommands() ) for dependency in dependencies ]
+
+	def testIndexFindsTheSamePackages( self ):
+		self.assertEqual( len( EnvironmentsIndex( self.root ).findDependencies() ), 3 )
+		for root in ( self.root, self.TEST_MOM_ENVIRONMENTS ):
+			expected = self._describe( Environments()._findMomDependencies( root ) )
+			index = EnvironmentsIndex( root, self.indexFile )
+			self.assertEqual( self._describe( index.findDependencies() ), expected )
+			self.assertEqual( self._describe( EnvironmentsIndex( root, self.indexFile ).findDependencies() ), expected )
+
+	def testIndexIsPersisted( self ):
+		dependencies = EnvironmentsIndex( self.root, self.indexFile ).findDependencies()
+		self.assertEqual( sorted( os.path.basename( dep.getFolder() ) for dep in dependencies ), [ 'dep-a-1.0.0', 'dep-b-2.0.0', 'dep-b-2.1.0' ] )
+		self.assertTrue( os.path.isfile( self.indexFile ) )
+		self.parsed = []
+		index = EnvironmentsIndex( self.root, self.indexFile )
+		self.assertEqual( self._describe( index.findDependencies() ), self._describe( dependencies ) )
+		self.assertEqual( self.parsed, [] ) # no control file was read again
+
+	def testIndexIsInvalidated( self ):
+		index = EnvironmentsIndex( self.root, self.indexFile )
+		index.findDependencies()
+		self.parsed = []
+		# a changed control file is read again:
+		self._createPackage( os.path.join( 'category-a', 'dep-b-2.0.0' ), score = 5 )
+		# a new package is found, a removed one disappears:
+		self._createPackage( os.path.join( 'category-b', 'dep-c-3.0.0' ) )
+		rmtree( os.path.join( self.root, 'dep-a-1.1.0', 'dep-b-2.1.0' ) )
+		self._touch( os.path.join( self.root, 'dep-a-1.1.0' ) )
+		dependencies = dict( ( os.path.basename( dep.getFolder() ), dep ) for dep in index.findDependencies() )
+		self.assertEqual( sorted( dependencies ), [ 'dep-a-1.0.0', 'dep-b-2.0.0', 'dep-c-3.0.0' ] )
+		self.assertEqual( dependencies[ 'dep-b-2.0.0' ].getScore(), 5 )
+		self.assertEqual( sorted( self.parsed ), [ 'dep-b-2.0.0', 'dep-c-3.0.0' ] )
+
+if __name__ == "__main__":
+	unittest.main()
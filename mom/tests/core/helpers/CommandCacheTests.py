@@ -0,0 +1,94 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from core.helpers.CommandCache import CommandCache, get_command_cache
+from core.helpers.GlobalMApp import mApp
+from core.helpers.RunCommand import RunCommand
+from core.helpers.SafeDeleteTree import rmtree
+from core.Settings import Settings
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import stat
+import sys
+import tempfile
+import unittest
+
+class CommandCacheTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.addCleanup( rmtree, self.directory )
+		self.cacheFile = os.path.join( self.directory, 'caches', 'commands.json' )
+
+	def _makeTool( self, name, version ):
+		path = os.path.join( self.directory, name )
+		with open( path, 'w' ) as f:
+			f.write( '#!/bin/sh\necho "{0} {1}"\n'.format( name, version ) )
+		os.chmod( path, os.stat( path ).st_mode | stat.S_IXUSR )
+		return path
+
+	def testEntriesArePersisted( self ):
+		tool = self._makeTool( 'tool', '1.0' )
+		cache = CommandCache( self.cacheFile )
+		key = cache.makeKey( 'tool', self.directory )
+		cache.setResolvedCommand( key, tool )
+		cache.setVersion( tool, ( '--version', 0, 0 ), 'tool 1.0' )
+		cache.setResolvedCommand( cache.makeKey( 'missing' ), None )
+		self.assertTrue( os.path.isfile( self.cacheFile ) )
+
+		reloaded = CommandCache( self.cacheFile )
+		self.assertEqual( reloaded.getResolvedCommand( key ), tool )
+		self.assertEqual( reloaded.getVersion( tool, '--version', 0, 0 ), 'tool 1.0' )
+		self.assertEqual( reloaded.getVersion( tool, '-v', 0, 0 ), None )
+		# commands that were not found are only remembered by the process:
+		self.assertEqual( cache.getResolvedCommand( cache.makeKey( 'missing' ) ), False )
+		self.assertEqual( reloaded.getResolvedCommand( cache.makeKey( 'missing' ) ), None )
+
+	def testModifiedExecutablesAreInvalidated( self ):
+		tool = self._makeTool( 'tool', '1.0' )
+		cache = CommandCache( self.cacheFile )
+		key = cache.makeKey( 'tool', self.directory )
+		cache.setResolvedCommand( key, tool )
+		cache.setVersion( tool, ( '--version', 0, 0 ), 'tool 1.0' )
+		self._makeTool( 'tool', '1.0.1' )
+		self.assertEqual( cache.getVersion( tool, '--version', 0, 0 ), None )
+		os.remove( tool )
+		self.assertEqual( cache.getResolvedCommand( key ), None )
+
+	@unittest.skipIf( sys.platform == 'win32', 'uses a shell script as the external tool' )
+	def testRunCommandUsesCache( self ):
+		mApp().getSettings().set( Settings.SystemCommandCache, False )
+		cache = get_command_cache()
+		self.assertEqual( cache.getCacheFile(), None )
+		self.addCleanup( cache.clear )
+		tool = self._makeTool( 'momtesttool', '1.0' )
+
+		runner = RunCommand( [ 'momtesttool' ], searchPaths = [ self.directory ] )
+		self.assertEqual( runner.checkVersion(), 'momtesttool 1.0' )
+		self.assertEqual( runner.getCommand()[0], tool )
+		# the cached version is returned without executing the tool again:
+		self.assertEqual( cache.getVersion( tool, '--version', 0, 0 ), 'momtesttool 1.0' )
+		self._makeTool( 'momtesttool', '2.0.0' )
+		runner = RunCommand( [ 'momtesttool' ], searchPaths = [ self.directory ] )
+		self.assertEqual( runner.checkVersion(), 'momtesttool 2.0.0' )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,63 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.ExecutionContext import ExecutionContext
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import sys
+import tempfile
+import unittest
+
+class ExecutionContextTests( MomTestCase ):
+
+	def testContextIsInitializedFromProcessEnvironment( self ):
+		context = ExecutionContext()
+		self.assertEquals( context.getEnvironment(), dict( os.environ ) )
+		context.setVariable( 'MOM_TEST_EXECUTION_CONTEXT', 'value' )
+		self.assertTrue( 'MOM_TEST_EXECUTION_CONTEXT' not in os.environ )
+		clone = context.clone( '/tmp' )
+		clone.setVariable( 'MOM_TEST_EXECUTION_CONTEXT', 'other' )
+		self.assertEquals( context.getVariable( 'MOM_TEST_EXECUTION_CONTEXT' ), 'value' )
+		self.assertEquals( clone.getWorkingDir(), '/tmp' )
+
+	def testAddToPathCollection( self ):
+		context = ExecutionContext( environment = { 'MOM_TEST_PATH' : 'b' } )
+		context.addToPathCollection( 'MOM_TEST_PATH', 'a', 'prepend' )
+		context.addToPathCollection( 'MOM_TEST_PATH', 'c' )
+		context.addToPathCollection( 'MOM_TEST_PATH', 'c' )
+		self.assertEquals( context.getVariable( 'MOM_TEST_PATH' ), os.pathsep.join( [ 'a', 'b', 'c' ] ) )
+
+	def testActionIsExecutedInContext( self ):
+		directory = os.path.realpath( tempfile.mkdtemp( prefix = 'tmp-mom-' ) )
+		try:
+			context = ExecutionContext( directory )
+			context.setVariable( 'MOM_TEST_EXECUTION_CONTEXT', 'value' )
+			cwd = os.getcwd()
+			command = [ sys.executable, '-c', 'import os; print( os.getcwd() + " " + os.environ[ "MOM_TEST_EXECUTION_CONTEXT" ] )' ]
+			action = ShellCommandAction( command )
+			self.assertEquals( action.executeAction( context = context ), 0 )
+			self.assertEquals( action.getStdOut().strip(), '{0} value'.format( directory ) )
+			self.assertEquals( os.getcwd(), cwd )
+			self.assertTrue( 'MOM_TEST_EXECUTION_CONTEXT' not in os.environ )
+		finally:
+			os.rmdir( directory )
+
+if __name__ == "__main__":
+	unittest.main()
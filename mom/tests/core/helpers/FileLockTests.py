@@ -0,0 +1,69 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError
+from core.helpers.FileLock import FileLock
+from core.helpers.SafeDeleteTree import rmtree
+from mom.tests.helpers.MomTestCase import MomTestCase
+from subprocess import Popen, PIPE
+import core
+import os
+import sys
+import tempfile
+import unittest
+
+class FileLockTests( MomTestCase ):
+
+	def _makeLockPath( self ):
+		directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.addCleanup( rmtree, directory )
+		return os.path.join( directory, 'locks', 'resource.lock' )
+
+	def testSharedLocks( self ):
+		path = self._makeLockPath()
+		with FileLock( path, shared = True ):
+			with FileLock( path, shared = True, timeout = 0 ) as other:
+				self.assertTrue( other.isLocked() )
+			self.assertRaises( MomError, FileLock( path, timeout = 0.2 ).acquire )
+		with FileLock( path, timeout = 0 ):
+			self.assertRaises( MomError, FileLock( path, shared = True, timeout = 0.2 ).acquire )
+
+	def testLockIsHeldAcrossProcesses( self ):
+		path = self._makeLockPath()
+		root = os.path.dirname( os.path.dirname( os.path.abspath( core.__file__ ) ) )
+		script = '''import sys
+sys.path.insert( 0, {0!r} )
+from core.helpers.FileLock import FileLock
+with FileLock( {1!r} ):
+	sys.stdout.write( "locked\\n" )
+	sys.stdout.flush()
+	sys.stdin.read()
+'''.format( root, path )
+		holder = Popen( [ sys.executable, '-c', script ], stdin = PIPE, stdout = PIPE )
+		try:
+			self.assertEqual( holder.stdout.readline().strip(), 'locked' )
+			self.assertRaises( MomError, FileLock( path, shared = True, timeout = 0.2 ).acquire )
+		finally:
+			holder.stdin.close()
+			holder.wait()
+		with FileLock( path, timeout = 5 ) as lock:
+			self.assertTrue( lock.isLocked() )
+
+if __name__ == "__main__":
+	unittest.main()
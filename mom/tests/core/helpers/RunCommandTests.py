@@ -20,6 +20,7 @@
 from core.Exceptions import ConfigurationError
 from core.helpers.RunCommand import RunCommand
 from mom.tests.helpers.MomTestCase import MomTestCase
+from StringIO import StringIO
 import os
 import sys
 import unittest
@@ -54,5 +55,31 @@ class RunCommandTests( MomTestCase ):
 					runner.run()
 					self.assertEquals( runner.getReturnCode(), code )
 
+	def testOutputStreams( self ):
+		'''Check that the output is written to the output streams, and that both streams are decoded.'''
+		cmd = [ sys.executable, '-c', 'import sys; sys.stdout.write( "out" * 50000 ); sys.stderr.write( "err" )' ]
+		runner = RunCommand( cmd )
+		output, error = StringIO(), StringIO()
+		runner.setOutputStreams( output, error )
+		runner.run()
+		self.assertEquals( runner.getReturnCode(), 0 )
+		self.assertEquals( output.getvalue(), "out" * 50000 )
+		self.assertEquals( runner.getStdOut(), "out" * 50000 )
+		self.assertEquals( error.getvalue(), "err" )
+		self.assertEquals( runner.getStdErr(), "err" )
+
+	def testMaximumOutputSize( self ):
+		'''Check that only the tail of the output is kept in memory if a maximum output size is set.'''
+		cmd = [ sys.executable, '-c', 'import sys; sys.stdout.write( "x" * 100000 + "tail" )' ]
+		runner = RunCommand( cmd )
+		output = StringIO()
+		runner.setOutputStreams( output )
+		runner.setMaximumOutputSize( 10 )
+		runner.run()
+		self.assertEquals( len( output.getvalue() ), 100004 )
+		self.assertTrue( runner.getStdOut().endswith( "\nxxxxxxtail" ) )
+		self.assertTrue( "99994 characters" in runner.getStdOut() )
+		self.assertRaises( ConfigurationError, runner.setMaximumOutputSize, -1 )
+
 if __name__ == "__main__":
 	unittest.main()
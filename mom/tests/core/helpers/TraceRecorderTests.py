@@ -0,0 +1,109 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from core.Plugin import Plugin
+from core.Settings import Settings
+from core.actions.ShellCommandAction import ShellCommandAction
+from core.helpers.GlobalMApp import mApp
+from core.helpers.TraceRecorder import TraceRecorder
+from core.plugins.helpers.TraceGenerator import TraceGenerator
+from core.plugins.helpers.XmlReportGenerator import XmlReportGenerator
+from core.plugins.reporters.ConsoleReporter import ConsoleReporter
+from mom.tests.helpers.MomBuildMockupTestCase import MomBuildMockupTestCase
+from StringIO import StringIO
+import json
+import os
+import sys
+import threading
+import unittest
+
+class TraceRecorderTests( MomBuildMockupTestCase ):
+
+	def testSpansInheritLabels( self ):
+		recorder = TraceRecorder()
+		with recorder.span( 'build', 'step', configuration = 'Debug' ):
+			with recorder.span( 'make', 'subprocess', command = 'make all' ) as args:
+				args[ 'pid' ] = 42
+		def work():
+			with recorder.span( 'other', 'step' ):
+				pass
+		thread = threading.Thread( target = work )
+		thread.start()
+		thread.join()
+		events = recorder.getTrace()[ 'traceEvents' ]
+		spans = dict( ( event[ 'name' ], event ) for event in events if event[ 'ph' ] == 'X' )
+		self.assertEqual( spans[ 'make' ][ 'args' ], { 'configuration' : 'Debug', 'command' : 'make all', 'pid' : 42 } )
+		self.assertEqual( spans[ 'build' ][ 'args' ], { 'configuration' : 'Debug' } )
+		self.assertEqual( spans[ 'other' ][ 'args' ], {} )
+		self.assertNotEqual( spans[ 'other' ][ 'tid' ], spans[ 'build' ][ 'tid' ] )
+		self.assertTrue( spans[ 'build' ][ 'ts' ] <= spans[ 'make' ][ 'ts' ] )
+		self.assertTrue( spans[ 'build' ][ 'dur' ] >= spans[ 'make' ][ 'dur' ] )
+		threadNames = [ event for event in events if event[ 'name' ] == 'thread_name' ]
+		self.assertEqual( len( threadNames ), 2 )
+
+		recorder.setEnabled( False )
+		with recorder.span( 'ignored', 'step' ):
+			pass
+		self.assertEqual( len( recorder.getEvents() ), 3 )
+
+	def testBuildTrace( self ):
+		class CommandPlugin( Plugin ):
+			def setup( self ):
+				action = ShellCommandAction( command = [ sys.executable, '-c', 'print( 42 )' ] )
+				self.getInstructions().getStep( 'cleanup' ).addMainAction( action )
+
+		generator = TraceGenerator()
+		self.build.addPlugin( generator )
+		self.build.addPlugin( CommandPlugin() )
+		mApp().getSettings().set( Settings.ProjectBuildType, 'm' )
+		self.build.buildAndReturn()
+		self.assertEqual( self.build.getReturnCode(), 0 )
+
+		self.assertEqual( os.path.dirname( generator.getTraceFile() ), self.build.getLogDir() )
+		with open( generator.getTraceFile() ) as f:
+			events = json.load( f )[ 'traceEvents' ]
+		categories = set( event.get( 'cat' ) for event in events )
+		for category in [ 'phase', 'step', 'action', 'subprocess' ]:
+			self.assertTrue( category in categories, 'no {0} events recorded'.format( category ) )
+		commands = [ event for event in events if event.get( 'cat' ) == 'subprocess' and '-c' in event[ 'args' ][ 'command' ] ]
+		self.assertEqual( len( commands ), 1 )
+		self.assertTrue( commands[0][ 'args' ][ 'pid' ] > 0 )
+		self.assertEqual( commands[0][ 'args' ][ 'configuration' ], self.build.getName() )
+
+	def testConsoleReporterShowsSavedTrace( self ):
+		# the report is created by the XmlReportGenerator before the TraceGenerator saves the trace:
+		self.build.addPlugin( XmlReportGenerator() )
+		generator = TraceGenerator()
+		self.build.addPlugin( generator )
+		self.build.addPlugin( ConsoleReporter() )
+		mApp().getSettings().set( Settings.ProjectBuildType, 'm' )
+		output = StringIO()
+		oldStdout = sys.stdout
+		sys.stdout = output
+		try:
+			self.build.buildAndReturn()
+		finally:
+			sys.stdout = oldStdout
+		self.assertEqual( self.build.getReturnCode(), 0 )
+		self.assertTrue( 'Trace saved to: {0}'.format( generator.getTraceFile() ) in output.getvalue() )
+		self.assertFalse( 'No trace saved' in output.getvalue() )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,122 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError, ConfigurationError
+from core.actions.filesystem.DirectoryTreeCopyAction import DirectoryTreeCopyAction
+from core.helpers.SafeDeleteTree import rmtree
+from core.helpers.TreeCopier import TreeCopier
+from mom.tests.helpers.MomTestCase import MomTestCase
+import os
+import shutil
+import tempfile
+import unittest
+
+class TreeCopierTests( MomTestCase ):
+
+	FILES = [ 'a.txt', 'b.o', os.path.join( 'sub', 'c.txt' ), os.path.join( 'sub', 'deeper', 'd.txt' ) ]
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.addCleanup( rmtree, self.directory )
+		self.source = os.path.join( self.directory, 'source' )
+		self.destination = os.path.join( self.directory, 'destination' )
+		for index, name in enumerate( self.FILES ):
+			self._writeFile( os.path.join( self.source, name ), 'x' * ( index + 1 ) )
+
+	def _writeFile( self, path, content ):
+		if not os.path.isdir( os.path.dirname( path ) ):
+			os.makedirs( os.path.dirname( path ) )
+		with open( path, 'w' ) as f:
+			f.write( content )
+
+	def _readFile( self, path ):
+		with open( path ) as f:
+			return f.read()
+
+	def _assertTreeCopied( self, names ):
+		for name in names:
+			self.assertEqual( self._readFile( os.path.join( self.destination, name ) ), self._readFile( os.path.join( self.source, name ) ) )
+
+	def testCopyTree( self ):
+		copier = TreeCopier( jobs = 3 )
+		copier.copyTree( self.source, self.destination )
+		self._assertTreeCopied( self.FILES )
+		self.assertEqual( copier.getFilesCopied(), 4 )
+		self.assertEqual( copier.getBytesCopied(), 1 + 2 + 3 + 4 )
+		self.assertEqual( copier.getFilesLinked(), 0 )
+		self.assertEqual( copier.getFilesSkipped(), 0 )
+		self.assertEqual( int( os.stat( os.path.join( self.destination, 'sub' ) ).st_mtime ), int( os.stat( os.path.join( self.source, 'sub' ) ).st_mtime ) )
+
+	def testIgnorePatterns( self ):
+		TreeCopier( shutil.ignore_patterns( '*.o' ) ).copyTree( self.source, self.destination )
+		self.assertFalse( os.path.exists( os.path.join( self.destination, 'b.o' ) ) )
+		self.assertTrue( os.path.isfile( os.path.join( self.destination, 'a.txt' ) ) )
+
+	def testUnchangedFilesAreSkipped( self ):
+		TreeCopier().copyTree( self.source, self.destination )
+		changed = os.path.join( self.source, 'sub', 'c.txt' )
+		self._writeFile( changed, 'changed' )
+
+		copier = TreeCopier()
+		copier.copyTree( self.source, self.destination )
+		self.assertEqual( copier.getFilesSkipped(), 4 ) # existing files are never overwritten
+		self.assertEqual( self._readFile( os.path.join( self.destination, 'sub', 'c.txt' ) ), 'xxx' )
+
+		copier = TreeCopier( overwrite = True, jobs = 2 )
+		copier.copyTree( self.source, self.destination )
+		self.assertEqual( copier.getFilesCopied(), 1 )
+		self.assertEqual( copier.getFilesSkipped(), 3 )
+		self._assertTreeCopied( self.FILES )
+
+	def testHardLinks( self ):
+		copier = TreeCopier( mode = TreeCopier.Mode_HardLink, jobs = 2 )
+		copier.copyTree( self.source, self.destination )
+		self._assertTreeCopied( self.FILES )
+		self.assertEqual( copier.getFilesLinked() + copier.getFilesCopied(), 4 )
+		if copier.getFilesLinked():
+			name = os.path.join( 'sub', 'c.txt' )
+			self.assertTrue( os.path.samefile( os.path.join( self.source, name ), os.path.join( self.destination, name ) ) )
+			self.assertEqual( copier.getBytesLinked(), 1 + 2 + 3 + 4 )
+
+	def testReflinks( self ):
+		copier = TreeCopier( mode = TreeCopier.Mode_Reflink )
+		copier.copyTree( self.source, self.destination )
+		# reflinks fall back to copies on file systems that do not support them:
+		self._assertTreeCopied( self.FILES )
+		self.assertEqual( copier.getFilesLinked() + copier.getFilesCopied(), 4 )
+		self.assertEqual( copier.getBytesLinked() + copier.getBytesCopied(), 1 + 2 + 3 + 4 )
+
+	def testErrors( self ):
+		self.assertRaises( ConfigurationError, TreeCopier, mode = 'symlink' )
+		self.assertRaises( MomError, TreeCopier().copyTree, os.path.join( self.directory, 'missing' ), self.destination )
+
+	def testDirectoryTreeCopyAction( self ):
+		action = DirectoryTreeCopyAction( self.source, self.destination, [ '*.o' ], jobs = 2 )
+		self.assertEqual( action.getMode(), TreeCopier.Mode_Copy )
+		self.assertEqual( action.executeAction(), 0 )
+		self._assertTreeCopied( [ name for name in self.FILES if not name.endswith( '.o' ) ] )
+		self.assertTrue( 'copied 3 files' in action.getStdOut() )
+
+		action = DirectoryTreeCopyAction( os.path.join( self.directory, 'missing' ), self.destination )
+		self.assertEqual( action.executeAction(), 1 )
+		self.assertTrue( 'missing' in action.getStdErr() )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,110 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+# 
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+# 
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Settings import Settings
+from core.actions.filesystem.RmDirAction import RmDirAction
+from core.helpers.GlobalMApp import mApp
+from core.helpers import SafeDeleteTree
+from core.helpers.SafeDeleteTree import TreeDeleter, get_tree_deleter, rmtree
+from mom.tests.helpers.MomTestCase import MomTestCase
+from mom.tests.helpers.TestUtils import replace_bound_method
+import errno
+import os
+import tempfile
+import unittest
+
+class TreeDeleterTests( MomTestCase ):
+
+	def setUp( self ):
+		MomTestCase.setUp( self )
+		self.directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.addCleanup( rmtree, self.directory )
+
+	def _createTree( self, name ):
+		path = os.path.join( self.directory, name )
+		os.makedirs( os.path.join( path, 'sub' ) )
+		for fileName in ( 'a', os.path.join( 'sub', 'b' ) ):
+			with open( os.path.join( path, fileName ), 'w' ) as f:
+				f.write( fileName )
+		return path
+
+	def testBackgroundDelete( self ):
+		path = self._createTree( 'doomed' )
+		deleter = TreeDeleter()
+		self.assertTrue( deleter.delete( path ) )
+		self.assertFalse( os.path.exists( path ) )
+		# the path can be reused right away:
+		os.makedirs( path )
+		deleter.drain()
+		self.assertEqual( deleter.getErrors(), [] )
+		self.assertEqual( os.listdir( self.directory ), [ 'doomed' ] ) # the trash folder was deleted as well
+
+	def testLeftoversAreDeleted( self ):
+		leftover = os.path.join( self.directory, TreeDeleter.TrashFolderName, 'leftover' )
+		os.makedirs( leftover )
+		deleter = TreeDeleter()
+		self.assertTrue( deleter.delete( self._createTree( 'doomed' ) ) )
+		deleter.drain()
+		self.assertFalse( os.path.exists( leftover ) )
+
+	def testFailedDeletionsAreReported( self ):
+		messages = []
+		def message( self, mobject, text, *args, **kwargs ):
+			messages.append( text )
+		def debugN( self, mobject, level, text, *args, **kwargs ):
+			messages.append( text )
+		replace_bound_method( mApp(), mApp().message, message )
+		replace_bound_method( mApp(), mApp().debugN, debugN )
+		def failingRmtree( path ):
+			raise OSError( errno.EBUSY, 'Device or resource busy', path )
+		originalRmtree = SafeDeleteTree._rmtree
+		SafeDeleteTree._rmtree = failingRmtree
+		self.addCleanup( setattr, SafeDeleteTree, '_rmtree', originalRmtree )
+		deleter = TreeDeleter()
+		self.assertTrue( deleter.delete( self._createTree( 'stuck' ) ) )
+		deleter.drain()
+		self.assertEqual( len( deleter.getErrors() ), 1 )
+		entry = deleter.getErrors()[0][0]
+		self.assertTrue( os.path.isdir( entry ) )
+		self.assertEqual( [ text for text in messages if entry in text and 'cannot delete' in text ], [ messages[0] ] )
+		# the next deletion retries the tree, and says so:
+		SafeDeleteTree._rmtree = originalRmtree
+		self.assertTrue( deleter.delete( self._createTree( 'doomed' ) ) )
+		deleter.drain()
+		self.assertTrue( [ text for text in messages if entry in text and 'retrying' in text ] )
+		self.assertFalse( os.path.exists( entry ) )
+
+	def testDeleteNonExistingTree( self ):
+		self.assertFalse( TreeDeleter().delete( os.path.join( self.directory, 'missing' ) ) )
+		rmtree( os.path.join( self.directory, 'missing' ), background = True )
+
+	def testRmDirAction( self ):
+		path = self._createTree( 'doomed' )
+		self.assertEqual( RmDirAction( path ).run(), 0 )
+		self.assertFalse( os.path.exists( path ) )
+		get_tree_deleter().drain()
+		self.assertFalse( os.path.exists( os.path.join( self.directory, TreeDeleter.TrashFolderName ) ) )
+
+		mApp().getSettings().set( Settings.SystemBackgroundDelete, False )
+		path = self._createTree( 'doomed' )
+		self.assertEqual( RmDirAction( path ).run(), 0 )
+		self.assertEqual( os.listdir( self.directory ), [] )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,72 @@
+# This file is part of Make-O-Matic.
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2010 Klaralvdalens Datakonsult AB, a KDAB Group company, info@kdab.com
+# Author: Mirko Boehm <mirko@kdab.com>
+#
+# Make-O-Matic is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Make-O-Matic is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from core.Exceptions import MomError
+from core.helpers.WorkerPool import WorkerPool
+from mom.tests.helpers.MomTestCase import MomTestCase
+import threading
+import time
+import unittest
+
+class WorkerPoolTests( MomTestCase ):
+
+	def testResultsAreOrdered( self ):
+		jobs = [ lambda value = value: value * value for value in range( 20 ) ]
+		results = WorkerPool( 4 ).run( jobs )
+		self.assertEqual( results, [ value * value for value in range( 20 ) ] )
+
+	def testMaximumNumberOfWorkers( self ):
+		lock = threading.Lock()
+		state = { 'running' : 0, 'peak' : 0 }
+
+		def job():
+			with lock:
+				state['running'] += 1
+				state['peak'] = max( state['peak'], state['running'] )
+			time.sleep( 0.05 )
+			with lock:
+				state['running'] -= 1
+			return WorkerPool.isWorkerThread()
+
+		results = WorkerPool( 3 ).run( [ job ] * 10 )
+		self.assertTrue( all( results ) )
+		self.assertTrue( state['peak'] <= 3 )
+		self.assertTrue( state['peak'] > 1 )
+		self.assertFalse( WorkerPool.isWorkerThread() )
+
+	def testFirstExceptionIsRaisedAfterAllJobsFinished( self ):
+		executed = []
+
+		def makeJob( index ):
+			def job():
+				executed.append( index )
+				if index in ( 2, 5 ):
+					raise MomError( 'job {0} failed'.format( index ) )
+				return index
+			return job
+
+		try:
+			WorkerPool( 2 ).run( [ makeJob( index ) for index in range( 8 ) ] )
+			self.fail( 'The exception of the failed job was not re-raised' )
+		except MomError as e:
+			self.assertEqual( str( e ), 'job 2 failed' )
+		self.assertEqual( sorted( executed ), range( 8 ) )
+
+if __name__ == "__main__":
+	unittest.main()
@@ -18,13 +18,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from core.Exceptions import MomError, ConfigurationError, BuildError
+from core.Instructions import Instructions
 from core.Plugin import Plugin
 from core.Settings import Settings
 from core.actions.ShellCommandAction import ShellCommandAction
 from core.executomat.Step import Step
 from core.helpers.GlobalMApp import mApp
-from core.helpers.XmlReport import InstructionsXmlReport
-from core.helpers.XmlReportConverter import XmlReportConverter
+from core.helpers.XmlReport import InstructionsXmlReport, StreamedXmlReport
+from core.helpers.XmlReportConverter import XmlReportConverter, ReportFormat
 from core.helpers.XmlUtils import xml_compare
 from core.loggers.ConsoleLogger import ConsoleLogger
 from core.plugins.helpers.XmlReportGenerator import XmlReportGenerator
@@ -81,12 +82,12 @@ class XmlReportTests( MomBuildMockupTestCase ):
 		report = InstructionsXmlReport( self.build )
 		return report
 
-	def _runValidator( self ):
+	def _runValidator( self, report = None ):
 		schemaFileName = os.path.join( self.TEST_DATA_DIRECTORY, "xml2html-schema.xml" )
 		xml = etree.parse( schemaFileName )
 		schema = etree.XMLSchema( xml )
 		parser = etree.XMLParser( schema = schema )
-		etree.XML( self._getXmlReport().getReport(), parser )
+		etree.XML( ( report or self._getXmlReport() ).getReport(), parser )
 
 	def testCreateXmlReport( self ):
 		self._executeBuild()
@@ -103,6 +104,17 @@ class XmlReportTests( MomBuildMockupTestCase ):
 		if etree.__name__ == "lxml.etree":
 			self.assertNotEquals( doc.find( './/plugin[@name="DoxygenGenerator"]' ), None )
 
+	def testConcurrentConfigurations( self ):
+		mApp().getSettings().set( Settings.BuildConcurrentConfigurations, 2 )
+		self._executeBuild( 'c' )
+		self.assertEqual( self.build.getReturnCode(), 0 )
+		doc = etree.XML( self._getXmlReport().getReport() )
+
+		configurations = doc.findall( './/configuration' )
+		self.assertTrue( len( configurations ) > 1 )
+		for configuration in configurations:
+			self.assertEqual( configuration.get( 'failed' ), 'False' )
+
 	def testEnvironmentExpand( self ):
 		self._executeBuild( 'c' )
 		doc = etree.XML( self._getXmlReport().getReport() )
@@ -310,5 +322,110 @@ class XmlReportTests( MomBuildMockupTestCase ):
 
 		self.assertTrue( "Exception" in text )
 
+	def testSharedXmlReport( self ):
+		self._executeBuild()
+		self.build._setCurrentPhase( Instructions.Phase.Report )
+		report = self.build.getXmlReport()
+		self.assertTrue( self.build.getXmlReport() is report )
+		self.assertTrue( self.build.getXmlReport( self.build ) is report )
+		self.assertFalse( self.build.getXmlReport( self.project ) is report )
+		# the report is parsed only once for all converters:
+		self.assertTrue( report.getElementTree() is report.getElementTree() )
+		self.assertTrue( report.getDocument( etree ) is report.getDocument( etree ) )
+		self.assertEqual( XmlReportConverter( report ).convertToText(), XmlReportConverter( report ).convertToText() )
+		# the notify phase uses a new report, which contains the changes of the report phase:
+		self.build._setCurrentPhase( Instructions.Phase.Notify )
+		self.assertFalse( self.build.getXmlReport() is report )
+		self.assertTrue( xml_compare( etree.XML( report.getReport() ), etree.XML( self.build.getXmlReport().getReport() ) ) )
+
+	def testXmlReportIsSharedByReporters( self ):
+		class Reporter( Plugin ):
+			def __init__( self, status = None ):
+				Plugin.__init__( self )
+				self.__status = status
+				self.reports = []
+			def report( self ):
+				self.reports.append( mApp().getXmlReport() )
+				if self.__status:
+					self.setObjectStatus( self.__status )
+		reporters = [ Reporter(), Reporter(), Reporter( 'changed' ), Reporter() ]
+		for reporter in reporters:
+			self.build.addPlugin( reporter )
+		self._executeBuild()
+		self.assertEqual( self.build.getReturnCode(), 0 )
+		# the report is only created again after a reporter changed its status:
+		self.assertTrue( reporters[1].reports[0] is reporters[0].reports[0] )
+		self.assertTrue( reporters[2].reports[0] is reporters[0].reports[0] )
+		self.assertFalse( reporters[3].reports[0] is reporters[0].reports[0] )
+		self.assertTrue( 'changed' in reporters[3].reports[0].getReport() )
+
+	def testStreamedXmlReport( self ):
+
+		class TestPlugin( Plugin ):
+			EXECUTABLE = ['python', '-c', 'import sys; sys.stdout.write( "x" * 1000 + "END" ); sys.exit( 1 )']
+
+			def setup( self ):
+				step = self.getInstructions().getStep( 'build' )
+				step.addMainAction( ShellCommandAction( command = self.EXECUTABLE ) )
+
+		self.build.addPlugin( TestPlugin() )
+		self._executeBuild()
+		mApp().getSettings().set( Settings.ReportStreamed, True )
+		mApp().getSettings().set( Settings.ReportMaximumOutputSize, 100 )
+		self.build._setCurrentPhase( Instructions.Phase.Report )
+		report = self.build.getXmlReport()
+		self.assertTrue( isinstance( report, StreamedXmlReport ) )
+		self._runValidator( report )
+		self.assertTrue( os.path.isfile( report.getFileName() ) )
+
+		# the streamed report has the same structure as the one created in memory:
+		doc = etree.XML( report.getReport() )
+		expected = etree.XML( self._getXmlReport().getReport() )
+		for path in ( './/configuration', './/plugin', './/step', './/action' ):
+			self.assertEqual( len( doc.findall( path ) ), len( expected.findall( path ) ) )
+
+		# long output is truncated and references the step log file, which contains all of it:
+		truncated = [ node for node in doc.findall( './/stdout' ) if node.get( 'truncated' ) == 'True' ]
+		self.assertEqual( len( truncated ), 1 )
+		self.assertEqual( len( truncated[0].text ), 100 )
+		self.assertTrue( truncated[0].text.endswith( 'END' ) )
+		self.assertEqual( truncated[0].get( 'size' ), '1003' )
+		logFile = os.path.join( self.build.getBaseDir(), truncated[0].get( 'logfile' ) )
+		with open( logFile ) as f:
+			self.assertTrue( 'x' * 1000 + 'END' in f.read() )
+		self.assertEqual( [ node for node in expected.findall( './/stdout' ) if node.get( 'truncated' ) ], [] )
+
+		# the converters consume the streamed report:
+		converter = XmlReportConverter( report )
+		self.assertTrue( 'for the complete output' in converter.convertToFailedStepsLog() )
+		if converter.hasXsltSupport():
+			self.assertFalse( 'Could not create HTML report' in converter.convertTo( ReportFormat.HTML ) )
+
+	def testCompiledStylesheetCache( self ):
+		self._executeBuild()
+		report = self._getXmlReport()
+		converter = XmlReportConverter( report )
+		if not converter.hasXsltSupport():
+			return
+		# converters with the same plugin templates share the compiled stylesheet:
+		transform = converter.getTransform( ReportFormat.HTML )
+		self.assertTrue( transform is not None )
+		self.assertTrue( XmlReportConverter( report ).getTransform( ReportFormat.HTML ) is transform )
+		self.assertEqual( converter.getTransform( ReportFormat.TEXT ), None )
+
+		class TestPlugin( Plugin ):
+			def getXslTemplates( self ):
+				return { ReportFormat.HTML: "<p>Test plugin template</p>" }
+
+		self.build.addPlugin( TestPlugin() )
+		converter = XmlReportConverter( report )
+		pluginTransform = converter.getTransform( ReportFormat.HTML )
+		self.assertFalse( pluginTransform is transform )
+		self.assertTrue( XmlReportConverter( report ).getTransform( ReportFormat.HTML ) is pluginTransform )
+		self.assertTrue( "Could not create HTML report" not in converter.convertToHtml() )
+
+		XmlReportConverter.clearCache()
+		self.assertFalse( converter.getTransform( ReportFormat.HTML ) is pluginTransform )
+
 if __name__ == "__main__":
 	unittest.main()
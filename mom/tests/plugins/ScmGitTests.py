@@ -18,6 +18,15 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from mom.tests.helpers.ScmTestCase import ScmTestCase
+from core.plugins.sourcecode.SCMGit import SCMGit
+from core.helpers.SafeDeleteTree import rmtree
+from core.Settings import Settings
+from core.Exceptions import ConfigurationError
+from core.helpers.WorkerPool import WorkerPool
+from core.helpers.PathResolver import PathResolver
+from subprocess import check_call, check_output
+import os
+import tempfile
 import unittest
 
 class ScmGitTests ( ScmTestCase ):
@@ -71,6 +80,103 @@ class ScmGitTests ( ScmTestCase ):
 		info = self.project.getScm().getRevisionInfo()
 		self._validateRevisionInfoContent( info )
 
+	def _git( self, directory, *args ):
+		return check_output( [ 'git', '-c', 'user.name=mom', '-c', 'user.email=mom@example.com' ] + list( args ),
+			cwd = directory ).strip()
+
+	def _commit( self, repository ):
+		self._git( repository, 'commit', '--allow-empty', '-q', '-m', 'commit' )
+		return self._git( repository, 'rev-parse', 'HEAD' )
+
+	def _makeLocalScm( self ):
+		'''Create a local repository, and a git SCM that uses a clone army in a temporary directory.'''
+		directory = tempfile.mkdtemp( prefix = 'tmp-mom-' )
+		self.addCleanup( rmtree, directory )
+		repository = os.path.join( directory, 'repository' )
+		check_call( [ 'git', 'init', '-q', repository ] )
+		scm = SCMGit()
+		scm.setUrl( repository )
+		scm.setCloneArmyDir( os.path.join( directory, 'clonearmy' ) )
+		scm.setCachedCheckoutsDir( os.path.join( directory, 'checkouts' ) )
+		return scm, repository
+
+	def testFetchFreshness( self ):
+		self.build.getSettings().set( Settings.SCMGitFetchFreshness, 3600 )
+		scm, repository = self._makeLocalScm()
+		first = self._commit( repository )
+		self.assertEqual( scm._getCurrentRevision(), first )
+		self.assertTrue( os.path.isfile( scm._getFetchStampPath() ) )
+		second = self._commit( repository )
+		# the hidden clone was fetched within the freshness window:
+		self.assertEqual( scm._getCurrentRevision(), first )
+		# the fetch time is shared through the cache directory:
+		SCMGit._lastFetches.clear()
+		self.assertTrue( scm._isHiddenCloneFresh() )
+		# a requested revision that is not in the hidden clone yet is always fetched:
+		scm.setRevision( second )
+		self.assertFalse( scm._isHiddenCloneFresh() )
+		scm.updateHiddenClone()
+		self.assertEqual( scm._getCurrentRevision(), second )
+		scm.setRevision( None )
+		third = self._commit( repository )
+		self.build.getSettings().set( Settings.SCMGitFetchFreshness, 0 )
+		self.assertEqual( scm._getCurrentRevision(), third )
+
+	def testConcurrentCacheUpdates( self ):
+		'''Multiple users update the hidden clone and the cached checkout while new revisions are pushed to the remote.'''
+		self.build.getSettings().set( Settings.SCMGitFetchFreshness, 0 )
+		scm, repository = self._makeLocalScm()
+		remote = os.path.join( os.path.dirname( repository ), 'remote.git' )
+		check_call( [ 'git', 'init', '-q', '--bare', remote ] )
+		self._commit( repository )
+		self._git( repository, 'push', '-q', remote, 'HEAD:master' )
+
+		def push():
+			for _ in range( 10 ):
+				self._commit( repository )
+				self._git( repository, 'push', '-q', remote, 'HEAD:master' )
+
+		def update():
+			user = SCMGit()
+			user.setUrl( remote )
+			user.setCloneArmyDir( scm.getCloneArmyDir() )
+			user.setCachedCheckoutsDir( scm.getCachedCheckoutsDir() )
+			for _ in range( 5 ):
+				user.updateHiddenClone()
+				user._getCurrentRevision()
+				user.updateCachedCheckout()
+
+		WorkerPool( 5 ).run( [ push ] + [ update ] * 4 )
+		scm.setUrl( remote )
+		self.assertEqual( scm._getCurrentRevision(), self._git( repository, 'rev-parse', 'HEAD' ) )
+		self._git( scm._getHiddenClonePath(), 'fsck', '--no-progress' )
+		self._git( scm._getCachedCheckoutPath(), 'fsck', '--no-progress' )
+
+	def testWorktreeCheckout( self ):
+		scm, repository = self._makeLocalScm()
+		revision = self._commit( repository )
+		scm.setSrcDir( PathResolver( self.project.getSourceDir ) )
+		scm.setCheckoutMode( SCMGit.CheckoutMode_Worktree )
+		self.project.setScm( scm )
+		self.build.getParameters().parse()
+		self.build.initialize()
+		self.build.runPrepare()
+		self.build.runSetups()
+		for stepName in ( 'create-folders', 'checkout' ):
+			for action in self.project.getStep( stepName ).getMainActions():
+				self.assertEqual( action.executeAction(), 0 )
+		sourceDir = self.project.getSourceDir()
+		self.assertEqual( self._git( sourceDir, 'rev-parse', 'HEAD' ), revision )
+		# the worktree shares the object database of the hidden clone:
+		self.assertTrue( os.path.isfile( os.path.join( sourceDir, '.git' ) ) )
+		worktrees = self._git( scm._getHiddenClonePath(), 'worktree', 'list', '--porcelain' )
+		self.assertTrue( 'worktree {0}'.format( sourceDir ) in worktrees )
+		for action in self.project.getStep( 'cleanup' ).getMainActions():
+			self.assertEqual( action.executeAction(), 0 )
+		self.assertFalse( os.path.exists( sourceDir ) )
+		worktrees = self._git( scm._getHiddenClonePath(), 'worktree', 'list', '--porcelain' )
+		self.assertFalse( 'worktree {0}'.format( sourceDir ) in worktrees )
+		self.assertRaises( ConfigurationError, scm.setCheckoutMode, 'copy' )
 
 if __name__ == "__main__":
 	unittest.main()
@@ -24,6 +24,10 @@ from core.helpers.GlobalMApp import mApp
 from core.helpers.SCMUidMapper import SCMUidSvnAuthorsFileMap
 from datetime import datetime
 from mom.tests.helpers.ScmTestCase import ScmTestCase
+from core.plugins.sourcecode.SCMSubversion import SCMSubversion, _SvnLogParser
+from core.Exceptions import ConfigurationError
+from core.plugins.sourcecode.SubversionCache import SubversionCache
+from tempfile import NamedTemporaryFile
 import os.path
 import unittest
 
@@ -85,6 +89,60 @@ class ScmSvnTests ( ScmTestCase ):
 		self.assertEqual( info1.commitTimeReadable, info2.commitTimeReadable )
 		self.assertEqual( info1.revision, info2.revision )
 
+	def testScmSvnPersistentCache( self ):
+		filename = NamedTemporaryFile( suffix = '.sqlite' ).name
+		cache = SubversionCache( filename )
+		url = 'file:///repo/project'
+		entry = ( u'kevin.funk', u'Commit message', u'4711', 1286870422, '2010-10-12 08:00:22' )
+		cache.setLogEntries( url + '/trunk', [ ( 4711, entry ) ] )
+		cache.setSummarizedDiff( url, 4711, [ 'M    file:///repo/project/trunk/README', '' ] )
+		# a new process uses the stored results, the (non-existing) repository is not contacted:
+		scm = SCMSubversion()
+		scm.setUrl( url )
+		scm.setCache( SubversionCache( filename ) )
+		scm.setRevision( 4711 )
+		info = scm._retrieveRevisionInfo()
+		self.assertEqual( ( info.committerName, info.commitMessage, info.revision, info.commitTime, info.commitTimeReadable ),
+			entry )
+		self.assertEqual( scm.getCache().getSummarizedDiff( url, 4711 ), [ 'M    file:///repo/project/trunk/README', '' ] )
+		self.assertEqual( scm.getCache().getSummarizedDiff( url, 4712 ), None )
+		self.assertEqual( scm.getCache().getLogEntry( url, 4711 ), None )
+		os.remove( filename )
+
+	def _makeXmlLog( self, revisions ):
+		entries = [ u'''<logentry
+   revision="{0}">
+<author>kevin.funk</author>
+<date>2010-10-12T08:00:{0:02}.123456Z</date>
+<paths>
+<path kind="file" action="M">/trunk/README</path>
+</paths>
+<msg>Commit {0} &amp; \u00e9t\u00e9
+</msg>
+</logentry>
+'''.format( revision ) for revision in revisions ]
+		return u'<?xml version="1.0" encoding="UTF-8"?>\n<log>\n' + u''.join( entries ) + u'</log>\n'
+
+	def testSvnLogParser( self ):
+		xmlLog = self._makeXmlLog( range( 10, 20 ) )
+		parser = _SvnLogParser()
+		for index in range( 0, len( xmlLog ), 7 ): # the output of svn arrives in chunks
+			parser.write( xmlLog[ index : index + 7 ] )
+		parser.finish()
+		entries = parser.getEntries()
+		self.assertEqual( [ entry[2] for entry in entries ], [ str( revision ) for revision in range( 10, 20 ) ] )
+		self.assertEqual( entries[0][0:2], ( 'kevin.funk', u'Commit 10 & \u00e9t\u00e9' ) )
+		self.assertEqual( entries[0][3], 1286870410 )
+		# parsing stops after the maximum number of entries, the rest of the output is ignored:
+		parser = _SvnLogParser( 3 )
+		parser.write( xmlLog[ : xmlLog.index( 'revision="13"' ) ] )
+		parser.write( u'garbage' )
+		parser.finish()
+		self.assertEqual( [ entry[2] for entry in parser.getEntries() ], [ '10', '11', '12' ] )
+		parser = _SvnLogParser()
+		parser.write( xmlLog[ : len( xmlLog ) / 2 ] )
+		self.assertRaises( ConfigurationError, parser.finish )
+
 	def __scmSvnBranchCommitParserTestHelper( self, summarizedDiff ):
 		# locsl location to build type mapping for the test:
 		LocationBuildTypeMap = [
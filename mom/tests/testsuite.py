@@ -39,16 +39,28 @@ from core.plugins.sourcecode.SCMSubversion import SCMSubversion
 from core.plugins.testers.CTest import CTest
 from mom.tests.buildcontrol.BuildScriptInterfaceTests import BuildScriptInterfaceTests
 from mom.tests.buildcontrol.BuildStatusPersistenceTests import BuildStatusPersistenceTests
+from mom.tests.buildcontrol.SchedulerTests import SchedulerTests
 from mom.tests.core.MApplicationTests import MApplicationTests
 from mom.tests.core.RunModeDescribeTests import RunModeDescribeTests
 from mom.tests.core.RunModePrintTests import RunModePrintTests
 from mom.tests.core.SettingsTests import SettingsTests
 from mom.tests.core.actions.FileSystemActionsTests import FileSystemActionsTests
+from mom.tests.core.actions.ShellCommandActionTests import ShellCommandActionTests
 from mom.tests.core.environments.EnvironmentTests import EnvironmentTests
+from mom.tests.core.environments.EnvironmentMatcherTests import EnvironmentMatcherTests
+from mom.tests.core.environments.EnvironmentsIndexTests import EnvironmentsIndexTests
 from mom.tests.core.helpers.EnvironmentSaverTest import EnvironmentSaverTest
+from mom.tests.core.helpers.ExecutionContextTests import ExecutionContextTests
+from mom.tests.core.helpers.FileLockTests import FileLockTests
+from mom.tests.core.helpers.CommandCacheTests import CommandCacheTests
+from mom.tests.core.helpers.TreeCopierTests import TreeCopierTests
+from mom.tests.core.helpers.TreeDeleterTests import TreeDeleterTests
+from mom.tests.core.helpers.TraceRecorderTests import TraceRecorderTests
+from mom.tests.benchmarks.BenchmarkTests import BenchmarkTests
 from mom.tests.core.helpers.PathResolverTests import PathResolverTests
 from mom.tests.core.helpers.SettingResolverTests import SettingResolverTests
 from mom.tests.core.helpers.TemplateSupportTests import TemplateSupportTests
+from mom.tests.core.helpers.WorkerPoolTests import WorkerPoolTests
 from mom.tests.core.helpers.XmlReportTests import XmlReportTests
 from mom.tests.plugins.AnalyzerTests import AnalyzerTests
 from mom.tests.plugins.EmailReporterTest import EmailReporterTest
@@ -76,12 +88,23 @@ CLASSES = [
 	# others
 	AnalyzerTests,
 	EnvironmentTests,
+	EnvironmentMatcherTests,
+	EnvironmentsIndexTests,
 	BuildScriptInterfaceTests,
 	BuildStatusPersistenceTests,
+	SchedulerTests,
 #	EmailerTest,
 	EmailReporterTest,
 	EnvironmentSaverTest,
+	ExecutionContextTests,
+	FileLockTests,
+	CommandCacheTests,
+	TreeCopierTests,
+	TreeDeleterTests,
+	TraceRecorderTests,
+	BenchmarkTests,
 	FileSystemActionsTests,
+	ShellCommandActionTests,
 	PathResolverTests,
 	PreprocessorTests,
 	PyUnitTesterTests,
@@ -94,6 +117,7 @@ CLASSES = [
 	XmlReportTests,
 	SettingsTests,
 	TemplateSupportTests,
+	WorkerPoolTests,
 	QTestTests,
 	SettingResolverTests,
 	MApplicationTests
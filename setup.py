@@ -25,6 +25,7 @@ setup(
 			"mom-report-converter = tools.report_converter:main",
 			"mom-ci = tools.simple_ci:main",
 			"mom-test = mom.tests.testsuite_selftest:main",
+			"mom-benchmark = mom.benchmarks.BenchmarkRunner:main",
 		],
 	},
 )
@@ -23,20 +23,72 @@ from __future__ import print_function
 from core.helpers.XmlReportConverter import XmlReportConverter
 from core.helpers.XmlReport import StringBasedXmlReport
 from core.MApplication import MApplication
+from core.Exceptions import MomException
+from xml.parsers.expat import ExpatError
+import codecs
+import os.path
 import sys
 
 TARGET_FORMATS = ["text", "text_summary", "html", "html_summary"]
+BATCH_OPTION = "--batch"
 
 def usage():
 	print_stderr( "Usage: {0} INPUT_FILE [{1}]".format( sys.argv[0], "|".join( TARGET_FORMATS ) ) )
+	print_stderr( "       {0} {1} {2} INPUT_FILE [INPUT_FILE ...]".format( sys.argv[0], BATCH_OPTION, "|".join( TARGET_FORMATS ) ) )
+	print_stderr( "In batch mode, each report is converted to a file next to it, e.g. build-report.xml to build-report.html." )
 
 def print_stderr( message ):
 	print( message, file = sys.stderr )
 
+def convert( inputFile, targetFormat ):
+	fin = open( inputFile )
+	xmlReport = StringBasedXmlReport( fin.read() )
+	fin.close()
+
+	# the converters share the compiled stylesheets, converting many reports compiles them only once
+	converter = XmlReportConverter( xmlReport )
+	if targetFormat == "text":
+		return converter.convertToText()
+	elif targetFormat == "text_summary":
+		return converter.convertToTextSummary()
+	elif targetFormat == "html":
+		return converter.convertToHtml( enableCrossLinking = True )
+	elif targetFormat == "html_summary":
+		return converter.convertToHtml( summaryOnly = True, enableCrossLinking = True )
+
+def get_output_file_name( inputFile, targetFormat ):
+	baseName = os.path.splitext( inputFile )[0]
+	if targetFormat.endswith( "_summary" ):
+		baseName += "-summary"
+	suffix = "txt" if targetFormat.startswith( "text" ) else "html"
+	return "{0}.{1}".format( baseName, suffix )
+
+def convert_batch( inputFiles, targetFormat ):
+	"""Convert all input files in this process, and write each result next to the input file.
+	\return The number of reports that could not be converted"""
+	failed = 0
+	for inputFile in inputFiles:
+		outputFile = get_output_file_name( inputFile, targetFormat )
+		try:
+			result = convert( inputFile, targetFormat )
+			with codecs.open( outputFile, 'w', encoding = "utf-8" ) as fout:
+				fout.write( result or "" )
+			print_stderr( "{0} -> {1}".format( inputFile, outputFile ) )
+		except ( IOError, MomException, ExpatError ) as e:
+			print_stderr( "Cannot convert {0}: {1}".format( inputFile, e ) )
+			failed += 1
+	return failed
+
 def main():
 	# instantiate MApplication, required for debug() calls
 	MApplication()
 
+	if len( sys.argv ) > 1 and sys.argv[1] == BATCH_OPTION:
+		if len( sys.argv ) < 4 or sys.argv[2] not in TARGET_FORMATS:
+			usage()
+			sys.exit( 1 )
+		sys.exit( 1 if convert_batch( sys.argv[3:], sys.argv[2] ) else 0 )
+
 	# check if first parameter is set
 	try:
 		inputFile = sys.argv[1]
@@ -55,20 +107,7 @@ def main():
 		# second parameter not set => using default
 		targetFormat = "text"
 
-	# start IO
-	fin = open( inputFile )
-	xmlReport = StringBasedXmlReport( fin.read() )
-	fin.close
-
-	converter = XmlReportConverter( xmlReport )
-	if targetFormat == "text":
-		print( converter.convertToText() )
-	elif targetFormat == "text_summary":
-		print( converter.convertToTextSummary() )
-	elif targetFormat == "html":
-		print( converter.convertToHtml( enableCrossLinking = True ) )
-	elif targetFormat == "html_summary":
-		print( converter.convertToHtml( summaryOnly = True, enableCrossLinking = True ) )
+	print( convert( inputFile, targetFormat ) )
 
 if __name__ == "__main__":
 	main()